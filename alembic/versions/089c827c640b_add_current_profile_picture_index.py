@@ -0,0 +1,37 @@
+"""Add current profile picture index
+
+The index is built concurrently, so the table stays writable while the migration runs.
+Concurrent index operations cannot run inside a transaction, hence the autocommit blocks.
+
+Revision ID: 089c827c640b
+Revises: 05f9d7702a22
+Create Date: 2026-10-17 10:12:31.418205
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '089c827c640b'
+down_revision: Union[str, None] = '05f9d7702a22'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        # An interrupted concurrent build leaves an invalid index behind
+        op.drop_index('profile_picture_user_id_index', table_name='profile_picture',
+                      postgresql_concurrently=True, if_exists=True)
+        op.create_index('profile_picture_user_id_index', 'profile_picture', ['user_id'],
+                        unique=False, postgresql_where=sa.text('NOT is_deleted'),
+                        postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index('profile_picture_user_id_index', table_name='profile_picture',
+                      postgresql_concurrently=True, if_exists=True)
@@ -0,0 +1,38 @@
+"""Add profile picture deleted_at index
+
+Adds an index on the user and deletion time of profile pictures. It answers the last deletion of
+a picture of a user, which the Last-Modified of the user profile depends on, and the foreign key
+checks when a user is deleted, which no index covered since the partial current picture index.
+
+The index is built concurrently, so the table stays writable while the migration runs.
+
+Revision ID: 24116036c128
+Revises: 433bde2b253a
+Create Date: 2026-10-17 12:04:37.518204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '24116036c128'
+down_revision: Union[str, None] = '433bde2b253a'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        # An interrupted concurrent build leaves an invalid index behind
+        op.drop_index('profile_picture_user_id_deleted_at_index', table_name='profile_picture',
+                      postgresql_concurrently=True, if_exists=True)
+        op.create_index('profile_picture_user_id_deleted_at_index', 'profile_picture',
+                        ['user_id', 'deleted_at'], unique=False, postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index('profile_picture_user_id_deleted_at_index', table_name='profile_picture',
+                      postgresql_concurrently=True, if_exists=True)
@@ -0,0 +1,64 @@
+"""Make user identifiers case insensitive
+
+Replaces the unique constraints on email and username with unique indexes on lower(email) and
+lower(username), which both enforce case-insensitive uniqueness and back the case-insensitive
+lookups, and stores the existing emails in lower case.
+
+Existing identifiers that only differ in case cannot be merged automatically: the migration
+lists them and stops, so they can be resolved by hand before running it again.
+
+Revision ID: 433bde2b253a
+Revises: b09af242be6b
+Create Date: 2026-10-17 11:20:45.130562
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '433bde2b253a'
+down_revision: Union[str, None] = 'b09af242be6b'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _find_case_collisions(column: str) -> list[list[str]]:
+    return [row[0] for row in op.get_bind().execute(sa.text(f"""
+        SELECT array_agg({column} ORDER BY id) FROM "user"
+        GROUP BY lower({column}) HAVING count(*) > 1
+    """))]
+
+
+def upgrade() -> None:
+    collisions = {column: _find_case_collisions(column) for column in ('username', 'email')}
+    if any(collisions.values()):
+        raise RuntimeError(
+            "Some users have identifiers that only differ in case, rename them first: "
+            + "; ".join(f"{column}: {', '.join(map(str, values))}"
+                        for column, groups in collisions.items() for values in groups))
+
+    op.execute('UPDATE "user" SET email = lower(email) WHERE email <> lower(email)')
+
+    with op.get_context().autocommit_block():
+        for column in ('email', 'username'):
+            # An interrupted concurrent build leaves an invalid index behind
+            op.drop_index(f'user_{column}_lower_index', table_name='user',
+                          postgresql_concurrently=True, if_exists=True)
+            op.create_index(f'user_{column}_lower_index', 'user', [sa.text(f'lower({column})')],
+                            unique=True, postgresql_concurrently=True)
+            op.drop_constraint(f'user_{column}_key', 'user', type_='unique')
+
+
+def downgrade() -> None:
+    # The emails stay in lower case
+    with op.get_context().autocommit_block():
+        for column in ('email', 'username'):
+            op.create_index(f'user_{column}_key', 'user', [column], unique=True,
+                            postgresql_concurrently=True, if_not_exists=True)
+            op.execute(f'ALTER TABLE "user" ADD CONSTRAINT user_{column}_key '
+                       f'UNIQUE USING INDEX user_{column}_key')
+            op.drop_index(f'user_{column}_lower_index', table_name='user',
+                          postgresql_concurrently=True, if_exists=True)
@@ -0,0 +1,63 @@
+"""Clean up user and profile picture indexes
+
+Drops the user indexes duplicating the unique constraints on email and username, and replaces
+the current profile picture index with a unique one, so a user has at most one live picture.
+
+The indexes are built and dropped concurrently, so the tables stay writable while the migration
+runs. Concurrent index operations cannot run inside a transaction, hence the autocommit blocks.
+
+Revision ID: b09af242be6b
+Revises: 089c827c640b
+Create Date: 2026-10-17 10:48:02.771936
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b09af242be6b'
+down_revision: Union[str, None] = '089c827c640b'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Keep only the most recent live picture of each user
+    op.execute("""
+        UPDATE profile_picture SET is_deleted = TRUE, deleted_at = now()
+        WHERE NOT is_deleted AND id NOT IN (
+            SELECT DISTINCT ON (user_id) id FROM profile_picture
+            WHERE NOT is_deleted
+            ORDER BY user_id, uploaded_at DESC NULLS LAST
+        )
+    """)
+
+    with op.get_context().autocommit_block():
+        # An interrupted concurrent build leaves an invalid index behind
+        op.drop_index('profile_picture_user_id_current_index', table_name='profile_picture',
+                      postgresql_concurrently=True, if_exists=True)
+        op.create_index('profile_picture_user_id_current_index', 'profile_picture', ['user_id'],
+                        unique=True, postgresql_where=sa.text('NOT is_deleted'),
+                        postgresql_concurrently=True)
+        op.drop_index('profile_picture_user_id_index', table_name='profile_picture',
+                      postgresql_concurrently=True, if_exists=True)
+        op.drop_index('user_email_index', table_name='user',
+                      postgresql_concurrently=True, if_exists=True)
+        op.drop_index('user_username_index', table_name='user',
+                      postgresql_concurrently=True, if_exists=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.create_index('user_username_index', 'user', ['username'], unique=False,
+                        postgresql_concurrently=True, if_not_exists=True)
+        op.create_index('user_email_index', 'user', ['email'], unique=False,
+                        postgresql_concurrently=True, if_not_exists=True)
+        op.create_index('profile_picture_user_id_index', 'profile_picture', ['user_id'],
+                        unique=False, postgresql_where=sa.text('NOT is_deleted'),
+                        postgresql_concurrently=True, if_not_exists=True)
+        op.drop_index('profile_picture_user_id_current_index', table_name='profile_picture',
+                      postgresql_concurrently=True, if_exists=True)
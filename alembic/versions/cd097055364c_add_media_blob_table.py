@@ -0,0 +1,59 @@
+"""Add media blob table
+
+Stores each uploaded image once, under the SHA-256 digest of its content, with the number of
+current profile pictures referencing it. The paths of the profile pictures and their variants
+are no longer unique, as the pictures with the same content share their files.
+
+The index on the new column is built concurrently, so the table stays writable while it is.
+
+Revision ID: cd097055364c
+Revises: abb35ae277ad
+Create Date: 2026-10-17 01:15:36.266006
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'cd097055364c'
+down_revision: Union[str, None] = 'abb35ae277ad'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('media_blob',
+    sa.Column('sha256', sa.String(length=64), nullable=False),
+    sa.Column('path', sa.String(length=255), nullable=False),
+    sa.Column('ref_count', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+    sa.PrimaryKeyConstraint('sha256')
+    )
+    op.add_column('profile_picture', sa.Column('blob_sha256', sa.String(length=64), nullable=True))
+    op.create_foreign_key('profile_picture_blob_sha256_fkey', 'profile_picture', 'media_blob',
+                          ['blob_sha256'], ['sha256'], ondelete='SET NULL')
+    op.drop_constraint('profile_picture_path_key', 'profile_picture', type_='unique')
+    op.drop_constraint('profile_picture_variant_path_key', 'profile_picture_variant',
+                       type_='unique')
+
+    with op.get_context().autocommit_block():
+        # An interrupted concurrent build leaves an invalid index behind
+        op.drop_index('profile_picture_blob_sha256_index', table_name='profile_picture',
+                      postgresql_concurrently=True, if_exists=True)
+        op.create_index('profile_picture_blob_sha256_index', 'profile_picture', ['blob_sha256'],
+                        unique=False, postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    # Fails if profile pictures share their files; they must be copied apart first
+    op.create_unique_constraint('profile_picture_variant_path_key', 'profile_picture_variant',
+                                ['path'])
+    op.create_unique_constraint('profile_picture_path_key', 'profile_picture', ['path'])
+    op.drop_index('profile_picture_blob_sha256_index', table_name='profile_picture')
+    op.drop_constraint('profile_picture_blob_sha256_fkey', 'profile_picture', type_='foreignkey')
+    op.drop_column('profile_picture', 'blob_sha256')
+    op.drop_table('media_blob')
@@ -0,0 +1,20 @@
+"""
+Module for exposing the application metrics to Prometheus.
+"""
+
+from fastapi import APIRouter, Response
+from prometheus_client import CONTENT_TYPE_LATEST
+from app.core.metrics import render_metrics
+
+metrics_router = APIRouter(tags=["Monitoring"])
+
+
+@metrics_router.get("/metrics",
+                    summary="Get the application metrics",
+                    response_description="The metrics in the Prometheus text format.",
+                    include_in_schema=False)
+def get_metrics():
+    """
+    Get the application metrics in the Prometheus text exposition format.
+    """
+    return Response(content=render_metrics(), media_type=CONTENT_TYPE_LATEST)
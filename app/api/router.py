@@ -7,8 +7,12 @@ This module creates an APIRouter instance that includes other routers.
 from fastapi import APIRouter
 from app.api.v1.user import user_router
 from app.api.v1.auth import auth_router
+from app.api.v1.pfp import profile_picture_router
+from app.api.metrics import metrics_router
 
 router = APIRouter()
 
 router.include_router(user_router)
 router.include_router(auth_router)
+router.include_router(profile_picture_router)
+router.include_router(metrics_router)
@@ -8,8 +8,10 @@ including login functionality.
 from typing import Annotated
 from fastapi import APIRouter, status, Depends
 from fastapi.security import OAuth2PasswordRequestForm
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from app.database.database import get_db
+from app.core.responses import ModelResponse
+from app.dependency.db_dependency import get_session
 from app.schema.token import Token
 from app.service.auth_service import AuthService
 
@@ -21,8 +23,8 @@ auth_router = APIRouter(prefix="/v1", tags=["Authentication"])
                   summary="Authenticate a user",
                   response_description="The access token for the user.",
                   status_code=status.HTTP_200_OK)
-def login(user_credentials: Annotated[OAuth2PasswordRequestForm, Depends()],
-          session: Annotated[Session, Depends(get_db)]):
+async def login(user_credentials: Annotated[OAuth2PasswordRequestForm, Depends()],
+                session: Annotated[Session | AsyncSession, Depends(get_session)]):
     """
     Authenticate a user by providing the username (or email) and password.
 
@@ -34,4 +36,5 @@ def login(user_credentials: Annotated[OAuth2PasswordRequestForm, Depends()],
     Raises HTTPException if the user is not found or the password is incorrect.
     """
     auth_service = AuthService(session)
-    return auth_service.authenticate_user(user_credentials.username, user_credentials.password)
+    return ModelResponse(await auth_service.authenticate_user(user_credentials.username,
+                                                              user_credentials.password))
@@ -1,18 +1,31 @@
 """
 Module for handling profile picture-related API routes and operations in version 1 of the API.
 
-This module defines the pfp_router APIRouter instance for managing profile picture endpoints.
+This module defines the pfp_router APIRouter instance for managing the profile picture of the
+authenticated user, and the profile_picture_router APIRouter instance for serving the pictures.
 """
 
+from pathlib import PurePosixPath
 from typing import Annotated
-from fastapi import APIRouter, status, Depends, UploadFile
+from uuid import UUID
+from fastapi import APIRouter, status, Depends, Header, HTTPException, Query, Response, UploadFile
+from fastapi.responses import FileResponse, RedirectResponse
 from app.auth.jwt import get_current_user
+from app.core.conditional import format_http_date, is_not_modified
+from app.core.config import settings
+from app.core.image_utils import VariantSize
+from app.core.responses import ModelResponse, file_response
+from app.core.storage import storage
 from app.dependency.pfp_service_dependency import get_pfp_service
-from app.schema.pfp import ProfilePicturePublic
+from app.schema.pfp import ProfilePicturePublic, ProfilePictureUpload, ProfilePictureUploadCreate
 from app.schema.user import UserPayload
-from app.service.pfp_service import ProfilePictureService
+from app.service.pfp_service import KEY_PREFIX, ProfilePictureService, media_type_of
 
 pfp_router = APIRouter(prefix="/me/profile-pictures")
+profile_picture_router = APIRouter(prefix="/v1/profile-pictures", tags=["Profile Pictures"])
+
+# A picture never changes once uploaded, as a new upload gets a new UUID
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
 
 
 @pfp_router.post("/",
@@ -33,7 +46,55 @@ async def upload_pfp(file: UploadFile,
     Raises HTTPException if the file format is unsupported or the file size exceeds the limit
     or an error occurs while saving the file.
     """
-    return await pfp_service.save_profile_picture(user_payload.id, file)
+    return ModelResponse(await pfp_service.save_profile_picture(user_payload.id, file),
+                         status_code=status.HTTP_201_CREATED)
+
+
+@pfp_router.post("/uploads",
+                 response_model=ProfilePictureUpload,
+                 summary="Start a direct upload of a profile picture",
+                 response_description="The request uploading the picture to the storage.",
+                 status_code=status.HTTP_201_CREATED)
+async def create_pfp_upload(upload: ProfilePictureUploadCreate,
+                            user_payload: Annotated[UserPayload, Depends(get_current_user)],
+                            pfp_service: Annotated[ProfilePictureService, Depends(get_pfp_service)]):
+    """
+    Start an upload of a profile picture straight to the storage, for the authenticated user.
+
+    - **media_type**: The type of the image to upload.
+    - **size**: The size of the image, in bytes.
+
+    Returns the URL and headers of the PUT request uploading the image, and the ID to confirm
+    the upload with once done.
+
+    Raises HTTPException if the file size exceeds the limit, or the storage does not accept
+    direct uploads.
+    """
+    return ModelResponse(await pfp_service.create_upload(user_payload.id, upload),
+                         status_code=status.HTTP_201_CREATED)
+
+
+@pfp_router.post("/uploads/{upload_id}",
+                 response_model=ProfilePicturePublic,
+                 summary="Confirm a direct upload of a profile picture",
+                 response_description="The uploaded profile picture details.",
+                 status_code=status.HTTP_201_CREATED)
+async def confirm_pfp_upload(upload_id: UUID,
+                             user_payload: Annotated[UserPayload, Depends(get_current_user)],
+                             pfp_service: Annotated[ProfilePictureService, Depends(get_pfp_service)]):
+    """
+    Confirm an upload of a profile picture made straight to the storage, making it the profile
+    picture of the authenticated user.
+
+    - **upload_id**: ID of the upload.
+
+    Returns the uploaded profile picture details.
+
+    Raises HTTPException if the upload is not found, the file format is unsupported or the file
+    size exceeds the limit.
+    """
+    return ModelResponse(await pfp_service.confirm_upload(user_payload.id, upload_id),
+                         status_code=status.HTTP_201_CREATED)
 
 
 @pfp_router.delete("/",
@@ -41,8 +102,8 @@ async def upload_pfp(file: UploadFile,
                    summary="Delete current profile picture",
                    response_description="No content",
                    status_code=status.HTTP_204_NO_CONTENT)
-def delete_current_pfp(user_payload: Annotated[UserPayload, Depends(get_current_user)],
-                       pfp_service: Annotated[ProfilePictureService, Depends(get_pfp_service)]):
+async def delete_current_pfp(user_payload: Annotated[UserPayload, Depends(get_current_user)],
+                             pfp_service: Annotated[ProfilePictureService, Depends(get_pfp_service)]):
     """
     Delete the current profile picture of the authenticated user.
 
@@ -50,4 +111,78 @@ def delete_current_pfp(user_payload: Annotated[UserPayload, Depends(get_current_
 
     Raises HTTPException if the user does not have a profile picture.
     """
-    return pfp_service.delete_current_profile_picture(user_payload.id)
+    return await pfp_service.delete_current_profile_picture(user_payload.id)
+
+
+@profile_picture_router.get("/{pfp_uuid}",
+                            response_class=FileResponse,
+                            summary="Get a profile picture",
+                            response_description="The image of the profile picture.",
+                            status_code=status.HTTP_200_OK)
+async def get_pfp(pfp_uuid: UUID,
+                  pfp_service: Annotated[ProfilePictureService, Depends(get_pfp_service)],
+                  size: Annotated[VariantSize | None, Query()] = None,
+                  accept: Annotated[str | None, Header()] = None,
+                  if_none_match: Annotated[str | None, Header()] = None,
+                  if_modified_since: Annotated[str | None, Header()] = None,
+                  range_header: Annotated[str | None, Header(alias="Range")] = None,
+                  if_range: Annotated[str | None, Header()] = None):
+    """
+    Get the image of a profile picture by its UUID.
+
+    - **pfp_uuid**: UUID of the profile picture.
+    - **size**: Width and height of the square variant to get, in pixels; the original image if
+    omitted. Variants are WebP for clients accepting it, and JPEG otherwise.
+    - **If-None-Match**, **If-Modified-Since**: Validators of the client's copy of the picture.
+    - **Range**, **If-Range**: A single range of bytes of the picture to send.
+
+    Returns the image, the requested range of it, or 304 Not Modified if the client's copy is
+    current; with an object storage, a redirect to the image in the storage.
+
+    Raises HTTPException if the profile picture is not found.
+    """
+    headers = {"Cache-Control": IMMUTABLE_CACHE_CONTROL, "X-Content-Type-Options": "nosniff"}
+    variant = None
+    if size is not None:
+        headers["Vary"] = "Accept"
+        variant = await pfp_service.get_variant(pfp_uuid, size, "image/webp" in (accept or ""))
+
+    if variant is not None:
+        key = variant.path
+        media_type = variant.media_type
+        etag = f'"{pfp_uuid}-{size}-{PurePosixPath(key).suffix[1:]}"'
+        last_modified = variant.created_at
+    else:
+        # Pictures uploaded before the variants were introduced are sent at their original size
+        pfp = await pfp_service.get_by_id(pfp_uuid)
+        key = pfp.path
+        media_type = media_type_of(key)
+        etag = f'"{pfp.id}"'
+        last_modified = pfp.uploaded_at
+
+    url = await storage.url(key)
+    if url is not None:
+        # The client downloads the picture from the storage; the redirect carries no validator,
+        # as it must not be reused once the signed URL expires
+        headers["Cache-Control"] = f"private, max-age={settings.storage_url_expires // 2}"
+        return RedirectResponse(url, status_code=status.HTTP_307_TEMPORARY_REDIRECT,
+                                headers=headers)
+
+    headers["ETag"] = etag
+    headers["Last-Modified"] = format_http_date(last_modified)
+
+    if is_not_modified(etag, last_modified, if_none_match, if_modified_since):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    if settings.media_accel_redirect_prefix is not None:
+        # The proxy sends the file, and answers the Range requests
+        location = PurePosixPath(key).relative_to(KEY_PREFIX)
+        headers["X-Accel-Redirect"] = f"{settings.media_accel_redirect_prefix}{location}"
+        return Response(headers=headers, media_type=media_type)
+
+    try:
+        return await file_response(storage.path(key), media_type, headers, range_header,
+                                   if_range)
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND,
+                            detail="Profile picture not found.") from e
@@ -5,8 +5,10 @@ This module defines the user_router APIRouter instance for managing user endpoin
 """
 
 from typing import Annotated
-from fastapi import APIRouter, status, Depends
+from fastapi import APIRouter, status, Depends, Header, Response
 from app.auth.jwt import get_current_user
+from app.core.conditional import format_http_date, is_not_modified
+from app.core.responses import ModelResponse
 from app.dependency.user_service_dependency import get_user_service
 from app.schema.user import UserCreate, UserPublic, UserUpdateUsername, UserUpdatePassword, UserDelete, UserPayload
 from app.service.user_service import UserService
@@ -20,17 +22,31 @@ user_router = APIRouter(prefix="/v1/users", tags=["Users"])
                  summary="Get a user by ID",
                  response_description="The user with the provided ID.",
                  status_code=status.HTTP_200_OK)
-def get_user_by_id(user_id: int, user_service: Annotated[UserService, Depends(get_user_service)]):
+async def get_user_by_id(user_id: int,
+                         user_service: Annotated[UserService, Depends(get_user_service)],
+                         if_none_match: Annotated[str | None, Header()] = None,
+                         if_modified_since: Annotated[str | None, Header()] = None):
     """
     Get a user by its ID.
 
     - **user_id**: ID of the user to retrieve.
+    - **If-None-Match**: ETag of the client's copy of the user.
+    - **If-Modified-Since**: Last-Modified of the client's copy of the user.
 
-    Returns the user with the provided ID.
+    Returns the user with the provided ID, or 304 Not Modified if the client's copy is current.
 
     Raises HTTPException if the user with the provided ID is not found.
     """
-    return user_service.get_by_id(user_id)
+    profile = await user_service.get_public_profile(user_id)
+    headers = {"ETag": profile.etag,
+               "Last-Modified": format_http_date(profile.last_modified),
+               "Cache-Control": "no-cache"}
+
+    if is_not_modified(profile.etag, profile.last_modified, if_none_match, if_modified_since):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    # The cached profile is already serialized, so it skips the response model
+    return Response(profile.content, media_type="application/json", headers=headers)
 
 
 @user_router.post("/",
@@ -38,7 +54,8 @@ def get_user_by_id(user_id: int, user_service: Annotated[UserService, Depends(ge
                   summary="Create a user",
                   response_description="The created user.",
                   status_code=status.HTTP_201_CREATED)
-def create_user(user: UserCreate, user_service: Annotated[UserService, Depends(get_user_service)]):
+async def create_user(user: UserCreate,
+                      user_service: Annotated[UserService, Depends(get_user_service)]):
     """
     Create a new user.
 
@@ -50,7 +67,7 @@ def create_user(user: UserCreate, user_service: Annotated[UserService, Depends(g
 
     Raises HTTPException if the username or email is already registered.
     """
-    return user_service.create(user)
+    return ModelResponse(await user_service.create(user), status_code=status.HTTP_201_CREATED)
 
 
 @user_router.put("/me/username",
@@ -58,9 +75,9 @@ def create_user(user: UserCreate, user_service: Annotated[UserService, Depends(g
                  summary="Update a user's username",
                  response_description="The updated user.",
                  status_code=status.HTTP_200_OK)
-def update_user_username(user_payload: Annotated[UserPayload, Depends(get_current_user)],
-                         new_username: UserUpdateUsername,
-                         user_service: Annotated[UserService, Depends(get_user_service)]):
+async def update_user_username(user_payload: Annotated[UserPayload, Depends(get_current_user)],
+                               new_username: UserUpdateUsername,
+                               user_service: Annotated[UserService, Depends(get_user_service)]):
     """
     Update a user's username.
 
@@ -72,7 +89,7 @@ def update_user_username(user_payload: Annotated[UserPayload, Depends(get_curren
     Raises HTTPException if the user with the provided ID is not found or if the username is 
     already registered or if the new username is the same as the old username.
     """
-    return user_service.update_username(user_payload.id, new_username)
+    return ModelResponse(await user_service.update_username(user_payload.id, new_username))
 
 
 @user_router.put("/me/password",
@@ -80,9 +97,9 @@ def update_user_username(user_payload: Annotated[UserPayload, Depends(get_curren
                  summary="Update a user's password",
                  response_description="The updated user.",
                  status_code=status.HTTP_200_OK)
-def update_user_password(user_payload: Annotated[UserPayload, Depends(get_current_user)],
-                         user_passwords: UserUpdatePassword,
-                         user_service: Annotated[UserService, Depends(get_user_service)]):
+async def update_user_password(user_payload: Annotated[UserPayload, Depends(get_current_user)],
+                               user_passwords: UserUpdatePassword,
+                               user_service: Annotated[UserService, Depends(get_user_service)]):
     """
     Update a user's password.
 
@@ -94,7 +111,7 @@ def update_user_password(user_payload: Annotated[UserPayload, Depends(get_curren
     Raises HTTPException if the user with the provided ID is not found or if the old password is
     incorrect or if the new password is the same as the old password.
     """
-    return user_service.update_password(user_payload.id, user_passwords)
+    return ModelResponse(await user_service.update_password(user_payload.id, user_passwords))
 
 
 @user_router.delete("/me",
@@ -102,9 +119,9 @@ def update_user_password(user_payload: Annotated[UserPayload, Depends(get_curren
                     summary="Delete a user",
                     response_description="No content",
                     status_code=status.HTTP_204_NO_CONTENT)
-def delete_user(user_payload: Annotated[UserPayload, Depends(get_current_user)],
-                password: UserDelete,
-                user_service: Annotated[UserService, Depends(get_user_service)]):
+async def delete_user(user_payload: Annotated[UserPayload, Depends(get_current_user)],
+                      password: UserDelete,
+                      user_service: Annotated[UserService, Depends(get_user_service)]):
     """
     Delete a user.
 
@@ -116,7 +133,7 @@ def delete_user(user_payload: Annotated[UserPayload, Depends(get_current_user)],
     Raises HTTPException if the user with the provided ID is not found or if the password is 
     incorrect.
     """
-    return user_service.delete(user_payload.id, password)
+    return await user_service.delete(user_payload.id, password)
 
 
 user_router.include_router(pfp_router)
@@ -1,7 +1,11 @@
 """
 This module provides utility functions for creating and verifying JWT tokens
 using the PyJWT library.
+
+Verified tokens are kept in a bounded in-process cache until they expire, so repeated requests
+with the same token skip signature verification and payload validation.
 """
+import hashlib
 from datetime import datetime, timedelta, timezone
 
 import jwt
@@ -10,6 +14,8 @@ from fastapi import HTTPException, status, Depends
 from app.schema.token import TokenData, Token
 from app.schema.user import UserPayload
 from app.core.config import settings
+from app.core.timing import timed
+from app.core.ttl_cache import TTLCache
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="v1/login")
 
@@ -18,6 +24,22 @@ SECRET_KEY = f"{settings.secret_key}"
 ALGORITHM = f"{settings.algorithm}"
 ACCESS_TOKEN_EXPIRE_MINUTES = settings.access_token_expire_minutes
 
+# Maps the SHA-256 digest of a verified token to its UserPayload, up to the token's expiry.
+token_cache = TTLCache(max_size=settings.token_cache_size)
+
+
+def _token_cache_key(token: str) -> bytes:
+    """
+    Computes the cache key of a token, so raw tokens are never kept in memory.
+
+    Args:
+        token (str): The JWT token.
+
+    Returns:
+        bytes: The SHA-256 digest of the token.
+    """
+    return hashlib.sha256(token.encode()).digest()
+
 
 def create_access_token(data: TokenData) -> Token:
     """
@@ -35,15 +57,17 @@ def create_access_token(data: TokenData) -> Token:
     expire = datetime.now(timezone.utc) + \
         timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
 
-    encoded_jwt = jwt.encode(
-        {**to_encode, "exp": expire}, SECRET_KEY, algorithm=ALGORITHM)
+    with timed("jwt"):
+        encoded_jwt = jwt.encode(
+            {**to_encode, "exp": expire}, SECRET_KEY, algorithm=ALGORITHM)
 
     return Token(access_token=encoded_jwt, expire_time=expire, user=data.user)
 
 
 def verify_access_token(token: str, credentials_exception: HTTPException) -> TokenData:
     """
-    Verifies the validity of a JWT access token.
+    Verifies the validity of a JWT access token and caches the user payload until the token
+    expires.
 
     Args:
         token (str): The JWT token to verify.
@@ -56,7 +80,8 @@ def verify_access_token(token: str, credentials_exception: HTTPException) -> Tok
         Exception: If the token is invalid or expired.
     """
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        with timed("jwt"):
+            payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         user_dict = payload.get("user")
 
         if user_dict is None:
@@ -67,6 +92,10 @@ def verify_access_token(token: str, credentials_exception: HTTPException) -> Tok
     except jwt.PyJWTError as e:
         raise credentials_exception from e
 
+    expire = payload.get("exp")
+    if expire is not None:
+        token_cache.set(_token_cache_key(token), user, expires_at=expire)
+
     return token_data
 
 
@@ -83,6 +112,11 @@ def get_current_user(token: str = Depends(oauth2_scheme)) -> UserPayload:
     Raises:
         HTTPException: If the token is invalid or expired
     """
+    user_payload = token_cache.get(_token_cache_key(token))
+
+    if user_payload is not None:
+        return user_payload
+
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
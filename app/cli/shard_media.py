@@ -0,0 +1,309 @@
+"""
+Command moving the profile picture files stored in the flat media/pfp directory to the fan-out
+layout that new uploads are stored in, and updating the paths recorded in the database.
+
+Usage:
+    python -m app.cli.shard_media [--batch-size 100] [--pause 0.1] [--concurrency 16]
+
+The files are moved in batches, each in its own short transaction that locks only the rows of
+the batch, so uploads and deletions go on while the command runs:
+
+1. The rows of a batch of stored images, and of pictures stored before images were
+   deduplicated, are locked, skipping those locked by requests. The pictures of the images are
+   locked before the images, in the order the requests lock them, so the command and the
+   requests cannot deadlock.
+2. The files are copied to their new keys, a bounded number at a time; a hard link on the
+   local file system.
+3. The paths of the rows are updated, and the transaction is committed.
+4. The files are deleted from their old keys.
+
+The command is resumable: moved rows are no longer selected, so running it again picks up
+where an interrupted run stopped, as well as the rows skipped while they were locked. A run
+interrupted between steps 3 and 4 leaves the old copies of the files of a batch behind.
+"""
+
+import argparse
+import asyncio
+import logging
+from pathlib import PurePosixPath
+from uuid import UUID
+
+from sqlalchemy import bindparam, distinct, func, select, update
+from sqlalchemy.orm import Session
+
+from app.core.storage import storage
+from app.database.database import SessionLocal
+from app.model.media_blob import MediaBlob
+from app.model.pfp import ProfilePicture
+from app.model.pfp_variant import ProfilePictureVariant
+from app.service.pfp_service import KEY_PREFIX, sharded_key
+
+logger = logging.getLogger(__name__)
+
+# The paths that are already in the fan-out layout
+SHARDED_PATTERN = f"{KEY_PREFIX}/%/%"
+
+# Parameters: after, batch_size
+SELECT_UNSHARDED_BLOB_DIGESTS = (select(MediaBlob.sha256)
+                                 .where(MediaBlob.sha256 > bindparam("after"),
+                                        MediaBlob.path.not_like(SHARDED_PATTERN))
+                                 .order_by(MediaBlob.sha256)
+                                 .limit(bindparam("batch_size")))
+
+# Parameters: digests
+SELECT_BLOB_PICTURES = (select(ProfilePicture.id, ProfilePicture.blob_sha256)
+                        .where(ProfilePicture.blob_sha256.in_(
+                            bindparam("digests", expanding=True)))
+                        .order_by(ProfilePicture.id))
+
+# Parameters: digests
+LOCK_BLOB_PICTURES = SELECT_BLOB_PICTURES.with_for_update()
+
+# Parameters: digests
+SELECT_UNSHARDED_BLOBS = (select(MediaBlob.sha256, MediaBlob.path)
+                          .where(MediaBlob.sha256.in_(bindparam("digests", expanding=True)),
+                                 MediaBlob.path.not_like(SHARDED_PATTERN))
+                          .order_by(MediaBlob.sha256)
+                          .with_for_update(skip_locked=True))
+
+# Parameters: digest
+SELECT_BLOB_VARIANT_PATHS = (select(distinct(ProfilePictureVariant.path))
+                             .join(ProfilePicture)
+                             .where(ProfilePicture.blob_sha256 == bindparam("digest")))
+
+# Parameters: digest, new_path
+UPDATE_BLOB_PATH = (update(MediaBlob)
+                    .where(MediaBlob.sha256 == bindparam("digest"))
+                    .values(path=bindparam("new_path")))
+
+# Parameters: digest, old_path, new_path
+UPDATE_BLOB_PICTURE_PATHS = (update(ProfilePicture)
+                             .where(ProfilePicture.blob_sha256 == bindparam("digest"),
+                                    ProfilePicture.path == bindparam("old_path"))
+                             .values(path=bindparam("new_path")))
+
+# Parameters: digest, old_path, new_path
+UPDATE_BLOB_VARIANT_PATHS = (update(ProfilePictureVariant)
+                             .where(ProfilePictureVariant.profile_picture_id.in_(
+                                 select(ProfilePicture.id)
+                                 .where(ProfilePicture.blob_sha256 == bindparam("digest"))),
+                                    ProfilePictureVariant.path == bindparam("old_path"))
+                             .values(path=bindparam("new_path")))
+
+# Parameters: after, batch_size. The current pictures stored before images were deduplicated;
+# the files of the deleted ones are gone.
+SELECT_UNSHARDED_PICTURES = (select(ProfilePicture.id, ProfilePicture.path)
+                             .where(ProfilePicture.id > bindparam("after"),
+                                    ProfilePicture.blob_sha256.is_(None),
+                                    ProfilePicture.is_deleted.is_(False),
+                                    ProfilePicture.path.not_like(SHARDED_PATTERN))
+                             .order_by(ProfilePicture.id)
+                             .limit(bindparam("batch_size"))
+                             .with_for_update(skip_locked=True))
+
+# Parameters: pfp_id
+SELECT_PICTURE_VARIANT_PATHS = (select(ProfilePictureVariant.path)
+                                .where(ProfilePictureVariant.profile_picture_id
+                                       == bindparam("pfp_id")))
+
+# Parameters: pfp_id, old_path, new_path
+UPDATE_PICTURE_PATH = (update(ProfilePicture)
+                       .where(ProfilePicture.id == bindparam("pfp_id"),
+                              ProfilePicture.path == bindparam("old_path"))
+                       .values(path=bindparam("new_path")))
+
+# Parameters: pfp_id, old_path, new_path
+UPDATE_PICTURE_VARIANT_PATHS = (update(ProfilePictureVariant)
+                                .where(ProfilePictureVariant.profile_picture_id
+                                       == bindparam("pfp_id"),
+                                       ProfilePictureVariant.path == bindparam("old_path"))
+                                .values(path=bindparam("new_path")))
+
+# The number of stored images and pictures left in the flat layout
+COUNT_UNSHARDED = select(
+    select(func.count())  # pylint: disable=not-callable
+    .select_from(MediaBlob)
+    .where(MediaBlob.path.not_like(SHARDED_PATTERN))
+    .scalar_subquery()
+    + select(func.count())  # pylint: disable=not-callable
+    .select_from(ProfilePicture)
+    .where(ProfilePicture.blob_sha256.is_(None),
+           ProfilePicture.is_deleted.is_(False),
+           ProfilePicture.path.not_like(SHARDED_PATTERN))
+    .scalar_subquery())
+
+
+async def _copy_files(paths: list[str], limit: asyncio.Semaphore) -> dict[str, str] | None:
+    """
+    Copies the files of a picture to their keys in the fan-out layout, concurrently.
+
+    Args:
+        paths (list[str]): The current keys of the picture and its variants.
+        limit (asyncio.Semaphore): The bound on the copies in flight, shared by the pictures of
+        the batch.
+
+    Returns:
+        dict[str, str] | None: The new key of each file, or None if one of them is missing, in
+        which case no copy is left behind.
+    """
+    moves = {path: sharded_key(PurePosixPath(path).name) for path in paths}
+
+    async def copy(old_path: str, new_path: str) -> None:
+        async with limit:
+            await storage.copy(old_path, new_path)
+
+    results = await asyncio.gather(*(copy(old_path, new_path)
+                                     for old_path, new_path in moves.items()),
+                                   return_exceptions=True)
+    errors = [result for result in results if isinstance(result, BaseException)]
+    if errors:
+        await storage.delete(moves.values())
+        if not all(isinstance(error, FileNotFoundError) for error in errors):
+            raise errors[0]
+        logger.warning("Skipping %s: %s", paths[0], errors[0])
+        return None
+    return moves
+
+
+async def _shard_blobs(session: Session, after: str, batch_size: int,
+                       limit: asyncio.Semaphore) -> tuple[str | None, list[str]]:
+    """
+    Moves the files of a batch of stored images, within the transaction of the session.
+
+    Args:
+        session (Session): The database session.
+        after (str): The digest of the last image of the previous batch.
+        batch_size (int): The maximum number of images in the batch.
+        limit (asyncio.Semaphore): The bound on the copies in flight.
+
+    Returns:
+        tuple[str | None, list[str]]: The digest of the last image of the batch, or None if
+        there was none left, and the old keys of the moved files, to delete once committed.
+    """
+    digests = session.scalars(SELECT_UNSHARDED_BLOB_DIGESTS,
+                              {"after": after, "batch_size": batch_size}).all()
+    if not digests:
+        return None, []
+    # Locked in the order the requests lock them: the pictures, then their images, which are
+    # skipped rather than waited for
+    locked_pictures = set(session.execute(LOCK_BLOB_PICTURES, {"digests": digests}).all())
+    blobs = session.execute(SELECT_UNSHARDED_BLOBS, {"digests": digests}).all()
+    # The pictures created since the others were locked are not locked by the command, and
+    # updating them could wait on a request waiting on the image; their images are left to a
+    # later run
+    new_pictures = set(session.execute(SELECT_BLOB_PICTURES, {"digests": digests}).all())
+    changed = {sha256 for _, sha256 in new_pictures - locked_pictures}
+    blobs = [blob for blob in blobs if blob.sha256 not in changed]
+    batch_variant_paths = [session.scalars(SELECT_BLOB_VARIANT_PATHS, {"digest": sha256}).all()
+                           for sha256, _ in blobs]
+    # The files of the whole batch are copied at once, so the rows are locked for less time
+    batch_moves = await asyncio.gather(*(
+        _copy_files([path, *paths], limit)
+        for (_, path), paths in zip(blobs, batch_variant_paths)))
+    old_paths = []
+    for (sha256, path), variant_paths, moves in zip(blobs, batch_variant_paths, batch_moves):
+        if moves is None:
+            continue
+        session.execute(UPDATE_BLOB_PATH, {"digest": sha256, "new_path": moves[path]})
+        session.execute(UPDATE_BLOB_PICTURE_PATHS,
+                        {"digest": sha256, "old_path": path, "new_path": moves[path]})
+        for variant_path in variant_paths:
+            session.execute(UPDATE_BLOB_VARIANT_PATHS,
+                            {"digest": sha256, "old_path": variant_path,
+                             "new_path": moves[variant_path]})
+        old_paths.extend(moves)
+    return digests[-1], old_paths
+
+
+async def _shard_pictures(session: Session, after: UUID, batch_size: int,
+                          limit: asyncio.Semaphore) -> tuple[UUID | None, list[str]]:
+    """
+    Moves the files of a batch of pictures stored before images were deduplicated, within the
+    transaction of the session.
+
+    Args:
+        session (Session): The database session.
+        after (UUID): The ID of the last picture of the previous batch.
+        batch_size (int): The maximum number of pictures in the batch.
+        limit (asyncio.Semaphore): The bound on the copies in flight.
+
+    Returns:
+        tuple[UUID | None, list[str]]: The ID of the last picture of the batch, or None if there
+        was none left, and the old keys of the moved files, to delete once committed.
+    """
+    pictures = session.execute(SELECT_UNSHARDED_PICTURES,
+                               {"after": after, "batch_size": batch_size}).all()
+    batch_variant_paths = [session.scalars(SELECT_PICTURE_VARIANT_PATHS,
+                                           {"pfp_id": pfp_id}).all()
+                           for pfp_id, _ in pictures]
+    batch_moves = await asyncio.gather(*(
+        _copy_files([path, *paths], limit)
+        for (_, path), paths in zip(pictures, batch_variant_paths)))
+    old_paths = []
+    for (pfp_id, path), variant_paths, moves in zip(pictures, batch_variant_paths, batch_moves):
+        if moves is None:
+            continue
+        session.execute(UPDATE_PICTURE_PATH,
+                        {"pfp_id": pfp_id, "old_path": path, "new_path": moves[path]})
+        for variant_path in variant_paths:
+            session.execute(UPDATE_PICTURE_VARIANT_PATHS,
+                            {"pfp_id": pfp_id, "old_path": variant_path,
+                             "new_path": moves[variant_path]})
+        old_paths.extend(moves)
+    return (pictures[-1].id if pictures else None), old_paths
+
+
+async def shard_media(batch_size: int, pause: float, concurrency: int) -> int:
+    """
+    Moves every profile picture file to the fan-out layout, batch by batch.
+
+    Args:
+        batch_size (int): The number of images or pictures moved per transaction.
+        pause (float): The number of seconds to wait between batches, to spread the load.
+        concurrency (int): The maximum number of files copied at once.
+
+    Returns:
+        int: The number of files moved.
+    """
+    moved = 0
+    limit = asyncio.Semaphore(concurrency)
+    for shard_batch, after in ((_shard_blobs, ""), (_shard_pictures, UUID(int=0))):
+        while after is not None:
+            with SessionLocal() as session:
+                with session.begin():
+                    after, old_paths = await shard_batch(session, after, batch_size, limit)
+            # The files are only deleted from their old keys once no row refers to them
+            await storage.delete(old_paths)
+            moved += len(old_paths)
+            logger.info("Moved %d files", moved)
+            if pause:
+                await asyncio.sleep(pause)
+
+    with SessionLocal() as session:
+        remaining = session.scalar(COUNT_UNSHARDED)
+    if remaining:
+        logger.warning("%d images or pictures were not moved, as their files were missing or "
+                       "their rows locked; run the command again to retry", remaining)
+    return moved
+
+
+def main() -> None:
+    """
+    Parses the command line arguments and runs the command.
+    """
+    parser = argparse.ArgumentParser(
+        description="Move the profile picture files to the fan-out layout.")
+    parser.add_argument("--batch-size", type=int, default=100,
+                        help="the number of images moved per transaction (default: 100)")
+    parser.add_argument("--pause", type=float, default=0.1,
+                        help="the number of seconds to wait between batches (default: 0.1)")
+    parser.add_argument("--concurrency", type=int, default=16,
+                        help="the maximum number of files copied at once (default: 16)")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    asyncio.run(shard_media(args.batch_size, args.pause, args.concurrency))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+"""
+This module provides the caches of serialized responses, kept in each worker process or shared
+through Redis.
+
+Caches store bytes under string keys, with a lifetime per entry. Their lookups are counted in
+the `cache_requests_total` metric, labelled with the name of the cache and whether the lookup
+was a hit, from which the hit ratio of each cache is derived.
+"""
+
+from abc import ABC, abstractmethod
+
+from app.core.config import settings
+from app.core.metrics import CACHE_REQUESTS
+from app.core.ttl_cache import TTLCache
+
+
+class Cache(ABC):
+    """
+    Base class of the caches.
+
+    Attributes:
+        name (str): The name of the cache, used as the cache label of its metrics.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+
+    async def get(self, key: str) -> bytes | None:
+        """
+        Retrieves a live entry.
+
+        Args:
+            key (str): The key of the entry.
+
+        Returns:
+            bytes | None: The cached value, or None on a miss.
+        """
+        value = await self._get(key)
+        CACHE_REQUESTS.labels(self.name, "miss" if value is None else "hit").inc()
+        return value
+
+    @abstractmethod
+    async def _get(self, key: str) -> bytes | None:
+        """
+        Retrieves a live entry from the backend.
+
+        Args:
+            key (str): The key of the entry.
+
+        Returns:
+            bytes | None: The cached value, or None on a miss.
+        """
+
+    @abstractmethod
+    async def set(self, key: str, value: bytes, ttl: float) -> None:
+        """
+        Stores an entry.
+
+        Args:
+            key (str): The key of the entry.
+            value (bytes): The value to cache.
+            ttl (float): The lifetime of the entry in seconds.
+        """
+
+    @abstractmethod
+    async def add(self, key: str, value: bytes, ttl: float) -> None:
+        """
+        Stores an entry unless a live one is already stored under the key, so that a value read
+        before an invalidation cannot replace the marker it left.
+
+        Args:
+            key (str): The key of the entry.
+            value (bytes): The value to cache.
+            ttl (float): The lifetime of the entry in seconds.
+        """
+
+    @abstractmethod
+    async def delete(self, key: str) -> None:
+        """
+        Removes an entry, if present.
+
+        Args:
+            key (str): The key of the entry.
+        """
+
+
+class MemoryCache(Cache):
+    """
+    Cache kept in the memory of the worker process, as a bounded LRU.
+
+    Its entries are only invalidated in the worker process that made the change; the other
+    workers serve their copy until it expires.
+
+    Attributes:
+        name (str): The name of the cache.
+        entries (TTLCache): The cached entries.
+    """
+
+    def __init__(self, name: str, max_size: int):
+        super().__init__(name)
+        self.entries = TTLCache(max_size)
+
+    async def _get(self, key: str) -> bytes | None:
+        return self.entries.get(key)
+
+    async def set(self, key: str, value: bytes, ttl: float) -> None:
+        self.entries.set(key, value, ttl=ttl)
+
+    async def add(self, key: str, value: bytes, ttl: float) -> None:
+        self.entries.add(key, value, ttl=ttl)
+
+    async def delete(self, key: str) -> None:
+        self.entries.delete(key)
+
+
+def build_cache(name: str, max_size: int) -> Cache:
+    """
+    Builds a cache with the backend selected by the `cache_backend` setting.
+
+    Args:
+        name (str): The name of the cache.
+        max_size (int): The maximum number of entries kept in memory; 0 disables the
+        in-process cache.
+
+    Returns:
+        Cache: The cache.
+    """
+    if settings.cache_backend == "redis":
+        # Imported here so that redis is only required when it is used
+        # pylint: disable=import-outside-toplevel
+        from app.core.redis import get_redis
+        from app.core.redis_cache import RedisCache
+        return RedisCache(name, get_redis())
+
+    return MemoryCache(name, max_size)
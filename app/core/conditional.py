@@ -0,0 +1,118 @@
+"""
+This module evaluates the conditional and range request headers of GET requests, as specified
+by RFC 9110, sections 13 and 14.
+"""
+
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+
+
+def format_http_date(value: datetime) -> str:
+    """
+    Formats a timestamp as an HTTP date, e.g. for a Last-Modified header.
+
+    Args:
+        value (datetime): The timezone-aware timestamp.
+
+    Returns:
+        str: The timestamp in the IMF-fixdate format.
+    """
+    return format_datetime(value.astimezone(timezone.utc), usegmt=True)
+
+
+def _etag_matches(etag: str, if_none_match: str) -> bool:
+    """
+    Compares an entity tag with an If-None-Match header, using the weak comparison.
+
+    Args:
+        etag (str): The current entity tag of the resource.
+        if_none_match (str): The value of the If-None-Match header.
+
+    Returns:
+        bool: True if the header lists the entity tag or is "*".
+    """
+    if if_none_match.strip() == "*":
+        return True
+    opaque_tag = etag.removeprefix("W/")
+    return any(candidate.strip().removeprefix("W/") == opaque_tag
+               for candidate in if_none_match.split(","))
+
+
+def is_not_modified(etag: str, last_modified: datetime | None,
+                    if_none_match: str | None, if_modified_since: str | None) -> bool:
+    """
+    Evaluates whether a GET request can be answered with 304 Not Modified.
+
+    If-Modified-Since is only evaluated when If-None-Match is absent.
+
+    Args:
+        etag (str): The current entity tag of the resource.
+        last_modified (datetime, optional): The last modification time of the resource.
+        if_none_match (str, optional): The value of the If-None-Match header.
+        if_modified_since (str, optional): The value of the If-Modified-Since header.
+
+    Returns:
+        bool: True if the client's copy of the resource is current.
+    """
+    if if_none_match is not None:
+        return _etag_matches(etag, if_none_match)
+
+    if if_modified_since is None or last_modified is None:
+        return False
+
+    try:
+        since = parsedate_to_datetime(if_modified_since)
+    except (TypeError, ValueError):
+        # An invalid date is ignored
+        return False
+    if since.tzinfo is None:
+        since = since.replace(tzinfo=timezone.utc)
+
+    # HTTP dates have a resolution of one second
+    return last_modified.replace(microsecond=0) <= since
+
+
+def _is_byte_position(value: str) -> bool:
+    """
+    Returns whether a value is a byte position, i.e. only ASCII digits; str.isdigit() also
+    accepts characters such as "²" that int() rejects.
+    """
+    return value.isascii() and value.isdecimal()
+
+
+def parse_byte_range(range_header: str, size: int) -> tuple[int, int] | None:
+    """
+    Parses a Range header requesting a single range of bytes.
+
+    Args:
+        range_header (str): The value of the Range header, e.g. "bytes=0-1023", "bytes=512-"
+        or "bytes=-256".
+        size (int): The size of the resource in bytes.
+
+    Returns:
+        tuple[int, int] | None: The first and last byte positions of the range, inclusive; None
+        if the header is invalid or requests several ranges, so the whole resource is sent.
+
+    Raises:
+        ValueError: If the range cannot be satisfied, i.e. starts past the end of the resource.
+    """
+    unit, _, byte_range = range_header.partition("=")
+    if unit.strip().lower() != "bytes" or "," in byte_range:
+        return None
+
+    first, _, last = byte_range.strip().partition("-")
+    if not (first or last) or not all(_is_byte_position(value) for value in (first, last) if value):
+        return None
+
+    if not first:
+        # A suffix range: the last bytes of the resource
+        if int(last) == 0 or size == 0:
+            raise ValueError("Empty suffix range")
+        return max(size - int(last), 0), size - 1
+
+    start = int(first)
+    if last and int(last) < start:
+        return None
+    if start >= size:
+        raise ValueError("Range starts past the end of the resource")
+    return start, min(int(last), size - 1) if last else size - 1
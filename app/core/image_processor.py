@@ -0,0 +1,58 @@
+"""
+This module provides an asynchronous image processor that generates the variants of the profile
+pictures in a process pool.
+
+Decoding and resizing images is CPU-bound; running it in worker processes keeps it off the event
+loop and the request threadpool, and from competing for the GIL with the rest of the API.
+"""
+
+import time
+from pathlib import Path
+
+from app.core import image_utils
+from app.core.config import settings
+from app.core.metrics import IMAGE_PROCESSING_DURATION
+from app.core.process_pool import BoundedProcessPool
+from app.core.timing import timed
+
+
+class ImageProcessor:
+    """
+    Awaitable variants of the image utilities.
+
+    Attributes:
+        pool (BoundedProcessPool): The process pool decoding and encoding the images.
+    """
+
+    def __init__(self, pool: BoundedProcessPool):
+        self.pool = pool
+
+    async def make_variants(self, source_path: Path) -> list[tuple[int, str, Path]]:
+        """
+        Writes the variants of an image next to it, in a worker process.
+
+        Args:
+            source_path (Path): The path of the image.
+
+        Returns:
+            list[tuple[int, str, Path]]: The size, media type and path of each variant.
+
+        Raises:
+            ValueError: If the file is not a valid image.
+        """
+        start_time = time.perf_counter_ns()
+        with timed("image"):
+            variants = await self.pool.run(image_utils.make_variants, str(source_path))
+        IMAGE_PROCESSING_DURATION.observe((time.perf_counter_ns() - start_time) / 1e9)
+        return [(size, media_type, Path(path)) for size, media_type, path in variants]
+
+    def shutdown(self) -> None:
+        """
+        Shuts down the underlying process pool.
+        """
+        self.pool.shutdown()
+
+
+image_processor = ImageProcessor(BoundedProcessPool(
+    max_workers=settings.image_workers,
+    max_pending=settings.image_max_pending))
@@ -0,0 +1,103 @@
+"""
+This module provides the image utilities for the profile pictures.
+
+make_variants decodes images, which is CPU-bound; it is meant to run in the worker processes of
+the image processor, so it is a picklable, module-level function taking and returning plain
+values.
+"""
+
+from enum import IntEnum
+from pathlib import Path
+
+from PIL import Image, ImageOps
+
+
+class VariantSize(IntEnum):
+    """
+    The width and height, in pixels, of the square variants of each profile picture.
+    """
+    LARGE = 256
+    MEDIUM = 128
+    SMALL = 48
+
+
+VARIANT_SIZES = tuple(int(size) for size in VariantSize)
+
+# The Pillow format and file extension of each media type the variants are encoded in
+VARIANT_FORMATS = {"image/webp": ("WEBP", ".webp"), "image/jpeg": ("JPEG", ".jpg")}
+
+# The signature that the files of each accepted image type start with
+MAGIC_NUMBERS = ((b"\xff\xd8\xff", "image/jpeg"),
+                 (b"\x89PNG\r\n\x1a\n", "image/png"),
+                 (b"GIF87a", "image/gif"),
+                 (b"GIF89a", "image/gif"))
+
+# Images are rejected above this many pixels, before they are decoded
+MAX_PIXELS = 25_000_000
+
+
+def detect_image_type(header: bytes) -> str | None:
+    """
+    Identifies the type of an image from its first bytes, rather than from its file name or
+    the content type announced by the client.
+
+    Args:
+        header (bytes): The first bytes of the file; 8 are enough.
+
+    Returns:
+        str | None: The media type of the image, or None if it is not an accepted image type.
+    """
+    for magic_number, media_type in MAGIC_NUMBERS:
+        if header.startswith(magic_number):
+            return media_type
+    return None
+
+
+def make_variants(source_path: str) -> list[tuple[int, str, str]]:
+    """
+    Decodes an image once and writes its square variants, in every size and format, next to
+    it.
+
+    Args:
+        source_path (str): The path of the image.
+
+    Returns:
+        list[tuple[int, str, str]]: The size, media type and path of each variant.
+
+    Raises:
+        ValueError: If the file cannot be decoded as an image, or is too large; no variant is
+        left behind.
+    """
+    source = Path(source_path)
+    written = []
+    try:
+        with Image.open(source) as image:
+            if image.width * image.height > MAX_PIXELS:
+                raise ValueError(f"Image of {image.width}x{image.height} pixels is too large")
+
+            largest = max(VARIANT_SIZES)
+            # Let JPEG decode straight to a reduced scale that is still larger than needed
+            image.draft("RGB", (largest * 2, largest * 2))
+            image = ImageOps.exif_transpose(image)
+            has_alpha = image.mode in ("RGBA", "LA", "PA") or "transparency" in image.info
+            image = image.convert("RGBA" if has_alpha else "RGB")
+
+            for size in sorted(VARIANT_SIZES, reverse=True):
+                # Each size is scaled down from the previous one, not from the original
+                image = ImageOps.fit(image, (size, size), method=Image.Resampling.LANCZOS)
+                for media_type, (image_format, extension) in VARIANT_FORMATS.items():
+                    path = source.with_name(f"{source.stem}_{size}{extension}")
+                    variant = image
+                    if has_alpha and image_format == "JPEG":
+                        variant = Image.new("RGB", image.size, "white")
+                        variant.paste(image, mask=image.getchannel("A"))
+                    variant.save(path, image_format, quality=80)
+                    written.append((size, media_type, str(path)))
+    except Exception as e:
+        for _, _, path in written:
+            Path(path).unlink(missing_ok=True)
+        if isinstance(e, ValueError):
+            raise
+        raise ValueError(f"Invalid image: {e}") from e
+
+    return written
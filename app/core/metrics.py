@@ -0,0 +1,69 @@
+"""
+This module defines the application metrics, recorded with prometheus_client.
+
+When the PROMETHEUS_MULTIPROC_DIR environment variable is set before the application starts,
+prometheus_client keeps the values of each worker process in files of that directory, and
+/metrics reports the totals of all workers. The directory must be emptied before the server
+starts, and the gauges of a worker are dropped once it is marked dead as it shuts down.
+"""
+
+import os
+
+from prometheus_client import (REGISTRY, CollectorRegistry, Counter, Gauge, Histogram,
+                               generate_latest, multiprocess)
+
+
+def _multiprocess_dir() -> str | None:
+    return os.environ.get("PROMETHEUS_MULTIPROC_DIR")
+
+
+def render_metrics() -> bytes:
+    """
+    Renders the metrics in the Prometheus text exposition format.
+
+    Returns:
+        bytes: The metrics of this process, or the totals of every worker process in
+        multiprocess mode.
+    """
+    if _multiprocess_dir() is None:
+        return generate_latest(REGISTRY)
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    return generate_latest(registry)
+
+
+def mark_process_dead() -> None:
+    """
+    Drops the live gauges of this process in multiprocess mode, as it is about to exit; its
+    counters and histograms are still reported.
+    """
+    if _multiprocess_dir() is not None:
+        multiprocess.mark_process_dead(os.getpid())
+
+
+HTTP_REQUESTS = Counter(
+    "http_requests_total", "Number of HTTP requests.", ("method", "route", "status"))
+HTTP_REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds", "Latency of HTTP requests.", ("method", "route"))
+HTTP_REQUESTS_IN_FLIGHT = Gauge(
+    "http_requests_in_flight", "Number of HTTP requests being processed.",
+    multiprocess_mode="livesum")
+RATE_LIMIT_REJECTIONS = Counter(
+    "rate_limit_rejections_total", "Number of requests rejected by the rate limiter.")
+PASSWORD_HASH_DURATION = Histogram(
+    "password_hash_duration_seconds", "Latency of bcrypt operations.", ("operation",),
+    buckets=(0.05, 0.1, 0.15, 0.2, 0.25, 0.3, 0.4, 0.5, 0.75, 1.0, 2.5))
+IMAGE_PROCESSING_DURATION = Histogram(
+    "image_processing_duration_seconds", "Latency of profile picture variant generation.",
+    buckets=(0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 0.75, 1.0, 2.5, 5.0))
+CACHE_REQUESTS = Counter(
+    "cache_requests_total", "Number of cache lookups.", ("cache", "result"))
+DB_POOL_CHECKED_OUT = Gauge(
+    "db_pool_checked_out", "Number of database connections checked out of the pool.",
+    ("engine",), multiprocess_mode="livesum")
+DB_POOL_OVERFLOW = Gauge(
+    "db_pool_overflow", "Number of overflow database connections open.", ("engine",),
+    multiprocess_mode="livesum")
+DB_POOL_WAIT = Histogram(
+    "db_pool_wait_seconds", "Time spent waiting for a database connection.", ("engine",),
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0, 30.0))
@@ -0,0 +1,66 @@
+"""
+This module provides a bounded process pool for running CPU-bound work off the event loop.
+"""
+
+import asyncio
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable
+
+
+class BoundedProcessPool:
+    """
+    A lazily started process pool that limits the number of jobs in flight.
+
+    Jobs beyond the limit wait on a semaphore in the event loop instead of piling up in the
+    executor's unbounded queue, so a burst of CPU-bound work cannot grow memory without bound.
+
+    Attributes:
+        max_workers (int): The number of worker processes.
+        max_pending (int): The maximum number of jobs submitted to the pool at once.
+    """
+
+    def __init__(self, max_workers: int, max_pending: int):
+        self.max_workers = max_workers
+        self.max_pending = max(max_pending, max_workers)
+        self._executor: ProcessPoolExecutor | None = None
+        self._semaphore = asyncio.Semaphore(self.max_pending)
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        """
+        Returns the underlying executor, starting it on first use.
+
+        Workers are spawned rather than forked so they do not inherit the server's threads
+        and open sockets.
+
+        Returns:
+            ProcessPoolExecutor: The executor running the jobs.
+        """
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context("spawn"))
+        return self._executor
+
+    async def run(self, func: Callable[..., Any], *args: Any) -> Any:
+        """
+        Runs a function in a worker process and waits for its result.
+
+        Args:
+            func (Callable): A picklable, module-level function.
+            *args: The positional arguments for the function.
+
+        Returns:
+            Any: The value returned by the function.
+        """
+        async with self._semaphore:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._get_executor(), func, *args)
+
+    def shutdown(self) -> None:
+        """
+        Shuts down the worker processes, if they were started.
+        """
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
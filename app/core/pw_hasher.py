@@ -0,0 +1,72 @@
+"""
+This module provides an asynchronous password hasher that runs bcrypt in a process pool.
+
+bcrypt is deliberately slow; running it in worker processes keeps it from holding the
+request threadpool and from competing for the GIL with the rest of the API.
+"""
+
+import time
+
+from app.core import pw_utils
+from app.core.config import settings
+from app.core.metrics import PASSWORD_HASH_DURATION
+from app.core.process_pool import BoundedProcessPool
+from app.core.timing import timed
+
+
+class PasswordHasher:
+    """
+    Awaitable variants of the password hashing utilities.
+
+    Attributes:
+        pool (BoundedProcessPool): The process pool running the bcrypt operations.
+    """
+
+    def __init__(self, pool: BoundedProcessPool):
+        self.pool = pool
+        self._hash_duration = PASSWORD_HASH_DURATION.labels("hash")
+        self._verify_duration = PASSWORD_HASH_DURATION.labels("verify")
+
+    async def hash_password(self, password: str) -> str:
+        """
+        Hashes a password using bcrypt in a worker process.
+
+        Args:
+            password (str): The plain text password to be hashed.
+
+        Returns:
+            str: The hashed password.
+        """
+        start_time = time.perf_counter_ns()
+        with timed("hash"):
+            hashed_password = await self.pool.run(pw_utils.hash_password, password)
+        self._hash_duration.observe((time.perf_counter_ns() - start_time) / 1e9)
+        return hashed_password
+
+    async def verify_password(self, password: str, hashed_password: str) -> bool:
+        """
+        Verifies a plain text password against a hashed password in a worker process.
+
+        Args:
+            password (str): The plain text password to verify.
+            hashed_password (str): The hashed password to verify against.
+
+        Returns:
+            bool: True if the password matches the hashed password, False otherwise.
+        """
+        start_time = time.perf_counter_ns()
+        with timed("hash"):
+            is_valid = await self.pool.run(pw_utils.verify_password, password, hashed_password)
+        self._verify_duration.observe((time.perf_counter_ns() - start_time) / 1e9)
+        return is_valid
+
+    def shutdown(self) -> None:
+        """
+        Shuts down the underlying process pool.
+        """
+        self.pool.shutdown()
+
+
+password_hasher = PasswordHasher(BoundedProcessPool(
+    max_workers=settings.password_hash_workers,
+    max_pending=settings.password_hash_max_pending))
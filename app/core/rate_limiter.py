@@ -0,0 +1,159 @@
+"""
+This module provides the rate limiter interface and a memory-bounded, in-process token-bucket
+implementation.
+
+Each key owns a bucket holding up to `burst` tokens that refills at `rate` tokens per second;
+a request is allowed when it can take a token. A bucket that has been idle long enough to refill
+completely carries no information, so it can be dropped without changing any decision.
+"""
+
+import math
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Callable, Dict, Hashable, NamedTuple
+
+
+class RateLimitResult(NamedTuple):
+    """
+    The outcome of a rate limit check.
+
+    Attributes:
+        allowed (bool): Whether the request may proceed.
+        limit (int): The maximum number of requests allowed in a burst.
+        remaining (int): The number of requests still allowed right now.
+        reset (float): Seconds until the bucket is full again.
+        retry_after (float): Seconds until the next request is allowed; 0 if allowed.
+    """
+    allowed: bool
+    limit: int
+    remaining: int
+    reset: float
+    retry_after: float
+
+
+class RateLimiter(ABC):
+    """
+    Interface of the rate limiter backends.
+    """
+
+    @abstractmethod
+    async def hit(self, key: str) -> RateLimitResult:
+        """
+        Takes a token from the bucket of a key, if one is available.
+
+        Args:
+            key (str): The key identifying the client.
+
+        Returns:
+            RateLimitResult: The outcome of the check.
+        """
+
+
+class TokenBucketLimiter(RateLimiter):
+    """
+    In-process token-bucket rate limiter with a fixed-capacity state table.
+
+    Buckets are kept in least-recently-used order. Full buckets are swept every
+    `sweep_interval` seconds, and when the table is at capacity the least recently used bucket
+    is evicted, so memory stays flat regardless of how many distinct keys are seen.
+
+    The limiter is not thread-safe; it is meant to be used from the event loop.
+
+    Attributes:
+        rate (float): The number of tokens added to a bucket per second.
+        burst (int): The capacity of a bucket.
+        max_keys (int): The maximum number of buckets kept in memory.
+        sweep_interval (float): The number of seconds between sweeps of idle buckets.
+    """
+
+    def __init__(self, rate: float, burst: int, max_keys: int, sweep_interval: float,
+                 clock: Callable[[], float] = time.monotonic):
+        self.rate = rate
+        self.burst = burst
+        self.max_keys = max_keys
+        self.sweep_interval = sweep_interval
+        self._clock = clock
+        self._fill_time = burst / rate
+        self._buckets: OrderedDict[Hashable, tuple[float, float]] = OrderedDict()
+        self._next_sweep = clock() + sweep_interval
+
+    async def hit(self, key: str) -> RateLimitResult:
+        return self.take(key)
+
+    def take(self, key: Hashable) -> RateLimitResult:
+        """
+        Takes a token from the bucket of a key, if one is available.
+
+        Args:
+            key (Hashable): The key identifying the client.
+
+        Returns:
+            RateLimitResult: The outcome of the check.
+        """
+        now = self._clock()
+        if now >= self._next_sweep:
+            self.sweep(now)
+
+        bucket = self._buckets.pop(key, None)
+        if bucket is None:
+            tokens = float(self.burst)
+            if len(self._buckets) >= self.max_keys:
+                self._buckets.popitem(last=False)
+        else:
+            tokens, updated_at = bucket
+            tokens = min(self.burst, tokens + (now - updated_at) * self.rate)
+
+        allowed = tokens >= 1
+        if allowed:
+            tokens -= 1
+
+        self._buckets[key] = (tokens, now)
+
+        return RateLimitResult(
+            allowed=allowed,
+            limit=self.burst,
+            remaining=int(tokens),
+            reset=(self.burst - tokens) / self.rate,
+            retry_after=0.0 if allowed else (1 - tokens) / self.rate
+        )
+
+    def sweep(self, now: float | None = None) -> None:
+        """
+        Drops the buckets that have been idle long enough to be full again.
+
+        Buckets are ordered by last use, so the sweep stops at the first one still refilling.
+
+        Args:
+            now (float, optional): The current time of the limiter's clock.
+        """
+        now = self._clock() if now is None else now
+        while self._buckets:
+            key, (_, updated_at) = next(iter(self._buckets.items()))
+            if now - updated_at < self._fill_time:
+                break
+            del self._buckets[key]
+        self._next_sweep = now + self.sweep_interval
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+
+def rate_limit_headers(result: RateLimitResult) -> Dict[str, str]:
+    """
+    Builds the standard rate limit headers for a check.
+
+    Args:
+        result (RateLimitResult): The outcome of the check.
+
+    Returns:
+        Dict[str, str]: The RateLimit-* headers, plus Retry-After if the request was rejected.
+    """
+    headers = {
+        "RateLimit-Limit": str(result.limit),
+        "RateLimit-Remaining": str(result.remaining),
+        "RateLimit-Reset": str(math.ceil(result.reset)),
+    }
+    if not result.allowed:
+        headers["Retry-After"] = str(math.ceil(result.retry_after))
+    return headers
@@ -0,0 +1,38 @@
+"""
+This module provides the shared Redis client used by the components that keep state across
+worker processes and nodes.
+"""
+
+from redis.asyncio import Redis
+
+from app.core.config import settings
+
+_client: Redis | None = None
+
+
+def get_redis() -> Redis:
+    """
+    Returns the shared Redis client, creating it on first use.
+
+    Connecting and each command time out after `redis_timeout` seconds, so an unreachable
+    server fails fast instead of holding requests until the TCP timeout.
+
+    Returns:
+        Redis: The asyncio Redis client connected to `redis_url`.
+    """
+    global _client  # pylint: disable=global-statement
+    if _client is None:
+        _client = Redis.from_url(settings.redis_url,
+                                 socket_connect_timeout=settings.redis_timeout,
+                                 socket_timeout=settings.redis_timeout)
+    return _client
+
+
+async def close_redis() -> None:
+    """
+    Closes the shared Redis client, if it was created.
+    """
+    global _client  # pylint: disable=global-statement
+    if _client is not None:
+        await _client.aclose()
+        _client = None
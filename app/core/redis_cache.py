@@ -0,0 +1,56 @@
+"""
+This module provides a cache shared by every worker process and node through Redis.
+"""
+
+import logging
+
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+
+from app.core.cache import Cache
+
+logger = logging.getLogger(__name__)
+
+
+class RedisCache(Cache):
+    """
+    Cache kept in Redis, where entries expire on their own.
+
+    If Redis is unavailable, lookups miss and writes are skipped, so requests fall through to
+    the database; a lost invalidation is bounded by the lifetime of the entry.
+
+    Attributes:
+        name (str): The name of the cache.
+        redis (Redis): The Redis client.
+        prefix (str): The prefix of the keys of the cache in Redis.
+    """
+
+    def __init__(self, name: str, redis: Redis, prefix: str = "cache:"):
+        super().__init__(name)
+        self.redis = redis
+        self.prefix = f"{prefix}{name}:"
+
+    async def _get(self, key: str) -> bytes | None:
+        try:
+            return await self.redis.get(self.prefix + key)
+        except RedisError as e:
+            logger.warning("Redis cache %s unavailable: %s", self.name, e)
+            return None
+
+    async def set(self, key: str, value: bytes, ttl: float) -> None:
+        try:
+            await self.redis.set(self.prefix + key, value, px=max(1, int(ttl * 1000)))
+        except RedisError as e:
+            logger.warning("Redis cache %s unavailable: %s", self.name, e)
+
+    async def add(self, key: str, value: bytes, ttl: float) -> None:
+        try:
+            await self.redis.set(self.prefix + key, value, px=max(1, int(ttl * 1000)), nx=True)
+        except RedisError as e:
+            logger.warning("Redis cache %s unavailable: %s", self.name, e)
+
+    async def delete(self, key: str) -> None:
+        try:
+            await self.redis.delete(self.prefix + key)
+        except RedisError as e:
+            logger.warning("Redis cache %s unavailable: %s", self.name, e)
@@ -0,0 +1,166 @@
+"""
+This module provides a token-bucket rate limiter whose buckets live in Redis, so the limit is
+shared by every worker process and node.
+
+The bucket math runs in a Lua script, which Redis executes atomically against its own clock.
+To avoid a network round trip per request, a worker may lease several tokens at once and hand
+them out locally, and it remembers rejections until the bucket has refilled.
+"""
+
+import logging
+import time
+from collections import OrderedDict
+from typing import Callable
+
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+
+from app.core.rate_limiter import RateLimiter, RateLimitResult, TokenBucketLimiter
+
+logger = logging.getLogger(__name__)
+
+# KEYS[1]: bucket key; ARGV: rate, burst, requested tokens.
+# Returns the number of granted tokens, the tokens left and the seconds until the next token.
+TOKEN_BUCKET_SCRIPT = """
+local rate = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local requested = tonumber(ARGV[3])
+
+local time = redis.call('TIME')
+local now = tonumber(time[1]) + tonumber(time[2]) / 1000000
+
+local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'updated_at')
+local tokens = tonumber(bucket[1])
+local updated_at = tonumber(bucket[2])
+
+if tokens == nil then
+    tokens = burst
+else
+    tokens = math.min(burst, tokens + math.max(0, now - updated_at) * rate)
+end
+
+local granted = math.min(requested, math.floor(tokens))
+tokens = tokens - granted
+
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'updated_at', tostring(now))
+redis.call('PEXPIRE', KEYS[1], math.ceil(burst / rate * 1000))
+
+local retry_after = 0
+if granted == 0 then
+    retry_after = (1 - tokens) / rate
+end
+
+return {granted, tostring(tokens), tostring(retry_after)}
+"""
+
+
+class RedisTokenBucketLimiter(RateLimiter):
+    """
+    Token-bucket rate limiter backed by Redis.
+
+    Each worker keeps a bounded table of leases: tokens taken from the shared bucket and not
+    yet used, and rejections that stay valid until the bucket has a token again. Unused leased
+    tokens are dropped after `lease_ttl` seconds, so leasing can only make the limit stricter.
+    If Redis is unavailable, the limiter falls back to a per-worker in-process bucket, and keeps
+    using it for `cooldown` seconds before trying Redis again, so requests do not each wait for
+    a failing server.
+
+    Attributes:
+        redis (Redis): The Redis client.
+        rate (float): The number of tokens added to a bucket per second.
+        burst (int): The capacity of a bucket.
+        lease_size (int): The number of tokens taken from Redis per round trip.
+        lease_ttl (float): The number of seconds a worker may hold on to leased tokens.
+        max_keys (int): The maximum number of leases kept in memory.
+        cooldown (float): The number of seconds Redis is skipped after a failure.
+        prefix (str): The prefix of the bucket keys in Redis.
+    """
+
+    def __init__(self, redis: Redis, rate: float, burst: int, lease_size: int,
+                 max_keys: int, sweep_interval: float, cooldown: float = 5.0,
+                 prefix: str = "rate-limit:", clock: Callable[[], float] = time.monotonic):
+        self.redis = redis
+        self.rate = rate
+        self.burst = burst
+        self.lease_size = min(lease_size, burst)
+        self.lease_ttl = min(1.0, burst / rate)
+        self.max_keys = max_keys
+        self.cooldown = cooldown
+        self.prefix = prefix
+        self._clock = clock
+        # When Redis may be tried again after a failure
+        self._retry_at = float("-inf")
+        self._script = redis.register_script(TOKEN_BUCKET_SCRIPT)
+        # key -> (leased tokens, lease expiry, tokens left in the shared bucket)
+        self._leases: OrderedDict[str, tuple[int, float, float]] = OrderedDict()
+        self._fallback = TokenBucketLimiter(rate, burst, max_keys, sweep_interval, clock)
+
+    async def hit(self, key: str) -> RateLimitResult:
+        now = self._clock()
+
+        lease = self._leases.pop(key, None)
+        if lease is not None:
+            tokens, expires_at, shared_tokens = lease
+            if expires_at > now:
+                if tokens > 0:
+                    self._store_lease(key, (tokens - 1, expires_at, shared_tokens))
+                    return self._result(True, tokens - 1 + shared_tokens, 0.0)
+                if shared_tokens < 1:
+                    self._store_lease(key, lease)
+                    return self._result(False, shared_tokens, expires_at - now)
+
+        if now < self._retry_at:
+            return self._fallback.take(key)
+
+        try:
+            granted, shared_tokens, retry_after = await self._script(
+                keys=[self.prefix + key], args=[self.rate, self.burst, self.lease_size])
+        except RedisError as e:
+            logger.warning("Redis rate limiter unavailable, using the local limiter for %ss: %s",
+                           self.cooldown, e)
+            self._retry_at = self._clock() + self.cooldown
+            return self._fallback.take(key)
+
+        granted = int(granted)
+        shared_tokens = float(shared_tokens)
+
+        if granted == 0:
+            retry_after = float(retry_after)
+            self._store_lease(key, (0, now + retry_after, shared_tokens))
+            return self._result(False, shared_tokens, retry_after)
+
+        self._store_lease(key, (granted - 1, now + self.lease_ttl, shared_tokens))
+        return self._result(True, granted - 1 + shared_tokens, 0.0)
+
+    def _store_lease(self, key: str, lease: tuple[int, float, float]) -> None:
+        """
+        Stores the lease of a key, evicting the least recently used lease at capacity.
+
+        Args:
+            key (str): The key identifying the client.
+            lease (tuple[int, float, float]): The leased tokens, the lease expiry and the tokens
+            left in the shared bucket.
+        """
+        if len(self._leases) >= self.max_keys:
+            self._leases.popitem(last=False)
+        self._leases[key] = lease
+
+    def _result(self, allowed: bool, tokens: float, retry_after: float) -> RateLimitResult:
+        """
+        Builds the outcome of a check from the number of tokens left.
+
+        Args:
+            allowed (bool): Whether the request may proceed.
+            tokens (float): The number of tokens left for the key.
+            retry_after (float): Seconds until the next request is allowed.
+
+        Returns:
+            RateLimitResult: The outcome of the check.
+        """
+        return RateLimitResult(
+            allowed=allowed,
+            limit=self.burst,
+            remaining=int(tokens),
+            reset=(self.burst - tokens) / self.rate,
+            retry_after=retry_after
+        )
@@ -0,0 +1,137 @@
+"""
+This module defines the response classes used by the application.
+
+JSON is rendered by orjson, which serializes datetimes, UUIDs and nested containers natively.
+Responses of a single schema skip FastAPI's response_model handling, which validates the
+returned object again and converts it to Python objects before rendering: the schema is
+serialized straight to JSON bytes by the pydantic-core serializer compiled with its class.
+"""
+
+import os
+from pathlib import Path
+from typing import Any
+
+import anyio
+from fastapi.responses import FileResponse, ORJSONResponse, Response
+from pydantic import BaseModel
+from starlette.concurrency import run_in_threadpool
+from starlette.types import Receive, Scope, Send
+
+from app.core.conditional import parse_byte_range
+from app.core.timing import timed
+
+
+def dump_json(model: BaseModel) -> bytes:
+    """
+    Serializes a schema instance to JSON, as its model_dump_json method does.
+
+    Args:
+        model (BaseModel): The schema instance.
+
+    Returns:
+        bytes: The JSON document, without the decoding to str of model_dump_json.
+    """
+    return model.__pydantic_serializer__.to_json(model)
+
+
+class TimedJSONResponse(ORJSONResponse):
+    """
+    JSON response rendered by orjson, that records its rendering as the "serialize" phase of
+    the request.
+    """
+
+    def render(self, content: Any) -> bytes:
+        with timed("serialize"):
+            return super().render(content)
+
+
+class ModelResponse(Response):
+    """
+    JSON response of a schema instance, rendered by the schema's pydantic-core serializer.
+
+    Routes returning it keep their response_model for the OpenAPI schema, but must pass their
+    status code, as FastAPI sends returned responses unchanged.
+    """
+
+    media_type = "application/json"
+
+    def render(self, content: BaseModel) -> bytes:
+        with timed("serialize"):
+            return dump_json(content)
+
+
+class PartialFileResponse(FileResponse):
+    """
+    206 Partial Content response of a range of bytes of a file.
+
+    Attributes:
+        start (int): The position of the first byte sent.
+        end (int): The position of the last byte sent, inclusive.
+    """
+
+    def __init__(self, path: str | os.PathLike[str], byte_range: tuple[int, int],
+                 stat_result: os.stat_result, **kwargs: Any):
+        super().__init__(path, status_code=206, stat_result=stat_result, **kwargs)
+        self.start, self.end = byte_range
+        self.headers["content-range"] = f"bytes {self.start}-{self.end}/{stat_result.st_size}"
+        self.headers["content-length"] = str(self.end - self.start + 1)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        await send({"type": "http.response.start", "status": self.status_code,
+                    "headers": self.raw_headers})
+
+        if scope["method"].upper() == "HEAD":
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+        else:
+            async with await anyio.open_file(self.path, mode="rb") as file:
+                await file.seek(self.start)
+                remaining = self.end - self.start + 1
+                while remaining > 0:
+                    chunk = await file.read(min(self.chunk_size, remaining))
+                    if not chunk:
+                        break
+                    remaining -= len(chunk)
+                    await send({"type": "http.response.body", "body": chunk,
+                                "more_body": remaining > 0})
+                if remaining > 0:
+                    # The file was truncated while being sent
+                    await send({"type": "http.response.body", "body": b"", "more_body": False})
+
+        if self.background is not None:
+            await self.background()
+
+
+async def file_response(path: Path, media_type: str, headers: dict[str, str],
+                        range_header: str | None, if_range: str | None) -> Response:
+    """
+    Builds the response sending a file, or the range of it requested by a Range header.
+
+    Args:
+        path (Path): The path of the file.
+        media_type (str): The media type of the file.
+        headers (dict[str, str]): The headers of the response, including the ETag of the file.
+        range_header (str, optional): The value of the Range header.
+        if_range (str, optional): The value of the If-Range header; the range is only sent if
+        it is the ETag of the file.
+
+    Returns:
+        Response: 200 with the whole file, 206 with the requested range, or 416 if the range
+        cannot be satisfied.
+
+    Raises:
+        FileNotFoundError: If the file does not exist.
+    """
+    stat_result = await run_in_threadpool(os.stat, path)
+    headers = {**headers, "Accept-Ranges": "bytes"}
+
+    if range_header is not None and (if_range is None or if_range == headers.get("ETag")):
+        try:
+            byte_range = parse_byte_range(range_header, stat_result.st_size)
+        except ValueError:
+            return Response(status_code=416,
+                            headers={"Content-Range": f"bytes */{stat_result.st_size}"})
+        if byte_range is not None:
+            return PartialFileResponse(path, byte_range, stat_result, headers=headers,
+                                       media_type=media_type)
+
+    return FileResponse(path, headers=headers, media_type=media_type, stat_result=stat_result)
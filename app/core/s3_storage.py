@@ -0,0 +1,91 @@
+"""
+This module provides the storage of the uploaded media in an S3-compatible object store, such as
+Amazon S3 or MinIO, shared by every API node.
+
+boto3 is synchronous, so its requests are run in the threadpool; signing URLs makes no request.
+"""
+
+from datetime import datetime, timedelta, timezone
+from itertools import islice
+from pathlib import Path
+from typing import BinaryIO, Iterable
+
+from botocore.exceptions import ClientError
+from starlette.concurrency import run_in_threadpool
+
+from app.core.storage import PresignedUpload, Storage
+
+# The maximum number of keys a DeleteObjects request takes
+DELETE_BATCH_SIZE = 1000
+
+
+class S3Storage(Storage):
+    """
+    Storage of the objects in a bucket of an S3-compatible object store.
+
+    Objects are downloaded by the clients straight from the store, through presigned URLs, and
+    can be uploaded the same way.
+
+    Attributes:
+        client (S3Client): The boto3 S3 client; credentials are found by boto3, e.g. in the
+        AWS_ACCESS_KEY_ID and AWS_SECRET_ACCESS_KEY environment variables.
+        bucket (str): The name of the bucket.
+        url_expires (int): The number of seconds the presigned URLs are valid for.
+    """
+
+    def __init__(self, client, bucket: str, url_expires: int):
+        self.client = client
+        self.bucket = bucket
+        self.url_expires = url_expires
+
+    async def save(self, key: str, source: Path, media_type: str) -> None:
+        # Stored objects are never overwritten with another content
+        await run_in_threadpool(
+            self.client.upload_file, str(source), self.bucket, key,
+            ExtraArgs={"ContentType": media_type,
+                       "CacheControl": "public, max-age=31536000, immutable"})
+        source.unlink(missing_ok=True)
+
+    async def copy(self, source_key: str, destination_key: str) -> None:
+        try:
+            # The copy is made by the store, with the metadata of the object
+            await run_in_threadpool(
+                self.client.copy_object, Bucket=self.bucket, Key=destination_key,
+                CopySource={"Bucket": self.bucket, "Key": source_key})
+        except ClientError as e:
+            if e.response["Error"]["Code"] in ("NoSuchKey", "404"):
+                raise FileNotFoundError(f"No object stored under {source_key}") from e
+            raise
+
+    async def open(self, key: str) -> BinaryIO:
+        try:
+            response = await run_in_threadpool(self.client.get_object, Bucket=self.bucket,
+                                               Key=key)
+        except ClientError as e:
+            if e.response["Error"]["Code"] in ("NoSuchKey", "404"):
+                raise FileNotFoundError(f"No object stored under {key}") from e
+            raise
+        return response["Body"]
+
+    async def delete(self, keys: Iterable[str]) -> None:
+        keys = iter(keys)
+        while batch := list(islice(keys, DELETE_BATCH_SIZE)):
+            await run_in_threadpool(
+                self.client.delete_objects, Bucket=self.bucket,
+                Delete={"Objects": [{"Key": key} for key in batch], "Quiet": True})
+
+    async def url(self, key: str) -> str | None:
+        return self.client.generate_presigned_url(
+            "get_object", Params={"Bucket": self.bucket, "Key": key},
+            ExpiresIn=self.url_expires)
+
+    async def presign_upload(self, key: str, media_type: str, size: int) -> PresignedUpload:
+        expires_at = datetime.now(timezone.utc) + timedelta(seconds=self.url_expires)
+        # The signature covers the content type and length, so the store rejects other uploads;
+        # the size is checked again when the upload is confirmed
+        url = self.client.generate_presigned_url(
+            "put_object",
+            Params={"Bucket": self.bucket, "Key": key, "ContentType": media_type,
+                    "ContentLength": size},
+            ExpiresIn=self.url_expires)
+        return PresignedUpload(url=url, headers={"Content-Type": media_type}, expires_at=expires_at)
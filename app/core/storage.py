@@ -0,0 +1,227 @@
+"""
+This module provides the storage of the uploaded media, on the local file system or in an
+S3-compatible object store.
+
+Stored objects are addressed by keys, relative paths with "/" separators, which are what the
+database records. The local driver resolves them against a root directory; the S3 driver uses
+them as object keys, so each API node reads and writes the same objects.
+"""
+
+import errno
+import os
+import shutil
+import tempfile
+from abc import ABC, abstractmethod
+from datetime import datetime
+from pathlib import Path
+from typing import BinaryIO, Iterable, NamedTuple
+
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import settings
+
+
+class PresignedUpload(NamedTuple):
+    """
+    A request the client sends to the storage to upload an object directly.
+
+    Attributes:
+        url (str): The URL to PUT the object to.
+        headers (dict[str, str]): The headers the request must carry, as they are signed.
+        expires_at (datetime): When the URL stops being accepted.
+    """
+    url: str
+    headers: dict[str, str]
+    expires_at: datetime
+
+
+class Storage(ABC):
+    """
+    Interface of the storage drivers.
+    """
+
+    @abstractmethod
+    async def save(self, key: str, source: Path, media_type: str) -> None:
+        """
+        Moves a local file into the storage, replacing the object stored under the key, if any.
+
+        Args:
+            key (str): The key of the object.
+            source (Path): The path of the file; it is consumed.
+            media_type (str): The media type the object is served with.
+        """
+
+    @abstractmethod
+    async def copy(self, source_key: str, destination_key: str) -> None:
+        """
+        Copies a stored object under another key, replacing the object stored under it, if any.
+
+        Args:
+            source_key (str): The key of the object.
+            destination_key (str): The key of the copy.
+
+        Raises:
+            FileNotFoundError: If no object is stored under the source key.
+        """
+
+    @abstractmethod
+    async def open(self, key: str) -> BinaryIO:
+        """
+        Opens a stored object for reading. The reads are blocking; run them in the threadpool.
+
+        Args:
+            key (str): The key of the object.
+
+        Returns:
+            BinaryIO: The content of the object; close it once read.
+
+        Raises:
+            FileNotFoundError: If no object is stored under the key.
+        """
+
+    @abstractmethod
+    async def delete(self, keys: Iterable[str]) -> None:
+        """
+        Deletes stored objects, ignoring those already gone.
+
+        Args:
+            keys (Iterable[str]): The keys of the objects.
+        """
+
+    async def url(self, key: str) -> str | None:  # pylint: disable=unused-argument
+        """
+        Gives the URL a stored object is downloaded from, without going through the application.
+
+        Args:
+            key (str): The key of the object.
+
+        Returns:
+            str | None: The URL, or None if the application sends the object itself, from the
+            file at path(key).
+        """
+        return None
+
+    def path(self, key: str) -> Path:
+        """
+        Gives the local file a stored object is kept in.
+
+        Args:
+            key (str): The key of the object.
+
+        Returns:
+            Path: The path of the file.
+
+        Raises:
+            NotImplementedError: If the objects are not kept on the local file system.
+        """
+        raise NotImplementedError(f"{type(self).__name__} does not keep objects in local files")
+
+    async def presign_upload(self, key: str, media_type: str, size: int) -> PresignedUpload:
+        """
+        Signs a request uploading an object directly to the storage, so its bytes do not go
+        through the application.
+
+        Args:
+            key (str): The key to store the object under.
+            media_type (str): The media type of the object.
+            size (int): The size of the object, in bytes.
+
+        Returns:
+            PresignedUpload: The request the client is to send.
+
+        Raises:
+            NotImplementedError: If the storage does not accept direct uploads.
+        """
+        raise NotImplementedError(f"{type(self).__name__} does not accept direct uploads")
+
+
+class LocalStorage(Storage):
+    """
+    Storage of the objects as files under a directory of the local file system.
+
+    Attributes:
+        root (Path): The directory the keys are relative to.
+    """
+
+    def __init__(self, root: Path):
+        self.root = root
+
+    def path(self, key: str) -> Path:
+        return self.root / key
+
+    async def save(self, key: str, source: Path, media_type: str) -> None:
+        await run_in_threadpool(self._save, source, self.path(key))
+
+    @staticmethod
+    def _save(source: Path, destination: Path) -> None:
+        destination.parent.mkdir(parents=True, exist_ok=True)
+        try:
+            # A rename, unless the file is on another file system
+            os.replace(source, destination)
+        except OSError as e:
+            if e.errno != errno.EXDEV:
+                raise
+            # Copy next to the destination first, so it never holds a partial file
+            with tempfile.NamedTemporaryFile(dir=destination.parent, prefix=".upload-",
+                                             delete=False) as temp:
+                pass
+            try:
+                shutil.move(source, temp.name)
+                os.replace(temp.name, destination)
+            except BaseException:
+                Path(temp.name).unlink(missing_ok=True)
+                raise
+
+    async def copy(self, source_key: str, destination_key: str) -> None:
+        await run_in_threadpool(self._copy, self.path(source_key), self.path(destination_key))
+
+    @staticmethod
+    def _copy(source: Path, destination: Path) -> None:
+        destination.parent.mkdir(parents=True, exist_ok=True)
+        temp = destination.with_name(f".copy-{destination.name}")
+        temp.unlink(missing_ok=True)
+        try:
+            # A hard link shares the content of the file rather than copying it
+            os.link(source, temp)
+        except FileNotFoundError:
+            raise
+        except OSError:
+            shutil.copyfile(source, temp)
+        os.replace(temp, destination)
+
+    async def open(self, key: str) -> BinaryIO:
+        return await run_in_threadpool(open, self.path(key), "rb")
+
+    async def delete(self, keys: Iterable[str]) -> None:
+        await run_in_threadpool(self._delete, [self.path(key) for key in keys])
+
+    @staticmethod
+    def _delete(paths: list[Path]) -> None:
+        for path in paths:
+            path.unlink(missing_ok=True)
+
+
+def build_storage() -> Storage:
+    """
+    Builds the storage driver selected by the `storage_backend` setting.
+
+    Returns:
+        Storage: The storage.
+    """
+    if settings.storage_backend == "s3":
+        # Imported here so that boto3 is only required when it is used
+        # pylint: disable=import-outside-toplevel
+        import boto3
+        from botocore.config import Config
+        from app.core.s3_storage import S3Storage
+        # Signature version 4 signs the headers of the presigned uploads, which version 2 does
+        # not, and is the one every region accepts
+        client = boto3.client("s3", endpoint_url=settings.storage_s3_endpoint_url,
+                              region_name=settings.storage_s3_region,
+                              config=Config(signature_version="s3v4"))
+        return S3Storage(client, settings.storage_s3_bucket, settings.storage_url_expires)
+
+    return LocalStorage(Path(settings.storage_local_root))
+
+
+storage = build_storage()
@@ -0,0 +1,120 @@
+"""
+This module provides a request-scoped collector of per-phase timings.
+
+The collector lives in a context variable, so the code being timed does not need a reference to
+the request: the database, hashing, JWT, file and serialization code only call `timed` or
+`record_timing`, which are no-ops when the current request is not being timed.
+"""
+
+import random
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar, Token
+from typing import Dict, Iterator
+
+
+class RequestTimings:
+    """
+    Accumulated durations of the phases of a request.
+
+    Attributes:
+        durations (Dict[str, int]): The total time spent in each phase, in nanoseconds.
+    """
+
+    __slots__ = ("durations",)
+
+    def __init__(self) -> None:
+        self.durations: Dict[str, int] = {}
+
+    def add(self, name: str, duration_ns: int) -> None:
+        """
+        Adds time spent in a phase.
+
+        Args:
+            name (str): The name of the phase.
+            duration_ns (int): The time spent, in nanoseconds.
+        """
+        self.durations[name] = self.durations.get(name, 0) + duration_ns
+
+    def server_timing(self) -> str:
+        """
+        Renders the durations as a Server-Timing header value.
+
+        Returns:
+            str: The metrics, with durations in milliseconds.
+        """
+        return ", ".join(f"{name};dur={duration_ns / 1e6:.3f}"
+                         for name, duration_ns in self.durations.items())
+
+
+_request_timings: ContextVar[RequestTimings | None] = ContextVar(
+    "request_timings", default=None)
+
+
+def start_request_timings(sample_rate: float) -> Token | None:
+    """
+    Starts collecting timings for the current request, subject to sampling.
+
+    Args:
+        sample_rate (float): The fraction of requests to time, between 0 and 1.
+
+    Returns:
+        Token, optional: The token to reset the context variable with, or None if the request
+        was not sampled.
+    """
+    if sample_rate < 1 and random.random() >= sample_rate:
+        return None
+    return _request_timings.set(RequestTimings())
+
+
+def stop_request_timings(token: Token) -> None:
+    """
+    Stops collecting timings for the current request.
+
+    Args:
+        token (Token): The token returned by `start_request_timings`.
+    """
+    _request_timings.reset(token)
+
+
+def get_request_timings() -> RequestTimings | None:
+    """
+    Returns the collector of the current request.
+
+    Returns:
+        RequestTimings, optional: The collector, or None if the request is not being timed.
+    """
+    return _request_timings.get()
+
+
+def record_timing(name: str, duration_ns: int) -> None:
+    """
+    Records time spent in a phase of the current request, if it is being timed.
+
+    Args:
+        name (str): The name of the phase.
+        duration_ns (int): The time spent, in nanoseconds.
+    """
+    timings = _request_timings.get()
+    if timings is not None:
+        timings.add(name, duration_ns)
+
+
+@contextmanager
+def timed(name: str) -> Iterator[None]:
+    """
+    Times the enclosed block as a phase of the current request, if it is being timed.
+
+    Args:
+        name (str): The name of the phase.
+    """
+    timings = _request_timings.get()
+    if timings is None:
+        yield
+        return
+
+    start = time.perf_counter_ns()
+    try:
+        yield
+    finally:
+        timings.add(name, time.perf_counter_ns() - start)
@@ -0,0 +1,133 @@
+"""
+This module provides a thread-safe, bounded LRU cache whose entries expire.
+"""
+
+import time
+from collections import OrderedDict
+from threading import Lock
+from typing import Any, Callable, Hashable
+
+
+class TTLCache:
+    """
+    A least-recently-used cache with a maximum size and per-entry expiry.
+
+    Expired entries are dropped when they are looked up or pushed out by newer entries, so the
+    cache never holds more than `max_size` entries.
+
+    Attributes:
+        max_size (int): The maximum number of entries; a value of 0 disables the cache.
+        ttl (float, optional): The default lifetime of an entry in seconds.
+        hits (int): The number of lookups that found a live entry.
+        misses (int): The number of lookups that found no entry or an expired one.
+    """
+
+    def __init__(self, max_size: int, ttl: float | None = None,
+                 clock: Callable[[], float] = time.time):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._clock = clock
+        self._entries: OrderedDict[Hashable, tuple[Any, float | None]] = OrderedDict()
+        self._lock = Lock()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """
+        Retrieves a live entry and marks it as recently used.
+
+        Args:
+            key (Hashable): The key of the entry.
+            default (Any): The value to return if there is no live entry.
+
+        Returns:
+            Any: The cached value, or the default.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+
+            value, expires_at = entry
+            if expires_at is not None and expires_at <= self._clock():
+                del self._entries[key]
+                self.misses += 1
+                return default
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: Hashable, value: Any, ttl: float | None = None,
+            expires_at: float | None = None) -> None:
+        """
+        Stores an entry, evicting the least recently used ones if the cache is full.
+
+        Args:
+            key (Hashable): The key of the entry.
+            value (Any): The value to cache.
+            ttl (float, optional): The lifetime of the entry in seconds; defaults to the cache's.
+            expires_at (float, optional): An absolute expiry time, taking precedence over ttl.
+        """
+        if self.max_size <= 0:
+            return
+
+        if expires_at is None:
+            ttl = self.ttl if ttl is None else ttl
+            expires_at = None if ttl is None else self._clock() + ttl
+
+        with self._lock:
+            self._entries[key] = (value, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def add(self, key: Hashable, value: Any, ttl: float | None = None) -> bool:
+        """
+        Stores an entry unless a live one is already stored under the key.
+
+        Args:
+            key (Hashable): The key of the entry.
+            value (Any): The value to cache.
+            ttl (float, optional): The lifetime of the entry in seconds; defaults to the cache's.
+
+        Returns:
+            bool: True if the entry was stored.
+        """
+        if self.max_size <= 0:
+            return False
+
+        ttl = self.ttl if ttl is None else ttl
+        now = self._clock()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and (entry[1] is None or entry[1] > now):
+                return False
+            self._entries[key] = (value, None if ttl is None else now + ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+        return True
+
+    def delete(self, key: Hashable) -> None:
+        """
+        Removes an entry if present.
+
+        Args:
+            key (Hashable): The key of the entry.
+        """
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        """
+        Removes all entries and resets the counters.
+        """
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
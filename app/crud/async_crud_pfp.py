@@ -0,0 +1,204 @@
+"""
+Module defining asyncio CRUD operations for profile pictures.
+"""
+
+from uuid import UUID
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.model.media_blob import MediaBlob
+from app.model.pfp import ProfilePicture
+from app.model.pfp_variant import ProfilePictureVariant
+from app.schema.pfp import MediaBlobCreate, ProfilePictureCreate, ProfilePictureVariantCreate
+from app.crud import statements
+
+
+class AsyncCRUDPfp:
+    """
+    This class encapsulates methods to perform CRUD operations on ProfilePicture entities
+    in the database through an asyncio session.
+
+    It mirrors CRUDPfp.
+
+    Attributes:
+        session (AsyncSession): SQLAlchemy asyncio database session.
+    """
+
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    async def create(self, pfp: ProfilePictureCreate) -> ProfilePicture:
+        """
+        Creates a new profile picture record in the database.
+
+        Args:
+            pfp (ProfilePictureCreate): The schema containing data for the new profile picture.
+
+        Returns:
+            ProfilePicture: The newly created profile picture record.
+
+        Raises:
+            IntegrityError: If the user already has a current profile picture; the transaction
+            is rolled back.
+        """
+        pfp = ProfilePicture(**pfp.model_dump())
+        self.session.add(pfp)
+        try:
+            await self.session.flush()
+        except IntegrityError:
+            await self.session.rollback()
+            raise
+        return pfp
+
+    async def delete_current_pfp(self, user_id: int) -> ProfilePicture:
+        """
+        Soft deletes the current profile picture of a user in a single UPDATE ... RETURNING
+        statement.
+
+        Args:
+            user_id (int): The ID of the user whose profile picture is to be deleted.
+
+        Returns:
+            ProfilePicture: The profile picture record that was soft deleted.
+        """
+        result = await self.session.scalars(statements.DELETE_CURRENT_PROFILE_PICTURE,
+                                            {"owner_id": user_id})
+        return result.first()
+
+    async def commit(self) -> None:
+        """
+        Commits the changes of the request, which all run in a single transaction.
+        """
+        await self.session.commit()
+
+    async def rollback(self) -> None:
+        """
+        Rolls back the changes of the request.
+        """
+        await self.session.rollback()
+
+    async def get_by_id(self, pfp_uuid: UUID) -> ProfilePicture:
+        """
+        Retrieves a profile picture record by its UUID.
+
+        A profile picture already loaded by the session is returned without querying the
+        database. It reads from the primary, as the URL of a picture is returned by its upload
+        and must be served right away.
+
+        Args:
+            pfp_uuid (UUID): The UUID of the profile picture to retrieve.
+
+        Returns:
+            ProfilePicture: The profile picture record with the provided UUID.
+        """
+        return await self.session.get(ProfilePicture, pfp_uuid)
+
+    async def get_by_user_id(self, user_id: int) -> ProfilePicture:
+        """
+        Retrieves the current profile picture of a user.
+
+        Args:
+            user_id (int): The ID of the user whose profile picture is to be retrieved.
+
+        Returns:
+            ProfilePicture: The profile picture record of the user.
+        """
+        result = await self.session.scalars(statements.SELECT_CURRENT_PROFILE_PICTURE,
+                                            {"user_id": user_id})
+        return result.first()
+
+    async def create_variants(self, variants: list[ProfilePictureVariantCreate]) -> None:
+        """
+        Records the variants of a profile picture, in a single INSERT statement.
+
+        Args:
+            variants (list[ProfilePictureVariantCreate]): The schemas of the variants.
+        """
+        await self.session.execute(statements.INSERT_PROFILE_PICTURE_VARIANTS,
+                                   [variant.model_dump() for variant in variants])
+
+    async def get_variant(self, pfp_uuid: UUID, size: int,
+                          media_type: str) -> ProfilePictureVariant:
+        """
+        Retrieves a variant of a current profile picture.
+
+        It reads from the primary, as the URL of a picture is returned by its upload and must be
+        served right away.
+
+        Args:
+            pfp_uuid (UUID): The UUID of the profile picture.
+            size (int): The size of the variant.
+            media_type (str): The media type of the variant.
+
+        Returns:
+            ProfilePictureVariant: The variant record, if found and the profile picture was not
+            deleted.
+        """
+        result = await self.session.scalars(statements.SELECT_PROFILE_PICTURE_VARIANT,
+                                            {"pfp_id": pfp_uuid, "size": size,
+                                             "media_type": media_type})
+        return result.first()
+
+    async def get_variant_paths(self, pfp_uuid: UUID) -> list[str]:
+        """
+        Retrieves the file paths of the variants of a profile picture.
+
+        Args:
+            pfp_uuid (UUID): The UUID of the profile picture.
+
+        Returns:
+            list[str]: The paths of its variants.
+        """
+        result = await self.session.scalars(statements.SELECT_PROFILE_PICTURE_VARIANT_PATHS,
+                                            {"pfp_id": pfp_uuid})
+        return list(result)
+
+    async def is_blob_stored(self, sha256: str) -> bool:
+        """
+        Checks whether an image is stored, without locking its row.
+
+        Args:
+            sha256 (str): The SHA-256 digest of the image.
+
+        Returns:
+            bool: True if an image with the digest is stored.
+        """
+        return await self.session.scalar(statements.SELECT_MEDIA_BLOB_EXISTS,
+                                         {"blob_sha256": sha256})
+
+    async def acquire_blob(self, blob: MediaBlobCreate) -> MediaBlob:
+        """
+        Stores an image, or takes one more reference to it if an image with the same content is
+        already stored, in a single INSERT ... ON CONFLICT DO UPDATE statement.
+
+        The row of the image stays locked until the end of the transaction.
+
+        Args:
+            blob (MediaBlobCreate): The schema of the image.
+
+        Returns:
+            MediaBlob: The stored image; its path is the given one if it was not stored yet, and
+            where its files are stored otherwise.
+        """
+        result = await self.session.scalars(statements.ACQUIRE_MEDIA_BLOB, blob.model_dump())
+        return result.one()
+
+    async def release_blob(self, sha256: str) -> bool:
+        """
+        Drops a reference to a stored image, and deletes the image once no reference is left.
+
+        The row of the image stays locked until the end of the transaction.
+
+        Args:
+            sha256 (str): The SHA-256 digest of the image.
+
+        Returns:
+            bool: True if the last reference was dropped, so the files of the image are to be
+            removed.
+        """
+        result = await self.session.scalars(statements.RELEASE_MEDIA_BLOB,
+                                            {"blob_sha256": sha256})
+        if result.first() != 0:
+            return False
+        await self.session.execute(statements.DELETE_UNREFERENCED_MEDIA_BLOB,
+                                   {"blob_sha256": sha256})
+        return True
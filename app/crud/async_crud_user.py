@@ -0,0 +1,162 @@
+"""
+Module for asyncio CRUD operations related to users in the database.
+"""
+
+from sqlalchemy import Row
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.schema.user import UserCreate
+from app.model.user import User
+from app.database.routing import read_from_replica
+from app.crud import statements
+
+
+class AsyncCRUDUser:
+    """
+    This class encapsulates methods to perform CRUD operations on User entities
+    in the database through an asyncio session.
+
+    It mirrors CRUDUser.
+
+    Attributes:
+        session (AsyncSession): SQLAlchemy asyncio database session.
+    """
+
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    async def create(self, user: UserCreate) -> User | None:
+        """
+        Creates a new user record in the database, unless the username or email is taken.
+
+        Args:
+            user (UserCreate): UserCreate schema instance containing user data.
+
+        Returns:
+            User | None: Created User entity object, or None if the username or email is
+            already registered.
+        """
+        result = await self.session.scalars(statements.INSERT_USER, user.model_dump())
+        return result.first()
+
+    async def get_by_id(self, user_id: int) -> User:
+        """
+        Retrieves a user record from the database by its ID.
+
+        A user already loaded by the session is returned without querying the database. It
+        reads from the primary, as the user is loaded to be changed.
+
+        Args:
+            user_id (int): ID of the user to retrieve.
+
+        Returns:
+            User: User entity object if found.
+        """
+        return await self.session.get(User, user_id)
+
+    async def get_profile(self, user_id: int) -> Row | None:
+        """
+        Retrieves a user record with its current profile picture, and the last deletion of one
+        of its profile pictures, in a single query.
+
+        It reads from a replica, unless the session is pinned to the primary, so the profile
+        may lag the primary by the replication lag.
+
+        Args:
+            user_id (int): ID of the user to retrieve.
+
+        Returns:
+            Row | None: The User entity object, with its profile_picture loaded, and the
+            last_deleted_at of its profile pictures; None if the user does not exist.
+        """
+        with read_from_replica(self.session):
+            result = await self.session.execute(statements.SELECT_USER_PROFILE,
+                                                {"user_id": user_id})
+        return result.first()
+
+    async def get_registered(self, username: str, email: str) -> Row:
+        """
+        Checks whether a username and an email are registered, ignoring case, in a single
+        query.
+
+        Args:
+            username (str): The username.
+            email (str): The email.
+
+        Returns:
+            Row: The username and email columns, True for those that are registered.
+        """
+        result = await self.session.execute(statements.SELECT_REGISTERED,
+                                            {"username": username.lower(),
+                                             "email": email.lower()})
+        return result.one()
+
+    async def get_by_identifier(self, identifier: str) -> User:
+        """
+        Retrieves a user record from the database by its username or email, ignoring case.
+
+        It reads from the primary, so that a user can log in right after signing up.
+
+        Args:
+            identifier (str): Username or email of the user to retrieve.
+
+        Returns:
+            User: User entity object if found, preferring a username match.
+        """
+        result = await self.session.scalars(statements.SELECT_USER_BY_IDENTIFIER,
+                                            {"identifier": identifier.lower()})
+        return result.first()
+
+    async def update_username(self, user_id: int, username: str) -> User | None:
+        """
+        Changes the username of a user in a single UPDATE ... RETURNING statement.
+
+        Args:
+            user_id (int): ID of the user to update.
+            username (str): The new username.
+
+        Returns:
+            User | None: Updated User entity object, or None if the user does not exist or
+            already has this username.
+
+        Raises:
+            IntegrityError: If the username is already registered by another user; the
+            transaction is rolled back.
+        """
+        try:
+            result = await self.session.scalars(statements.UPDATE_USERNAME,
+                                                {"user_id": user_id, "new_username": username})
+        except IntegrityError:
+            await self.session.rollback()
+            raise
+        return result.first()
+
+    async def update(self, user: User) -> User:
+        """
+        Updates a user record in the database.
+
+        Args:
+            user (User): User entity object containing updated user data.
+
+        Returns:
+            User: Updated User entity object.
+        """
+        # updated_at is set by the UPDATE and returned by it
+        await self.session.flush()
+        return user
+
+    async def delete(self, user: User) -> None:
+        """
+        Deletes a user record from the database.
+
+        Args:
+            user (User): User entity object to delete.
+        """
+        await self.session.delete(user)
+        await self.session.flush()
+
+    async def commit(self) -> None:
+        """
+        Commits the changes of the request, which all run in a single transaction.
+        """
+        await self.session.commit()
@@ -0,0 +1,43 @@
+"""
+Module providing the CRUD objects matching the kind of database session in use.
+"""
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from app.crud.async_crud_pfp import AsyncCRUDPfp
+from app.crud.async_crud_user import AsyncCRUDUser
+from app.crud.crud_pfp import CRUDPfp
+from app.crud.crud_user import CRUDUser
+from app.crud.threaded_crud import ThreadedCRUD
+
+
+def get_user_crud(session: Session | AsyncSession) -> AsyncCRUDUser | ThreadedCRUD:
+    """
+    Provides awaitable CRUD operations for User entities.
+
+    Args:
+        session (Session | AsyncSession): The SQLAlchemy session.
+
+    Returns:
+        AsyncCRUDUser | ThreadedCRUD: The asyncio CRUD for an asyncio session, or the
+        synchronous CRUD run in the threadpool otherwise.
+    """
+    if isinstance(session, AsyncSession):
+        return AsyncCRUDUser(session)
+    return ThreadedCRUD(CRUDUser(session))
+
+
+def get_pfp_crud(session: Session | AsyncSession) -> AsyncCRUDPfp | ThreadedCRUD:
+    """
+    Provides awaitable CRUD operations for ProfilePicture entities.
+
+    Args:
+        session (Session | AsyncSession): The SQLAlchemy session.
+
+    Returns:
+        AsyncCRUDPfp | ThreadedCRUD: The asyncio CRUD for an asyncio session, or the
+        synchronous CRUD run in the threadpool otherwise.
+    """
+    if isinstance(session, AsyncSession):
+        return AsyncCRUDPfp(session)
+    return ThreadedCRUD(CRUDPfp(session))
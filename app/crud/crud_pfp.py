@@ -3,10 +3,13 @@ Module defining CRUD operations for profile pictures.
 """
 
 from uuid import UUID
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
-from sqlalchemy.sql import func, and_
+from app.model.media_blob import MediaBlob
 from app.model.pfp import ProfilePicture
-from app.schema.pfp import ProfilePictureCreate
+from app.model.pfp_variant import ProfilePictureVariant
+from app.schema.pfp import MediaBlobCreate, ProfilePictureCreate, ProfilePictureVariantCreate
+from app.crud import statements
 
 
 class CRUDPfp:
@@ -30,17 +33,24 @@ class CRUDPfp:
 
         Returns:
             ProfilePicture: The newly created profile picture record.
+
+        Raises:
+            IntegrityError: If the user already has a current profile picture; the transaction
+            is rolled back.
         """
         pfp = ProfilePicture(**pfp.model_dump())
-        pfp.uploaded_at = func.now()  # pylint: disable=not-callable
         self.session.add(pfp)
-        self.session.commit()
-        self.session.refresh(pfp)
+        try:
+            self.session.flush()
+        except IntegrityError:
+            self.session.rollback()
+            raise
         return pfp
 
     def delete_current_pfp(self, user_id: int) -> ProfilePicture:
         """
-        Soft deletes the current profile picture of a user.
+        Soft deletes the current profile picture of a user in a single UPDATE ... RETURNING
+        statement.
 
         Args:
             user_id (int): The ID of the user whose profile picture is to be deleted.
@@ -48,29 +58,36 @@ class CRUDPfp:
         Returns:
             ProfilePicture: The profile picture record that was soft deleted.
         """
-        last_pfp = self.session.query(ProfilePicture).filter(
-            and_(ProfilePicture.user_id == user_id,
-                 ProfilePicture.is_deleted.is_(False))
-        ).first()
-
-        if last_pfp:
-            last_pfp.deleted_at = func.now()  # pylint: disable=not-callable
-            last_pfp.is_deleted = True
+        return self.session.scalars(statements.DELETE_CURRENT_PROFILE_PICTURE,
+                                    {"owner_id": user_id}).first()
 
+    def commit(self) -> None:
+        """
+        Commits the changes of the request, which all run in a single transaction.
+        """
         self.session.commit()
-        return last_pfp
+
+    def rollback(self) -> None:
+        """
+        Rolls back the changes of the request.
+        """
+        self.session.rollback()
 
     def get_by_id(self, pfp_uuid: UUID) -> ProfilePicture:
         """
         Retrieves a profile picture record by its UUID.
 
+        A profile picture already loaded by the session is returned without querying the
+        database. It reads from the primary, as the URL of a picture is returned by its upload
+        and must be served right away.
+
         Args:
             pfp_uuid (UUID): The UUID of the profile picture to retrieve.
 
         Returns:
             ProfilePicture: The profile picture record with the provided UUID.
         """
-        return self.session.query(ProfilePicture).filter(ProfilePicture.id == pfp_uuid).first()
+        return self.session.get(ProfilePicture, pfp_uuid)
 
     def get_by_user_id(self, user_id: int) -> ProfilePicture:
         """
@@ -82,7 +99,96 @@ class CRUDPfp:
         Returns:
             ProfilePicture: The profile picture record of the user.
         """
-        return self.session.query(ProfilePicture).filter(
-            and_(ProfilePicture.user_id == user_id,
-                 ProfilePicture.is_deleted.is_(False))
-        ).first()
+        return self.session.scalars(statements.SELECT_CURRENT_PROFILE_PICTURE,
+                                    {"user_id": user_id}).first()
+
+    def create_variants(self, variants: list[ProfilePictureVariantCreate]) -> None:
+        """
+        Records the variants of a profile picture, in a single INSERT statement.
+
+        Args:
+            variants (list[ProfilePictureVariantCreate]): The schemas of the variants.
+        """
+        self.session.execute(statements.INSERT_PROFILE_PICTURE_VARIANTS,
+                             [variant.model_dump() for variant in variants])
+
+    def get_variant(self, pfp_uuid: UUID, size: int, media_type: str) -> ProfilePictureVariant:
+        """
+        Retrieves a variant of a current profile picture.
+
+        It reads from the primary, as the URL of a picture is returned by its upload and must be
+        served right away.
+
+        Args:
+            pfp_uuid (UUID): The UUID of the profile picture.
+            size (int): The size of the variant.
+            media_type (str): The media type of the variant.
+
+        Returns:
+            ProfilePictureVariant: The variant record, if found and the profile picture was not
+            deleted.
+        """
+        return self.session.scalars(statements.SELECT_PROFILE_PICTURE_VARIANT,
+                                    {"pfp_id": pfp_uuid, "size": size,
+                                     "media_type": media_type}).first()
+
+    def get_variant_paths(self, pfp_uuid: UUID) -> list[str]:
+        """
+        Retrieves the file paths of the variants of a profile picture.
+
+        Args:
+            pfp_uuid (UUID): The UUID of the profile picture.
+
+        Returns:
+            list[str]: The paths of its variants.
+        """
+        return list(self.session.scalars(statements.SELECT_PROFILE_PICTURE_VARIANT_PATHS,
+                                         {"pfp_id": pfp_uuid}))
+
+    def is_blob_stored(self, sha256: str) -> bool:
+        """
+        Checks whether an image is stored, without locking its row.
+
+        Args:
+            sha256 (str): The SHA-256 digest of the image.
+
+        Returns:
+            bool: True if an image with the digest is stored.
+        """
+        return self.session.scalar(statements.SELECT_MEDIA_BLOB_EXISTS, {"blob_sha256": sha256})
+
+    def acquire_blob(self, blob: MediaBlobCreate) -> MediaBlob:
+        """
+        Stores an image, or takes one more reference to it if an image with the same content is
+        already stored, in a single INSERT ... ON CONFLICT DO UPDATE statement.
+
+        The row of the image stays locked until the end of the transaction.
+
+        Args:
+            blob (MediaBlobCreate): The schema of the image.
+
+        Returns:
+            MediaBlob: The stored image; its path is the given one if it was not stored yet, and
+            where its files are stored otherwise.
+        """
+        return self.session.scalars(statements.ACQUIRE_MEDIA_BLOB, blob.model_dump()).one()
+
+    def release_blob(self, sha256: str) -> bool:
+        """
+        Drops a reference to a stored image, and deletes the image once no reference is left.
+
+        The row of the image stays locked until the end of the transaction.
+
+        Args:
+            sha256 (str): The SHA-256 digest of the image.
+
+        Returns:
+            bool: True if the last reference was dropped, so the files of the image are to be
+            removed.
+        """
+        ref_count = self.session.scalars(statements.RELEASE_MEDIA_BLOB,
+                                         {"blob_sha256": sha256}).first()
+        if ref_count != 0:
+            return False
+        self.session.execute(statements.DELETE_UNREFERENCED_MEDIA_BLOB, {"blob_sha256": sha256})
+        return True
@@ -2,11 +2,13 @@
 Module for CRUD operations related to users in the database.
 """
 
+from sqlalchemy import Row
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
-from sqlalchemy.sql import func, and_
 from app.schema.user import UserCreate
 from app.model.user import User
-from app.model.pfp import ProfilePicture
+from app.database.routing import read_from_replica
+from app.crud import statements
 
 
 class CRUDUser:
@@ -21,71 +23,124 @@ class CRUDUser:
     def __init__(self, session: Session):
         self.session = session
 
-    def create(self, user: UserCreate) -> User:
+    def create(self, user: UserCreate) -> User | None:
         """
-        Creates a new user record in the database.
+        Creates a new user record in the database, unless the username or email is taken.
+
+        The uniqueness is enforced by the unique constraints in a single INSERT ... ON CONFLICT
+        DO NOTHING RETURNING statement, so concurrent signups cannot both succeed.
 
         Args:
             user (UserCreate): UserCreate schema instance containing user data.
 
         Returns:
-            User: Created User entity object.
+            User | None: Created User entity object, or None if the username or email is
+            already registered.
         """
-        user = User(**user.model_dump())
-        self.session.add(user)
-        self.session.commit()
-        self.session.refresh(user)
-        return user
+        return self.session.scalars(statements.INSERT_USER, user.model_dump()).first()
 
     def get_by_id(self, user_id: int) -> User:
         """
         Retrieves a user record from the database by its ID.
 
+        A user already loaded by the session is returned without querying the database. It
+        reads from the primary, as the user is loaded to be changed.
+
         Args:
             id (int): ID of the user to retrieve.
 
         Returns:
             User: User entity object if found.
         """
-        return self.session.query(User).filter(User.id == user_id).first()
+        return self.session.get(User, user_id)
 
-    def get_by_username(self, username: str) -> User:
+    def get_profile(self, user_id: int) -> Row | None:
         """
-        Retrieves a user record from the database by its username.
+        Retrieves a user record with its current profile picture, and the last deletion of one
+        of its profile pictures, in a single query.
+
+        It reads from a replica, unless the session is pinned to the primary, so the profile
+        may lag the primary by the replication lag.
 
         Args:
-            username (str): Username of the user to retrieve.
+            user_id (int): ID of the user to retrieve.
 
         Returns:
-            User: User entity object if found.
+            Row | None: The User entity object, with its profile_picture loaded, and the
+            last_deleted_at of its profile pictures; None if the user does not exist.
         """
-        return self.session.query(User).filter(User.username == username).first()
+        with read_from_replica(self.session):
+            return self.session.execute(statements.SELECT_USER_PROFILE,
+                                        {"user_id": user_id}).first()
 
-    def get_by_email(self, email: str) -> User:
+    def get_registered(self, username: str, email: str) -> Row:
         """
-        Retrieves a user record from the database by its email.
+        Checks whether a username and an email are registered, ignoring case, in a single
+        query.
 
         Args:
-            email (str): Email of the user to retrieve.
+            username (str): The username.
+            email (str): The email.
 
         Returns:
-            User: User entity object if found.
+            Row: The username and email columns, True for those that are registered.
+        """
+        return self.session.execute(statements.SELECT_REGISTERED,
+                                    {"username": username.lower(),
+                                     "email": email.lower()}).one()
+
+    def get_by_identifier(self, identifier: str) -> User:
+        """
+        Retrieves a user record from the database by its username or email, ignoring case.
+
+        Both conditions are answered by the lower() indexes in a single query.
+
+        It reads from the primary, so that a user can log in right after signing up.
+
+        Args:
+            identifier (str): Username or email of the user to retrieve.
+
+        Returns:
+            User: User entity object if found, preferring a username match.
         """
-        return self.session.query(User).filter(User.email == email).first()
+        return self.session.scalars(statements.SELECT_USER_BY_IDENTIFIER,
+                                    {"identifier": identifier.lower()}).first()
+
+    def update_username(self, user_id: int, username: str) -> User | None:
+        """
+        Changes the username of a user in a single UPDATE ... RETURNING statement.
+
+        Args:
+            user_id (int): ID of the user to update.
+            username (str): The new username.
+
+        Returns:
+            User | None: Updated User entity object, or None if the user does not exist or
+            already has this username.
+
+        Raises:
+            IntegrityError: If the username is already registered by another user; the
+            transaction is rolled back.
+        """
+        try:
+            return self.session.scalars(statements.UPDATE_USERNAME,
+                                        {"user_id": user_id, "new_username": username}).first()
+        except IntegrityError:
+            self.session.rollback()
+            raise
 
     def update(self, user: User) -> User:
         """
         Updates a user record in the database.
 
         Args:
-            user (UserPublic): UserPublic schema instance containing updated user data.
+            user (User): User entity object containing updated user data.
 
         Returns:
-            UserPublic: Updated User entity object.
+            User: Updated User entity object.
         """
-        user.updated_at = func.now()  # pylint: disable=not-callable
-        self.session.commit()
-        self.session.refresh(user)
+        # updated_at is set by the UPDATE and returned by it
+        self.session.flush()
         return user
 
     def delete(self, user: User) -> None:
@@ -96,18 +151,10 @@ class CRUDUser:
             user (User): User entity object to delete.
         """
         self.session.delete(user)
-        self.session.commit()
+        self.session.flush()
 
-    def get_current_profile_picture(self, user_id: int):
+    def commit(self) -> None:
         """
-        Retrieves the current profile picture of a user.
-
-        Args:
-            user_id (int): ID of the user whose profile picture to retrieve.
-
-        Returns:
-            ProfilePicture: ProfilePicture entity object if found.
+        Commits the changes of the request, which all run in a single transaction.
         """
-        return self.session.query(ProfilePicture).filter(and_(
-            ProfilePicture.user_id == user_id,
-            ProfilePicture.is_deleted.is_(False))).first()
+        self.session.commit()
@@ -0,0 +1,108 @@
+"""
+Module defining the SQL statements of the CRUD classes.
+
+The statements are built once, with bound parameters for their values, and shared by the
+synchronous and asyncio CRUD classes. Besides saving the construction of a statement on every
+call, reusing the same object makes each call a cheap hit in SQLAlchemy's compiled cache.
+"""
+
+from sqlalchemy import bindparam, delete, exists, select, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import joinedload
+from sqlalchemy.sql import func, or_
+from app.model.user import User
+from app.model.media_blob import MediaBlob
+from app.model.pfp import ProfilePicture
+from app.model.pfp_variant import ProfilePictureVariant
+
+# Parameters: the columns of the user. Returns nothing if the username or email is taken.
+INSERT_USER = insert(User).on_conflict_do_nothing().returning(User)
+
+# Parameters: user_id. Returns the user with its current profile picture loaded, and the last
+# deletion of one of its profile pictures: what the public profile of the user changes with.
+SELECT_USER_PROFILE = (select(User,
+                              select(func.max(ProfilePicture.deleted_at))  # pylint: disable=not-callable
+                              .where(ProfilePicture.user_id == User.id)
+                              .correlate(User)
+                              .scalar_subquery()
+                              .label("last_deleted_at"))
+                       .options(joinedload(User.profile_picture))
+                       .where(User.id == bindparam("user_id")))
+
+# Parameters: username and email, in lower case. Returns whether each is registered, each answered
+# by its lower() index.
+SELECT_REGISTERED = select(
+    exists().where(func.lower(User.username) == bindparam("username")).label("username"),
+    exists().where(func.lower(User.email) == bindparam("email")).label("email"))
+
+# Parameters: identifier, in lower case. Prefers a username match over an email match.
+_username_match = func.lower(User.username) == bindparam("identifier")
+SELECT_USER_BY_IDENTIFIER = (select(User)
+                             .where(or_(_username_match,
+                                        func.lower(User.email) == bindparam("identifier")))
+                             .order_by(_username_match.desc())
+                             .limit(1))
+
+# Parameters: user_id, new_username. Returns nothing if the user already has the username.
+UPDATE_USERNAME = (update(User)
+                   .where(User.id == bindparam("user_id"),
+                          User.username != bindparam("new_username"))
+                   .values(username=bindparam("new_username"),
+                           updated_at=func.now())  # pylint: disable=not-callable
+                   .returning(User))
+
+# Parameters: user_id
+SELECT_CURRENT_PROFILE_PICTURE = select(ProfilePicture).where(
+    ProfilePicture.user_id == bindparam("user_id"),
+    ProfilePicture.is_deleted.is_(False))
+
+# Parameters: owner_id, the ID of the user; bound parameters of an UPDATE cannot be named after
+# a column of the table. Returns the soft deleted profile picture, if any.
+DELETE_CURRENT_PROFILE_PICTURE = (update(ProfilePicture)
+                                  .where(ProfilePicture.user_id == bindparam("owner_id"),
+                                         ProfilePicture.is_deleted.is_(False))
+                                  .values(is_deleted=True,
+                                          deleted_at=func.now())  # pylint: disable=not-callable
+                                  .returning(ProfilePicture))
+
+# Parameters: the columns of each variant
+INSERT_PROFILE_PICTURE_VARIANTS = insert(ProfilePictureVariant)
+
+# Parameters: pfp_id, size, media_type. Returns nothing if the profile picture was deleted.
+SELECT_PROFILE_PICTURE_VARIANT = (select(ProfilePictureVariant)
+                                  .join(ProfilePicture, ProfilePicture.id ==
+                                        ProfilePictureVariant.profile_picture_id)
+                                  .where(ProfilePicture.id == bindparam("pfp_id"),
+                                         ProfilePicture.is_deleted.is_(False),
+                                         ProfilePictureVariant.size == bindparam("size"),
+                                         ProfilePictureVariant.media_type ==
+                                         bindparam("media_type")))
+
+# Parameters: pfp_id
+SELECT_PROFILE_PICTURE_VARIANT_PATHS = select(ProfilePictureVariant.path).where(
+    ProfilePictureVariant.profile_picture_id == bindparam("pfp_id"))
+
+# Parameters: blob_sha256. Returns whether the image is stored.
+SELECT_MEDIA_BLOB_EXISTS = select(exists().where(MediaBlob.sha256 == bindparam("blob_sha256")))
+
+# Parameters: sha256, path. Stores an image, or takes one more reference to it if it is already
+# stored. Returns the stored image, whose path is the given one if it was not stored yet.
+ACQUIRE_MEDIA_BLOB = (insert(MediaBlob)
+                      .values(ref_count=1)
+                      .on_conflict_do_update(index_elements=[MediaBlob.sha256],
+                                             set_={"ref_count": MediaBlob.ref_count + 1,
+                                                   "updated_at": func.now()})  # pylint: disable=not-callable
+                      .returning(MediaBlob)
+                      .execution_options(populate_existing=True))
+
+# Parameters: blob_sha256. Returns the reference count left.
+RELEASE_MEDIA_BLOB = (update(MediaBlob)
+                      .where(MediaBlob.sha256 == bindparam("blob_sha256"))
+                      .values(ref_count=MediaBlob.ref_count - 1,
+                              updated_at=func.now())  # pylint: disable=not-callable
+                      .returning(MediaBlob.ref_count))
+
+# Parameters: blob_sha256
+DELETE_UNREFERENCED_MEDIA_BLOB = delete(MediaBlob).where(
+    MediaBlob.sha256 == bindparam("blob_sha256"),
+    MediaBlob.ref_count == 0)
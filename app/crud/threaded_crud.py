@@ -0,0 +1,28 @@
+"""
+Module adapting the synchronous CRUD classes to the asyncio interface of the services.
+"""
+
+from typing import Any
+from starlette.concurrency import run_in_threadpool
+
+
+class ThreadedCRUD:
+    """
+    Exposes the methods of a synchronous CRUD object as coroutines run in the threadpool, so the
+    services can await the same calls whether the session is synchronous or asyncio.
+
+    Attributes other than methods, such as the session, are returned as they are.
+    """
+
+    def __init__(self, crud: Any):
+        self._crud = crud
+
+    def __getattr__(self, name: str) -> Any:
+        attribute = getattr(self._crud, name)
+        if not callable(attribute):
+            return attribute
+
+        async def call_in_threadpool(*args, **kwargs):
+            return await run_in_threadpool(attribute, *args, **kwargs)
+
+        return call_in_threadpool
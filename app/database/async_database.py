@@ -0,0 +1,59 @@
+"""
+This module sets up the asyncio SQLAlchemy engine and session for the application.
+
+It is the native asyncio counterpart of `app.database.database`, using the asyncpg driver, and
+is only imported when the `database_async` setting is enabled.
+"""
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from app.core.config import settings
+from app.database.database import SQLALCHEMY_DATABASE_URL, POOL_OPTIONS
+from app.database.instrumentation import InstrumentedAsyncQueuePool, instrument_engine
+from app.database.routing import RoutingSession
+
+
+def to_async_url(url: str) -> str:
+    """
+    Converts a PostgreSQL URL to use the asyncpg driver.
+
+    Args:
+        url (str): The database URL.
+
+    Returns:
+        str: The URL with the postgresql+asyncpg scheme.
+    """
+    return url.replace("postgresql://", "postgresql+asyncpg://", 1)
+
+
+ASYNC_SQLALCHEMY_DATABASE_URL = to_async_url(SQLALCHEMY_DATABASE_URL)
+
+async_engine = create_async_engine(ASYNC_SQLALCHEMY_DATABASE_URL,
+                                   poolclass=InstrumentedAsyncQueuePool, **POOL_OPTIONS)
+instrument_engine(async_engine.sync_engine, "primary-async")
+
+async_replica_engines = []
+for index, replica_url in enumerate(settings.database_replica_urls):
+    async_replica_engine = create_async_engine(to_async_url(replica_url),
+                                               poolclass=InstrumentedAsyncQueuePool,
+                                               **POOL_OPTIONS)
+    instrument_engine(async_replica_engine.sync_engine, f"replica-{index}-async")
+    async_replica_engines.append(async_replica_engine)
+
+# Attributes are not expired on commit, since reloading them would require an await.
+# The routing session picks between the synchronous facades of the asyncio engines.
+AsyncSessionLocal = async_sessionmaker(
+    async_engine, sync_session_class=RoutingSession, autoflush=False, expire_on_commit=False,
+    replicas=[replica.sync_engine for replica in async_replica_engines])
+
+
+async def get_async_db():
+    """
+    Creates a new SQLAlchemy asyncio session and yields it.
+
+    This function ensures that the database session is properly closed after use.
+    """
+    db: AsyncSession = AsyncSessionLocal()
+    try:
+        yield db
+    finally:
+        await db.close()
@@ -2,20 +2,42 @@
 This module sets up the SQLAlchemy engine, session, and base class for the application.
 
 It configures the database connection using settings from the configuration file and provides a
-function to obtain a database session.
+function to obtain a database session. Read-only CRUD queries are routed to the read replicas,
+if any are configured (see `app.database.routing`).
 """
 
 from sqlalchemy import create_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from app.core.config import settings
+from app.database.instrumentation import InstrumentedQueuePool, instrument_engine
+from app.database.routing import RoutingSession
 
 SQLALCHEMY_DATABASE_URL = f"postgresql://{settings.database_username}:{settings.database_password}@{
     settings.database_hostname}:{settings.database_port}/{settings.database_name}"
 
-engine = create_engine(SQLALCHEMY_DATABASE_URL)
-
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# Connection pool options shared by the primary and replica engines, sync and asyncio
+POOL_OPTIONS = {
+    "pool_size": settings.database_pool_size,
+    "max_overflow": settings.database_max_overflow,
+    "pool_timeout": settings.database_pool_timeout,
+    "pool_recycle": settings.database_pool_recycle,
+    "pool_pre_ping": settings.database_pool_pre_ping,
+}
+
+engine = create_engine(SQLALCHEMY_DATABASE_URL, poolclass=InstrumentedQueuePool, **POOL_OPTIONS)
+instrument_engine(engine)
+
+replica_engines = []
+for index, replica_url in enumerate(settings.database_replica_urls):
+    replica_engine = create_engine(replica_url, poolclass=InstrumentedQueuePool, **POOL_OPTIONS)
+    instrument_engine(replica_engine, f"replica-{index}")
+    replica_engines.append(replica_engine)
+
+# Attributes are not expired on commit, so rows returned by INSERT/UPDATE ... RETURNING are not
+# selected again when they are serialized
+SessionLocal = sessionmaker(class_=RoutingSession, autocommit=False, autoflush=False,
+                            expire_on_commit=False, bind=engine, replicas=replica_engines)
 
 Base = declarative_base()
 
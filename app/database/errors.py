@@ -0,0 +1,23 @@
+"""
+This module inspects the database errors wrapped by SQLAlchemy, whichever driver raised them.
+"""
+
+from sqlalchemy.exc import DBAPIError
+
+
+def constraint_name(error: DBAPIError) -> str | None:
+    """
+    Gives the name of the constraint or unique index an error violated.
+
+    Args:
+        error (DBAPIError): The error raised by SQLAlchemy.
+
+    Returns:
+        str | None: The name of the constraint, or None if the error did not name one.
+    """
+    # psycopg2 reports the diagnostics of the error on the exception itself
+    diag = getattr(error.orig, "diag", None)
+    if diag is not None:
+        return diag.constraint_name
+    # The asyncpg adapter chains the exception raised by asyncpg
+    return getattr(error.orig.__cause__, "constraint_name", None)
@@ -0,0 +1,126 @@
+"""
+This module attaches the request instrumentation and the pool metrics to SQLAlchemy engines.
+"""
+
+import time
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+from app.core.metrics import DB_POOL_CHECKED_OUT, DB_POOL_OVERFLOW, DB_POOL_WAIT
+from app.core.timing import record_timing
+from app.database.query_stats import record_query
+
+QUERY_START_TIMES = "query_start_times"
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    # pylint: disable=unused-argument,too-many-arguments
+    conn.info.setdefault(QUERY_START_TIMES, []).append(time.perf_counter_ns())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    # pylint: disable=unused-argument,too-many-arguments
+    duration_ns = time.perf_counter_ns() - conn.info[QUERY_START_TIMES].pop()
+    record_timing("db", duration_ns)
+    record_query(statement, duration_ns)
+
+
+def _handle_error(context):
+    # A failed statement, such as a unique constraint violation, is never followed by
+    # after_cursor_execute; drop its start time so it does not skew the next statement
+    start_times = context.connection.info.get(QUERY_START_TIMES) if context.connection else None
+    if start_times:
+        start_times.pop()
+
+
+class _PoolMetrics:
+    """
+    The metric children of the pool of an engine, bound once.
+
+    Attributes:
+        checked_out: The child of the checked out connections gauge.
+        overflow: The child of the overflow connections gauge.
+        wait_time: The child of the wait time histogram.
+    """
+
+    __slots__ = ("checked_out", "overflow", "wait_time")
+
+    def __init__(self, name: str):
+        self.checked_out = DB_POOL_CHECKED_OUT.labels(name)
+        self.overflow = DB_POOL_OVERFLOW.labels(name)
+        self.wait_time = DB_POOL_WAIT.labels(name)
+
+    def update(self, pool: QueuePool) -> None:
+        """
+        Sets the gauges to the state of the pool.
+
+        Args:
+            pool (QueuePool): The pool of the engine.
+        """
+        self.checked_out.set(pool.checkedout())
+        self.overflow.set(max(pool.overflow(), 0))
+
+
+class _PoolMetricsMixin:
+    """
+    Pool mixin that records how long each checkout waits for a connection, and updates the
+    gauges of the pool whenever a connection is checked out or returned, so that they are kept
+    by each worker process in multiprocess mode.
+
+    Attributes:
+        metrics (_PoolMetrics): The metric children of the engine of the pool.
+    """
+
+    metrics = _PoolMetrics("primary")
+
+    def _do_get(self):
+        start_time = time.perf_counter_ns()
+        try:
+            return super()._do_get()
+        finally:
+            self.metrics.wait_time.observe((time.perf_counter_ns() - start_time) / 1e9)
+            self.metrics.update(self)
+
+    def _do_return_conn(self, record):
+        try:
+            super()._do_return_conn(record)
+        finally:
+            self.metrics.update(self)
+
+    def recreate(self):
+        # Disposing of the engine replaces its pool with a new one
+        pool = super().recreate()
+        pool.metrics = self.metrics
+        return pool
+
+
+class InstrumentedQueuePool(_PoolMetricsMixin, QueuePool):
+    """
+    QueuePool that records how long each checkout waits for a connection, and its state.
+    """
+
+
+class InstrumentedAsyncQueuePool(_PoolMetricsMixin, AsyncAdaptedQueuePool):
+    """
+    AsyncAdaptedQueuePool that records how long each checkout waits for a connection, and its
+    state.
+    """
+
+
+def instrument_engine(engine: Engine, name: str = "primary") -> None:
+    """
+    Records the statements executed on an engine in the stats of the request and their time as
+    the "db" phase of the request, and exposes the state of its connection pool as metrics.
+
+    Args:
+        engine (Engine): The engine to instrument.
+        name (str): The value of the engine label of the pool metrics.
+    """
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(engine, "handle_error", _handle_error)
+
+    if isinstance(engine.pool, _PoolMetricsMixin):
+        engine.pool.metrics = _PoolMetrics(name)
@@ -0,0 +1,172 @@
+"""
+This module counts the SQL statements executed per request and enforces query budgets.
+
+The per-request counters live in a context variable and are fed by the cursor events attached
+in `app.database.instrumentation`. Statements are compared by their SQL text, which holds bound
+parameter placeholders rather than values, so the same statement run in a loop (an N+1 pattern)
+shows up as a duplicated shape.
+"""
+
+import functools
+import inspect
+from collections import Counter
+from contextvars import ContextVar, Token
+from typing import Callable
+
+
+class QueryStats:
+    """
+    Statements executed during a request.
+
+    Attributes:
+        count (int): The number of statements executed.
+        duration_ns (int): The total execution time, in nanoseconds.
+        statements (Counter): The number of executions of each statement shape.
+        parent (QueryStats, optional): The stats of the enclosing block, which count the
+        statements too.
+    """
+
+    __slots__ = ("count", "duration_ns", "statements", "parent")
+
+    def __init__(self, parent: "QueryStats | None" = None) -> None:
+        self.count = 0
+        self.duration_ns = 0
+        self.statements: Counter[str] = Counter()
+        self.parent = parent
+
+    def add(self, statement: str, duration_ns: int) -> None:
+        """
+        Records an executed statement.
+
+        Args:
+            statement (str): The SQL text of the statement.
+            duration_ns (int): The execution time, in nanoseconds.
+        """
+        self.count += 1
+        self.duration_ns += duration_ns
+        self.statements[statement] += 1
+
+    @property
+    def duplicates(self) -> int:
+        """
+        The number of executions of statement shapes that had already been executed.
+        """
+        return sum(count - 1 for count in self.statements.values() if count > 1)
+
+    def header_value(self) -> str:
+        """
+        Renders the stats as a debug header value.
+
+        Returns:
+            str: The count, total time in milliseconds and duplicates.
+        """
+        return (f"count={self.count}, time={self.duration_ns / 1e6:.3f}ms, "
+                f"duplicates={self.duplicates}")
+
+
+_query_stats: ContextVar[QueryStats | None] = ContextVar("query_stats", default=None)
+
+
+def start_query_stats() -> Token:
+    """
+    Starts counting the statements of the current request or block. The statements are still
+    counted by the enclosing block, if any.
+
+    Returns:
+        Token: The token to reset the context variable with.
+    """
+    return _query_stats.set(QueryStats(parent=_query_stats.get()))
+
+
+def stop_query_stats(token: Token) -> None:
+    """
+    Stops counting the statements of the current request.
+
+    Args:
+        token (Token): The token returned by `start_query_stats`.
+    """
+    _query_stats.reset(token)
+
+
+def record_query(statement: str, duration_ns: int) -> None:
+    """
+    Records a statement executed by the current request, if its statements are being counted,
+    in its stats and those of the enclosing blocks.
+
+    Args:
+        statement (str): The SQL text of the statement.
+        duration_ns (int): The execution time, in nanoseconds.
+    """
+    stats = _query_stats.get()
+    while stats is not None:
+        stats.add(statement, duration_ns)
+        stats = stats.parent
+
+
+class QueryBudgetExceeded(AssertionError):
+    """
+    Raised when a block executes more statements than its query budget allows.
+    """
+
+
+class query_budget:  # pylint: disable=invalid-name
+    """
+    Fails when the enclosed block or decorated function executes too many statements.
+
+    The statements are counted through the same context variable as the stats of the requests,
+    on every engine, synchronous or asynchronous. They are counted in the tasks and threadpool
+    calls started within the block, as those inherit its context, so it can wrap calls made
+    through an in-process async client, though not through the synchronous TestClient, which
+    runs the application in another thread:
+
+        async with query_budget(2):
+            await client.get("/v1/users/1")
+
+    As a decorator, it wraps both functions and coroutine functions.
+
+    Attributes:
+        max_queries (int): The maximum number of statements allowed.
+        stats (QueryStats): The statements executed within the budget.
+    """
+
+    def __init__(self, max_queries: int):
+        self.max_queries = max_queries
+        self.stats = QueryStats()
+        self._token: Token | None = None
+
+    def __enter__(self) -> "query_budget":
+        self._token = start_query_stats()
+        self.stats = self._token.var.get()
+        return self
+
+    def __exit__(self, *exc) -> bool:
+        stop_query_stats(self._token)
+        self._token = None
+        if exc[0] is None and self.stats.count > self.max_queries:
+            statements = "\n".join(f"  {count}x {statement}"
+                                   for statement, count in self.stats.statements.items())
+            raise QueryBudgetExceeded(
+                f"Executed {self.stats.count} statements, the budget is {self.max_queries}:\n"
+                f"{statements}")
+        return False
+
+    async def __aenter__(self) -> "query_budget":
+        return self.__enter__()
+
+    async def __aexit__(self, *exc) -> bool:
+        return self.__exit__(*exc)
+
+    def __call__(self, func: Callable) -> Callable:
+        # Each call gets its own budget, so that concurrent calls are counted apart
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                async with query_budget(self.max_queries):
+                    return await func(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with query_budget(self.max_queries):
+                return func(*args, **kwargs)
+        return wrapper
@@ -0,0 +1,75 @@
+"""
+This module routes the read-only statements of a session to the read replicas.
+
+Sessions read from the primary by default. A CRUD read wrapped in `read_from_replica` is sent to
+a replica instead, unless the session has been pinned to the primary: explicitly, by
+`pin_to_primary` in flows that read data they are about to write, or implicitly, by its first
+flush, so a session always reads its own writes.
+"""
+
+import random
+from contextlib import contextmanager
+from typing import Iterator
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+# Keys of Session.info
+_READ_FROM_REPLICA = "read_from_replica"
+_PINNED_TO_PRIMARY = "pinned_to_primary"
+
+
+class RoutingSession(Session):
+    """
+    Session sending its read-only statements to a random replica when allowed.
+
+    Attributes:
+        replicas (list[Engine]): The read replica engines; with none, every statement goes to
+        the primary bind of the session.
+    """
+
+    def __init__(self, *args, replicas: list[Engine] | None = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.replicas = replicas or []
+
+    def get_bind(self, mapper=None, clause=None, **kwargs):
+        if (self.replicas
+                and self.info.get(_READ_FROM_REPLICA)
+                and not self.info.get(_PINNED_TO_PRIMARY)
+                and not self._flushing
+                and getattr(clause, "is_select", False)):
+            return random.choice(self.replicas)
+        return super().get_bind(mapper, clause=clause, **kwargs)
+
+
+@event.listens_for(RoutingSession, "after_flush")
+def _pin_after_flush(session, flush_context):  # pylint: disable=unused-argument
+    session.info[_PINNED_TO_PRIMARY] = True
+
+
+def pin_to_primary(session: Session | AsyncSession) -> None:
+    """
+    Sends every following statement of the session to the primary.
+
+    Args:
+        session (Session | AsyncSession): The SQLAlchemy session.
+    """
+    session.info[_PINNED_TO_PRIMARY] = True
+
+
+@contextmanager
+def read_from_replica(session: Session | AsyncSession) -> Iterator[None]:
+    """
+    Allows the statements of the enclosed block to be sent to a replica.
+
+    Args:
+        session (Session | AsyncSession): The SQLAlchemy session.
+    """
+    previous = session.info.get(_READ_FROM_REPLICA, False)
+    session.info[_READ_FROM_REPLICA] = True
+    try:
+        yield
+    finally:
+        session.info[_READ_FROM_REPLICA] = previous
@@ -0,0 +1,25 @@
+"""
+This module provides the database session dependency selected by the `database_async` setting.
+"""
+
+from app.core.config import settings
+
+
+def _select_session_dependency():
+    """
+    Selects the session dependency of the configured data path.
+
+    Returns:
+        The asyncio `get_async_db` dependency if `database_async` is enabled, or the
+        synchronous `get_db` dependency otherwise.
+    """
+    if settings.database_async:
+        # Imported here so that asyncpg is only required when the async path is enabled
+        from app.database.async_database import get_async_db  # pylint: disable=import-outside-toplevel
+        return get_async_db
+
+    from app.database.database import get_db  # pylint: disable=import-outside-toplevel
+    return get_db
+
+
+get_session = _select_session_dependency()
@@ -4,17 +4,18 @@ This module provides a dependency function for getting a ProfilePictureService i
 
 from typing import Annotated
 from fastapi import Depends
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from app.database.database import get_db
+from app.dependency.db_dependency import get_session
 from app.service.pfp_service import ProfilePictureService
 
 
-def get_pfp_service(session: Annotated[Session, Depends(get_db)]):
+def get_pfp_service(session: Annotated[Session | AsyncSession, Depends(get_session)]):
     """
     Provides a ProfilePictureService instance with the provided session.
 
     Args:
-        session (Session): The SQLAlchemy session.
+        session (Session | AsyncSession): The SQLAlchemy session.
 
     Returns:
         ProfilePictureService: The ProfilePictureService instance
@@ -4,17 +4,18 @@ This module provides a dependency function for getting a UserService instance.
 
 from typing import Annotated
 from fastapi import Depends
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from app.database.database import get_db
+from app.dependency.db_dependency import get_session
 from app.service.user_service import UserService
 
 
-def get_user_service(session: Annotated[Session, Depends(get_db)]):
+def get_user_service(session: Annotated[Session | AsyncSession, Depends(get_session)]):
     """
     Provides a UserService instance with the provided session.
 
     Args:
-        session (Session): The SQLAlchemy session.
+        session (Session | AsyncSession): The SQLAlchemy session.
 
     Returns:
         UserService: The UserService instance
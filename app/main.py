@@ -2,14 +2,56 @@
 Main module for the FastAPI application.
 """
 
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from app.api.router import router
+from app.core.config import settings
+from app.core.image_processor import image_processor
+from app.core.metrics import mark_process_dead
+from app.core.pw_hasher import password_hasher
+from app.core.responses import TimedJSONResponse
+from app.middleware.body_size_limit_middleware import BodySizeLimitMiddleware
+from app.middleware.metrics_middleware import MetricsMiddleware
+from app.middleware.query_stats_middleware import QueryStatsMiddleware
 from app.middleware.process_time_header_middleware import ProcessTimeHeaderMiddleware
 from app.middleware.rate_limit_middleware import RateLimitMiddleware
+from app.middleware.server_timing_middleware import ServerTimingMiddleware
+from app.service.pfp_service import FILE_TOO_LARGE_DETAIL, MAX_BODY_SIZE
+
+
+@asynccontextmanager
+async def lifespan(_: FastAPI):
+    """
+    Releases the application's process pools and connections on shutdown.
+    """
+    yield
+
+    mark_process_dead()
+    password_hasher.shutdown()
+    image_processor.shutdown()
+
+    if settings.database_async:
+        # pylint: disable=import-outside-toplevel
+        from app.database.async_database import async_engine, async_replica_engines
+        for engine in [async_engine, *async_replica_engines]:
+            await engine.dispose()
+
+    if "redis" in (settings.rate_limit_backend, settings.cache_backend):
+        from app.core.redis import close_redis  # pylint: disable=import-outside-toplevel
+        await close_redis()
+
 
-app = FastAPI()
+app = FastAPI(lifespan=lifespan, default_response_class=TimedJSONResponse)
 
+# Oversized uploads are rejected as they stream in, before the multipart parser spools them
+app.add_middleware(BodySizeLimitMiddleware, max_body_size=MAX_BODY_SIZE,
+                   detail=FILE_TOO_LARGE_DETAIL)
+if settings.environment != "production":
+    app.add_middleware(QueryStatsMiddleware)
+app.add_middleware(ServerTimingMiddleware)
 app.add_middleware(ProcessTimeHeaderMiddleware)
 app.add_middleware(RateLimitMiddleware)
+app.add_middleware(MetricsMiddleware)
 
 app.include_router(router)
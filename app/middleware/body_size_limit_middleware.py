@@ -0,0 +1,66 @@
+"""
+Middleware module for rejecting request bodies larger than a limit.
+"""
+
+from fastapi import HTTPException, status
+from fastapi.responses import JSONResponse
+from starlette.datastructures import Headers
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+
+class BodySizeLimitMiddleware:
+    """
+    Middleware class that responds with 413 Request Entity Too Large to requests whose body
+    exceeds a limit, before the body is read in full.
+
+    A request announcing a larger Content-Length is rejected before any of its body is read.
+    Otherwise, including for chunked requests, the bytes are counted as the application
+    receives them, and the request is rejected as soon as the limit is crossed, so an oversized
+    upload is neither spooled by the multipart parser nor read to its end.
+
+    Attributes:
+        max_body_size (int): The maximum number of bytes of a request body.
+        detail (str): The detail of the 413 error.
+    """
+
+    def __init__(self, app: ASGIApp, max_body_size: int,
+                 detail: str = "Request body is too large.") -> None:
+        self.app = app
+        self.max_body_size = max_body_size
+        self.detail = detail
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        """
+        Rejects the request if its body exceeds the limit.
+
+        Args:
+            scope (Scope): The ASGI connection scope.
+            receive (Receive): The ASGI receive channel.
+            send (Send): The ASGI send channel.
+        """
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        content_length = Headers(scope=scope).get("content-length")
+        if content_length is not None and content_length.isdecimal() \
+                and int(content_length) > self.max_body_size:
+            response = JSONResponse({"detail": self.detail},
+                                    status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
+            await response(scope, receive, send)
+            return
+
+        received = 0
+
+        async def receive_with_limit() -> Message:
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.max_body_size:
+                    # Raised in the request handler reading the body, and answered there
+                    raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                                        detail=self.detail)
+            return message
+
+        await self.app(scope, receive_with_limit, send)
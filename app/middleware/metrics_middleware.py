@@ -0,0 +1,133 @@
+"""
+Middleware module for recording request metrics.
+"""
+
+import time
+from typing import Iterable
+
+from starlette.routing import BaseRoute
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.metrics import HTTP_REQUESTS, HTTP_REQUEST_DURATION, HTTP_REQUESTS_IN_FLIGHT
+
+UNMATCHED_ROUTE = "unmatched"
+# The method label of the requests whose method is not one of their route's
+OTHER_METHOD = "other"
+# The methods the requests matching no route are labelled with
+HTTP_METHODS = ("DELETE", "GET", "HEAD", "OPTIONS", "PATCH", "POST", "PUT")
+
+
+class _RouteMetrics:
+    """
+    The metric children of a route and method, bound once so that recording a request does not
+    look them up by their label values.
+
+    Attributes:
+        duration: The child of the latency histogram.
+        requests (dict): The children of the request counter, by status code.
+    """
+
+    __slots__ = ("method", "route", "duration", "requests")
+
+    def __init__(self, method: str, route: str):
+        self.method = method
+        self.route = route
+        self.duration = HTTP_REQUEST_DURATION.labels(method, route)
+        self.requests = {}
+
+    def requests_with_status(self, status_code: int):
+        """
+        Returns the request counter of a status code, binding it on first use.
+
+        Args:
+            status_code (int): The status code of the response.
+
+        Returns:
+            The child of the request counter.
+        """
+        child = self.requests.get(status_code)
+        if child is None:
+            child = HTTP_REQUESTS.labels(self.method, self.route, str(status_code))
+            self.requests[status_code] = child
+        return child
+
+
+class MetricsMiddleware:
+    """
+    Middleware class that records the count, latency and concurrency of HTTP requests.
+
+    Requests are labelled by the template of the route that handled them, such as
+    '/v1/users/{user_id}', so the number of series does not grow with the number of paths, and
+    by their method if their route has it, or "other", as clients can send any method. The
+    metrics of each route and method are bound as the application starts up.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+        # Keyed by route template, then by method
+        self._routes: dict[str, dict[str, _RouteMetrics]] = {}
+        self._bind(UNMATCHED_ROUTE, HTTP_METHODS)
+
+    def bind_routes(self, routes: list[BaseRoute]) -> None:
+        """
+        Binds the metrics of the methods of every route.
+
+        Args:
+            routes (list[BaseRoute]): The routes of the application.
+        """
+        for route in routes:
+            self._bind(route.path, getattr(route, "methods", None) or ())
+
+    def _bind(self, route_template: str, methods: Iterable[str]) -> dict[str, _RouteMetrics]:
+        route_methods = self._routes.get(route_template)
+        if route_methods is None:
+            route_methods = self._routes[route_template] = {
+                OTHER_METHOD: _RouteMetrics(OTHER_METHOD, route_template)}
+        for method in methods:
+            if method not in route_methods:
+                route_methods[method] = _RouteMetrics(method, route_template)
+        return route_methods
+
+    def _route_metrics(self, route: BaseRoute | None, method: str) -> _RouteMetrics:
+        if route is None:
+            route_methods = self._routes[UNMATCHED_ROUTE]
+        else:
+            route_methods = self._routes.get(route.path)
+            if route_methods is None:
+                # A route the application did not have at startup
+                route_methods = self._bind(route.path, getattr(route, "methods", None) or ())
+        return route_methods.get(method) or route_methods[OTHER_METHOD]
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        """
+        Records the metrics of a request.
+
+        Args:
+            scope (Scope): The ASGI connection scope.
+            receive (Receive): The ASGI receive channel.
+            send (Send): The ASGI send channel.
+        """
+        if scope["type"] != "http":
+            if scope["type"] == "lifespan" and "app" in scope:
+                self.bind_routes(scope["app"].routes)
+            await self.app(scope, receive, send)
+            return
+
+        start_time = time.perf_counter_ns()
+        status_code = 500
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        HTTP_REQUESTS_IN_FLIGHT.inc()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            HTTP_REQUESTS_IN_FLIGHT.dec()
+            # the router stores the matched route in the scope
+            route_metrics = self._route_metrics(scope.get("route"), scope["method"])
+            route_metrics.requests_with_status(status_code).inc()
+            route_metrics.duration.observe((time.perf_counter_ns() - start_time) / 1e9)
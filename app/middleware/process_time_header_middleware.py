@@ -4,34 +4,43 @@ Middleware module for adding process time header to HTTP responses.
 
 import time
 
-from fastapi import Request, Response, FastAPI
-from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 
 
-class ProcessTimeHeaderMiddleware(BaseHTTPMiddleware):
+class ProcessTimeHeaderMiddleware:
     """
     Middleware class that adds a 'X-Process-Time' header to HTTP responses.
 
     This middleware measures the time taken to process each request and includes
     this information in the response headers.
+
+    It is a pure ASGI middleware: the header is added as the response starts, so the
+    response body is streamed through untouched.
     """
 
-    def __init__(self, app: FastAPI) -> None:
-        super().__init__(app)
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
 
-    async def dispatch(self, request: Request, call_next) -> Response:
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
         """
         Add 'X-Process-Time' header to the response.
 
         Args:
-            request (Request): The incoming HTTP request.
-            call_next (function): The next callable in the request/response cycle.
-
-        Returns:
-            Response: The HTTP response with the added 'X-Process-Time' header.
+            scope (Scope): The ASGI connection scope.
+            receive (Receive): The ASGI receive channel.
+            send (Send): The ASGI send channel.
         """
-        start_time = time.time()
-        response = await call_next(request)
-        process_time = time.time() - start_time
-        response.headers["X-Process-Time"] = str(process_time)
-        return response
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start_time = time.perf_counter_ns()
+
+        async def send_with_process_time(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                process_time = (time.perf_counter_ns() - start_time) / 1e9
+                MutableHeaders(scope=message)["X-Process-Time"] = str(process_time)
+            await send(message)
+
+        await self.app(scope, receive, send_with_process_time)
@@ -0,0 +1,58 @@
+"""
+Middleware module for reporting the SQL statements executed by each request.
+"""
+
+import logging
+
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.database.query_stats import start_query_stats, stop_query_stats
+
+logger = logging.getLogger(__name__)
+
+
+class QueryStatsMiddleware:
+    """
+    Middleware class that adds a 'X-DB-Queries' debug header to HTTP responses.
+
+    The header reports the number of statements executed by the request, their total time and
+    how many of them repeated an already executed statement shape. Requests with duplicated
+    statements, a likely N+1 pattern, are also logged. It is meant for non-production
+    environments only.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        """
+        Counts the statements of the request and reports them in the response.
+
+        Args:
+            scope (Scope): The ASGI connection scope.
+            receive (Receive): The ASGI receive channel.
+            send (Send): The ASGI send channel.
+        """
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        token = start_query_stats()
+        stats = token.var.get()
+
+        async def send_with_query_stats(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                MutableHeaders(scope=message)["X-DB-Queries"] = stats.header_value()
+                if stats.duplicates:
+                    logger.warning("%s %s executed duplicated statements: %s",
+                                   scope["method"], scope["path"],
+                                   {statement: count
+                                    for statement, count in stats.statements.items()
+                                    if count > 1})
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_query_stats)
+        finally:
+            stop_query_stats(token)
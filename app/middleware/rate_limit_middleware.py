@@ -3,57 +3,105 @@ This module defines a middleware class that enforces rate limiting on HTTP reque
 based on the client's IP address and request path.
 """
 
-import time
-from collections import defaultdict
-from typing import Dict, Tuple
+from fastapi import Response, status
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 
-from fastapi import Request, Response, status
-from starlette.middleware.base import BaseHTTPMiddleware
+from app.core.config import settings
+from app.core.metrics import RATE_LIMIT_REJECTIONS
+from app.core.rate_limiter import RateLimiter, TokenBucketLimiter, rate_limit_headers
 
 
-class RateLimitMiddleware(BaseHTTPMiddleware):
+def build_rate_limiter() -> RateLimiter:
+    """
+    Builds the rate limiter selected by the `rate_limit_backend` setting.
+
+    Returns:
+        RateLimiter: The in-process limiter, or the Redis limiter shared by all workers.
+    """
+    if settings.rate_limit_backend == "redis":
+        # Imported here so that Redis is only required when the backend is enabled
+        from app.core.redis import get_redis  # pylint: disable=import-outside-toplevel
+        from app.core.redis_rate_limiter import (  # pylint: disable=import-outside-toplevel
+            RedisTokenBucketLimiter)
+
+        return RedisTokenBucketLimiter(
+            redis=get_redis(),
+            rate=settings.rate_limit_rate,
+            burst=settings.rate_limit_burst,
+            lease_size=settings.rate_limit_lease_size,
+            max_keys=settings.rate_limit_max_keys,
+            sweep_interval=settings.rate_limit_sweep_interval,
+            cooldown=settings.rate_limit_redis_cooldown
+        )
+
+    return TokenBucketLimiter(
+        rate=settings.rate_limit_rate,
+        burst=settings.rate_limit_burst,
+        max_keys=settings.rate_limit_max_keys,
+        sweep_interval=settings.rate_limit_sweep_interval
+    )
+
+
+class RateLimitMiddleware:
     """
     Middleware class that enforces rate limiting on HTTP requests.
 
     This middleware restricts the number of requests that a client can make
     in a given time period based on the client's IP address and request path.
+
+    It is a pure ASGI middleware: the rate limit headers are added as the response starts, so
+    the response body is streamed through untouched.
+
+    Attributes:
+        limiter (RateLimiter): The limiter holding a token bucket per client and path.
     """
 
-    def __init__(self, app):
-        super().__init__(app)
-        self.rate_limit_records: Dict[Tuple[str,
-                                            str], float] = defaultdict(float)
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+        self.limiter = build_rate_limiter()
 
-    async def dispatch(self, request: Request, call_next) -> Response:
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
         """
         Processes an incoming request and applies rate limiting.
 
         Args:
-            request (Request): The incoming HTTP request.
-            call_next (function): The next callable in the request/response cycle.
+            scope (Scope): The ASGI connection scope.
+            receive (Receive): The ASGI receive channel.
+            send (Send): The ASGI send channel.
 
-        Returns:
-            Response: The HTTP response, either allowing the request to proceed or
-                      returning a 429 Too Many Requests status if the rate limit is exceeded.
+        Either lets the request proceed or responds with a 429 Too Many Requests status if the
+        rate limit is exceeded.
 
-        The rate limit is set to 1 request per second for each client IP and request path.
+        Each client IP and request path gets a token bucket of `rate_limit_burst` requests that
+        refills at `rate_limit_rate` requests per second. The RateLimit-* headers are added to
+        every response.
         """
-        client_ip = request.client.host
-        path = request.url.path
-        current_time = time.time()
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
 
-        key = (client_ip, path)
+        client = scope.get("client")
+        client_ip = client[0] if client else ""
+        key = f"{client_ip}:{scope['path']}"
 
-        # 1 request per second limit
-        if current_time - self.rate_limit_records[key] < 1:
-            return Response(
+        result = await self.limiter.hit(key)
+        headers = rate_limit_headers(result)
+
+        if not result.allowed:
+            RATE_LIMIT_REJECTIONS.inc()
+            response = Response(
                 status_code=status.HTTP_429_TOO_MANY_REQUESTS,
                 media_type="application/json",
-                content="{\"detail\": \"Rate limit exceeded. Try again in a second.\"}"
+                content="{\"detail\": \"Rate limit exceeded. Try again later.\"}",
+                headers=headers
             )
+            await response(scope, receive, send)
+            return
 
-        self.rate_limit_records[key] = current_time
-
-        response = await call_next(request)
+        async def send_with_headers(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                MutableHeaders(scope=message).update(headers)
+            await send(message)
 
-        return response
+        await self.app(scope, receive, send_with_headers)
@@ -0,0 +1,56 @@
+"""
+Middleware module for adding a Server-Timing header to HTTP responses.
+"""
+
+import time
+
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import settings
+from app.core.timing import start_request_timings, stop_request_timings
+
+
+class ServerTimingMiddleware:
+    """
+    Middleware class that adds a 'Server-Timing' header to HTTP responses.
+
+    The header breaks the processing time down into the phases recorded during the request,
+    such as database, password hashing, JWT, file I/O and serialization time, plus the total.
+    Only a `server_timing_sample_rate` fraction of the requests is timed.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        """
+        Collects the phase timings of the request and adds them to the response.
+
+        Args:
+            scope (Scope): The ASGI connection scope.
+            receive (Receive): The ASGI receive channel.
+            send (Send): The ASGI send channel.
+        """
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        token = start_request_timings(settings.server_timing_sample_rate)
+        if token is None:
+            await self.app(scope, receive, send)
+            return
+
+        timings = token.var.get()
+        start_time = time.perf_counter_ns()
+
+        async def send_with_server_timing(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                timings.add("total", time.perf_counter_ns() - start_time)
+                MutableHeaders(scope=message).append("Server-Timing", timings.server_timing())
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_server_timing)
+        finally:
+            stop_request_timings(token)
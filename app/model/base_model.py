@@ -3,6 +3,7 @@ This module defines a base class with common fields for the SQLAlchemy models.
 """
 
 from sqlalchemy import Column, DateTime
+from sqlalchemy.sql import func
 from sqlalchemy.sql.expression import text
 from app.database.database import Base
 
@@ -13,11 +14,15 @@ class BaseModel(Base):
 
     Attributes:
         created_at (DateTime): The timestamp when the record was created; defaults to current time.
-        updated_at (DateTime): The timestamp when the record was last updated.
+        updated_at (DateTime): The timestamp when the record was last updated; set to the current
+        time by every update.
     """
 
     __abstract__ = True
+    # Fetch server-generated values with INSERT/UPDATE ... RETURNING instead of a later SELECT
+    __mapper_args__ = {"eager_defaults": True}
 
     created_at = Column(DateTime(timezone=True),
                         server_default=text('now()'), nullable=False)
-    updated_at = Column(DateTime(timezone=True), nullable=True)
+    updated_at = Column(DateTime(timezone=True), nullable=True,
+                        onupdate=func.now())  # pylint: disable=not-callable
@@ -16,6 +16,8 @@ class DeletedModel(Base):
         is_deleted (Boolean): A flag indicating whether the record is deleted, defaults to False.
     """
     __abstract__ = True
+    # Fetch server-generated values with INSERT/UPDATE ... RETURNING instead of a later SELECT
+    __mapper_args__ = {"eager_defaults": True}
 
     deleted_at = Column(DateTime(timezone=True), nullable=True)
     is_deleted = Column(Boolean, server_default='FALSE', nullable=False)
@@ -0,0 +1,24 @@
+"""
+This module defines the SQLAlchemy model for the MediaBlob table.
+"""
+from sqlalchemy import Column, String, Integer
+from .base_model import BaseModel
+
+
+class MediaBlob(BaseModel):
+    """
+    Represents a stored image, shared by every profile picture with the same content.
+
+    Attributes:
+        sha256 (String): The SHA-256 digest of the image, in hexadecimal; the primary key.
+        path (String): The path to the image.
+        ref_count (Integer): The number of current profile pictures using the image; the
+        files of the image are removed once it drops to zero.
+        created_at (DateTime): The timestamp when the image was first stored.
+        updated_at (DateTime): The timestamp when the reference count last changed.
+    """
+    __tablename__ = 'media_blob'
+
+    sha256 = Column(String(64), primary_key=True, nullable=False)
+    path = Column(String(255), nullable=False)
+    ref_count = Column(Integer, nullable=False)
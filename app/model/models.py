@@ -6,4 +6,6 @@ It ensures that Alembic can detect all models for generating migrations.
 
 from app.database.database import Base
 from .user import User
+from .media_blob import MediaBlob
 from .pfp import ProfilePicture
+from .pfp_variant import ProfilePictureVariant
@@ -2,7 +2,8 @@
 This module defines the SQLAlchemy model for the User table.
 """
 from sqlalchemy.dialects.postgresql import UUID
-from sqlalchemy import Column, String, DateTime, ForeignKey, BigInteger
+from sqlalchemy import Column, String, DateTime, ForeignKey, BigInteger, Index
+from sqlalchemy.sql import func
 from .deleted_model import DeletedModel
 
 
@@ -13,8 +14,12 @@ class ProfilePicture(DeletedModel):
     Attributes:
         id (UUID): The primary key of the profile picture.
         user_id (BigInteger): The foreign key of the user.
-        path (String): The path to the profile picture.
-        uploaded_at (DateTime): The date and time the profile picture was uploaded.
+        path (String): The path to the profile picture, shared by the profile pictures with the
+        same content.
+        blob_sha256 (String): The foreign key of the stored image; None for the profile pictures
+        stored before images were deduplicated, which own their files.
+        uploaded_at (DateTime): The date and time the profile picture was uploaded; defaults to
+        the current time.
         deleted_at (DateTime): The timestamp when the record was deleted.
         is_deleted (Boolean): A flag indicating whether the record is deleted, defaults to False.
     """
@@ -22,5 +27,19 @@ class ProfilePicture(DeletedModel):
 
     id = Column(UUID(as_uuid=True), primary_key=True, nullable=False)
     user_id = Column(BigInteger, ForeignKey('user.id'), nullable=False)
-    path = Column(String(255), nullable=False, unique=True)
-    uploaded_at = Column(DateTime(timezone=True), nullable=True)
+    path = Column(String(255), nullable=False)
+    blob_sha256 = Column(String(64), ForeignKey('media_blob.sha256', ondelete='SET NULL'),
+                         nullable=True)
+    uploaded_at = Column(DateTime(timezone=True), nullable=True,
+                         default=func.now())  # pylint: disable=not-callable
+
+
+# A user has at most one current profile picture; also backs the lookups of that picture
+Index('profile_picture_user_id_current_index', ProfilePicture.user_id, unique=True,
+      postgresql_where=ProfilePicture.is_deleted.is_(False))
+# Backs the foreign key checks when the last reference to a stored image is released
+Index('profile_picture_blob_sha256_index', ProfilePicture.blob_sha256)
+# Backs the last deletion time of the pictures of a user, and the foreign key checks when a user
+# is deleted
+Index('profile_picture_user_id_deleted_at_index', ProfilePicture.user_id,
+      ProfilePicture.deleted_at)
@@ -0,0 +1,35 @@
+"""
+This module defines the SQLAlchemy model for the ProfilePictureVariant table.
+"""
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy import Column, String, ForeignKey, BigInteger, Integer, UniqueConstraint
+from .base_model import BaseModel
+
+
+class ProfilePictureVariant(BaseModel):
+    """
+    Represents a resized copy of a profile picture, in one of the sizes and formats it is
+    served in.
+
+    Attributes:
+        id (BigInteger): The primary key of the variant.
+        profile_picture_id (UUID): The foreign key of the profile picture.
+        size (Integer): The width and height of the variant, in pixels.
+        media_type (String): The media type the variant is encoded in.
+        path (String): The path to the variant, shared by the profile pictures with the same
+        content.
+        created_at (DateTime): The timestamp when the variant was created.
+        updated_at (DateTime): The timestamp when the variant was last updated.
+    """
+    __tablename__ = 'profile_picture_variant'
+    # A profile picture has one variant per size and format; also backs the lookups of a variant
+    __table_args__ = (UniqueConstraint('profile_picture_id', 'size', 'media_type',
+                                       name='profile_picture_variant_key'),)
+
+    id = Column(BigInteger, primary_key=True, nullable=False)
+    profile_picture_id = Column(UUID(as_uuid=True),
+                                ForeignKey('profile_picture.id', ondelete='CASCADE'),
+                                nullable=False)
+    size = Column(Integer, nullable=False)
+    media_type = Column(String(50), nullable=False)
+    path = Column(String(255), nullable=False)
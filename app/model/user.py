@@ -2,7 +2,8 @@
 This module defines the SQLAlchemy model for the User table.
 """
 
-from sqlalchemy import Column, BigInteger, String, Index
+from sqlalchemy import Column, BigInteger, String, Index, func
+from sqlalchemy.orm import relationship
 from .base_model import BaseModel
 
 
@@ -12,20 +13,34 @@ class User(BaseModel):
 
     Attributes:
         id (BigInteger): The primary key of the user.
-        email (String): The email of the user, must be unique.
-        username (String): The username of the user, must be unique.
+        email (String): The email of the user, stored in lower case; must be unique, ignoring case.
+        username (String): The username of the user, must be unique, ignoring case.
         password (String): The hashed password of the user.
         created_at (DateTime): The timestamp when the record was created; defaults to current time.
         updated_at (DateTime): The timestamp when the record was last updated.
+        profile_picture (ProfilePicture): The current (not deleted) profile picture of the user;
+        only loaded when requested with `joinedload`, None otherwise.
     """
 
     __tablename__ = 'user'
 
     id = Column(BigInteger, primary_key=True, nullable=False)
-    email = Column(String(255), nullable=False, unique=True)
-    username = Column(String(255), nullable=False, unique=True)
+    email = Column(String(255), nullable=False)
+    username = Column(String(255), nullable=False)
     password = Column(String(60), nullable=False)
 
-
-Index('user_email_index', User.email)
-Index('user_username_index', User.username)
+    # Read-only, and never lazy loaded: lazy loads would be extra round trips, and they are not
+    # possible in an asyncio session
+    profile_picture = relationship(
+        "ProfilePicture",
+        primaryjoin="and_(User.id == foreign(ProfilePicture.user_id), "
+                    "ProfilePicture.is_deleted.is_(False))",
+        uselist=False,
+        viewonly=True,
+        lazy="noload"
+    )
+
+
+# Enforce case-insensitive uniqueness and back the case-insensitive lookups
+Index('user_email_lower_index', func.lower(User.email), unique=True)
+Index('user_username_lower_index', func.lower(User.username), unique=True)
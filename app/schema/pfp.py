@@ -5,7 +5,8 @@ This module contains Pydantic models related to profile picture management.
 """
 
 from datetime import datetime
-from pydantic import BaseModel, UUID4
+from typing import Literal
+from pydantic import BaseModel, Field, UUID4, computed_field
 
 
 class ProfilePictureBase(BaseModel):
@@ -32,21 +33,89 @@ class ProfilePictureCreate(ProfilePictureBase):
         id (UUID4): The unique identifier for the profile picture.
         user_id (int): The ID of the user associated with the profile picture.
         path (str): The file path of the profile picture.
+        blob_sha256 (str): The SHA-256 digest of the stored image.
     """
+    blob_sha256: str
 
 
-class ProfilePicturePublic(ProfilePictureBase):
+class MediaBlobCreate(BaseModel):
+    """
+    Schema for storing an image, or taking one more reference to it if already stored.
+
+    Attributes:
+        sha256 (str): The SHA-256 digest of the image, in hexadecimal.
+        path (str): The file path of the image.
+    """
+    sha256: str
+    path: str
+
+
+class ProfilePictureVariantCreate(BaseModel):
+    """
+    Schema for recording a variant of a profile picture.
+
+    Attributes:
+        profile_picture_id (UUID4): The unique identifier of the profile picture.
+        size (int): The width and height of the variant, in pixels.
+        media_type (str): The media type the variant is encoded in.
+        path (str): The file path of the variant.
+    """
+    profile_picture_id: UUID4
+    size: int
+    media_type: str
+    path: str
+
+
+class ProfilePictureUploadCreate(BaseModel):
+    """
+    Schema for requesting a direct upload of a profile picture to the storage.
+
+    Attributes:
+        media_type (str): The media type of the picture.
+        size (int): The size of the picture, in bytes.
+    """
+    media_type: Literal["image/jpeg", "image/png", "image/gif"]
+    size: int = Field(gt=0)
+
+
+class ProfilePictureUpload(BaseModel):
+    """
+    Schema of a direct upload of a profile picture to the storage.
+
+    Attributes:
+        id (UUID4): The unique identifier of the upload, to confirm it with once done.
+        url (str): The URL to PUT the picture to.
+        headers (dict[str, str]): The headers the PUT request must carry.
+        expires_at (datetime): When the URL stops being accepted.
+    """
+    id: UUID4
+    url: str
+    headers: dict[str, str]
+    expires_at: datetime
+
+
+class ProfilePicturePublic(BaseModel):
     """
     Public schema for ProfilePicture.
 
     Attributes:
         id (UUID4): The unique identifier for the profile picture.
         user_id (int): The ID of the user associated with the profile picture.
-        path (str): The file path of the profile picture.
         uploaded_at (datetime): The timestamp when the profile picture was uploaded.
+        url (str): The URL the profile picture is served at.
     """
+    id: UUID4
+    user_id: int
     uploaded_at: datetime
 
+    @computed_field
+    @property
+    def url(self) -> str:
+        """
+        The URL the profile picture is served at, rather than its path on disk.
+        """
+        return f"/v1/profile-pictures/{self.id}"
+
     model_config = {
         "from_attributes": "true"
     }
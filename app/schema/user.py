@@ -28,7 +28,7 @@ class UserCreate(UserBase):
     Schema for creating a new user.
 
     Attributes:
-        email (EmailStr): Email address of the user.
+        email (EmailStr): Email address of the user, normalized to lower case.
         username (str): Username of the user.
         password (str): Password of the user. The password must be between 8 and 30 characters long.
         It must contain at least one uppercase letter, one lowercase letter, one digit, and one 
@@ -36,6 +36,20 @@ class UserCreate(UserBase):
     """
     password: str = Field(min_length=8, max_length=30)
 
+    @field_validator("email")
+    @classmethod
+    def normalize_email(cls, value):
+        """
+        Normalize the email to lower case, as emails are matched ignoring case.
+
+        Args:
+            value (str): The email to be normalized.
+
+        Returns:
+            str: The email in lower case.
+        """
+        return value.lower()
+
     @field_validator("password")
     @classmethod
     def validate_password(cls, value):
@@ -6,10 +6,11 @@ by verifying their credentials and generating JWT tokens.
 """
 
 from fastapi import HTTPException, status
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from app.crud.crud_user import CRUDUser
+from app.crud.crud_factory import get_user_crud
 from app.auth.jwt import create_access_token
-from app.core.pw_utils import verify_password
+from app.core.pw_hasher import password_hasher
 from app.schema.token import TokenData, Token
 from app.schema.user import UserPayload
 
@@ -21,15 +22,17 @@ class AuthService:
     This class provides methods to authenticate users and generate access tokens.
 
     Attributes:
-        crud (CRUDUser): Instance of CRUD operations for User entities.
+        crud (AsyncCRUDUser | ThreadedCRUD): Instance of awaitable CRUD operations for User
+        entities.
     """
 
-    def __init__(self, session: Session):
-        self.crud = CRUDUser(session)
+    def __init__(self, session: Session | AsyncSession):
+        self.crud = get_user_crud(session)
 
-    def authenticate_user(self, identifier: str, password: str) -> Token:
+    async def authenticate_user(self, identifier: str, password: str) -> Token:
         """
-        Authenticates a user by verifying the identifier (username or email) and password.
+        Authenticates a user by verifying the identifier (username or email, ignoring case) and
+        password.
 
         Args:
             identifier (str): The username or email of the user.
@@ -41,16 +44,13 @@ class AuthService:
         Raises:
             HTTPException: If the user is not found or the password is incorrect.
         """
-        user = self.crud.get_by_username(identifier)
-
-        if user is None:
-            user = self.crud.get_by_email(identifier)
+        user = await self.crud.get_by_identifier(identifier)
 
         if user is None:
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid credentials")
 
-        if not verify_password(password, user.password):
+        if not await password_hasher.verify_password(password, user.password):
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid password")
 
@@ -3,21 +3,250 @@ This module contains the ProfilePictureService class, which provides methods
 for managing profile picture uploads, validations, and storage.
 """
 
-from pathlib import Path
+import asyncio
+import hashlib
+import mimetypes
+import tempfile
+from pathlib import Path, PurePosixPath
+from typing import BinaryIO, Iterable
 from uuid import uuid4, UUID
 
 from fastapi import HTTPException, UploadFile, status
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
 
-from app.crud.crud_pfp import CRUDPfp
-from app.schema.pfp import ProfilePictureCreate, ProfilePicturePublic
+from app.core.image_processor import image_processor
+from app.core.image_utils import detect_image_type
+from app.core.storage import storage
+from app.core.timing import timed
+from app.database.errors import constraint_name
+from app.crud.crud_factory import get_pfp_crud
+from app.model.pfp import ProfilePicture
+from app.model.pfp_variant import ProfilePictureVariant
+from app.schema.pfp import (MediaBlobCreate, ProfilePictureCreate, ProfilePicturePublic,
+                            ProfilePictureUpload, ProfilePictureUploadCreate,
+                            ProfilePictureVariantCreate)
+from app.service.user_service import invalidate_user_cache
 
-IMAGE_FORMATS = {"image/jpeg", "image/png", "image/gif"}
+# The accepted image types, and the extension their files are stored with
+IMAGE_FORMATS = {"image/jpeg": ".jpg", "image/png": ".png", "image/gif": ".gif"}
 MEGABYTE = 1024 * 1024
 MAX_FILE_SIZE = 2 * MEGABYTE
-UPLOAD_DIR = Path("./media/pfp")
-# Ensure the upload directory exists
-UPLOAD_DIR.mkdir(parents=True, exist_ok=True)
+# The largest request body accepted: an upload of MAX_FILE_SIZE and its multipart framing
+MAX_BODY_SIZE = MAX_FILE_SIZE + 64 * 1024
+FILE_TOO_LARGE_DETAIL = "File is too large. The maximum file size allowed is 2MB."
+CHUNK_SIZE = 64 * 1024
+# The prefix of the storage keys of the profile pictures
+KEY_PREFIX = PurePosixPath("media/pfp")
+# The prefix of the storage keys of the direct uploads, until they are confirmed
+UPLOAD_KEY_PREFIX = PurePosixPath("uploads")
+# The unique index allowing a user a single current profile picture
+CURRENT_PICTURE_INDEX = "profile_picture_user_id_current_index"
+
+
+def media_type_of(key: str) -> str:
+    """
+    Gives the media type a stored profile picture is served with.
+
+    Args:
+        key (str): The storage key of the profile picture.
+
+    Returns:
+        str: The image type matching the file extension, or "application/octet-stream" for an
+        extension that is not one of the accepted image formats, which browsers will not render.
+    """
+    media_type = mimetypes.guess_type(key)[0]
+    return media_type if media_type in IMAGE_FORMATS else "application/octet-stream"
+
+
+def _unsupported_media_type() -> HTTPException:
+    """
+    Builds the error for an upload that is not an accepted image.
+
+    Returns:
+        HTTPException: The 415 error.
+    """
+    return HTTPException(status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+                         detail="Unsupported media type. Only JPEG, PNG, and GIF images are supported.")
+
+
+def _file_too_large() -> HTTPException:
+    """
+    Builds the error for an upload larger than MAX_FILE_SIZE.
+
+    Returns:
+        HTTPException: The 413 error.
+    """
+    return HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                         detail=FILE_TOO_LARGE_DETAIL)
+
+
+def _changed_concurrently() -> HTTPException:
+    """
+    Builds the error for an upload losing the race to become the current profile picture to
+    another upload of the same user.
+
+    Returns:
+        HTTPException: The 409 error.
+    """
+    return HTTPException(status_code=status.HTTP_409_CONFLICT,
+                         detail="The profile picture was changed concurrently.")
+
+
+def _write_upload(source: BinaryIO) -> tuple[Path, str, str]:
+    """
+    Copies an upload to a temporary file in fixed-size chunks, so the memory used does not
+    depend on the size of the file, hashing the chunks as they are copied. Blocking; run it in
+    the threadpool.
+
+    Args:
+        source (BinaryIO): The uploaded file, spooled by the multipart parser or streamed from
+        the storage, positioned at its start.
+
+    Returns:
+        tuple[Path, str, str]: The path of the temporary file, the media type of the image and
+        the SHA-256 digest of its content, in hexadecimal.
+
+    Raises:
+        HTTPException: If the file does not start like an accepted image type, or as soon as
+        the size of the upload exceeds MAX_FILE_SIZE; the content type and size announced by
+        the client are not trusted.
+    """
+    size = 0
+    media_type = None
+    digest = hashlib.sha256()
+    temp = tempfile.NamedTemporaryFile(  # pylint: disable=consider-using-with
+        prefix=".upload-", delete=False)
+    try:
+        with temp:
+            while chunk := source.read(CHUNK_SIZE):
+                if media_type is None:
+                    media_type = detect_image_type(chunk)
+                    if media_type is None:
+                        raise _unsupported_media_type()
+                size += len(chunk)
+                if size > MAX_FILE_SIZE:
+                    raise _file_too_large()
+                digest.update(chunk)
+                temp.write(chunk)
+        if media_type is None:
+            raise _unsupported_media_type()
+    except BaseException:
+        Path(temp.name).unlink(missing_ok=True)
+        raise
+    return Path(temp.name), media_type, digest.hexdigest()
+
+
+def sharded_key(name: str) -> str:
+    """
+    Gives the storage key of a profile picture file in the fan-out layout, where the files are
+    spread over directories named after the first two pairs of characters of their name, e.g.
+    "media/pfp/ab/cd/abcd...png", so that no directory holds more than a fraction of them.
+
+    The names are hexadecimal digests or UUIDs, so they spread evenly over 65536 directories;
+    the variants of a picture share its directory, as their names start with its own.
+
+    Args:
+        name (str): The file name.
+
+    Returns:
+        str: The key of the file.
+    """
+    return str(KEY_PREFIX / name[:2] / name[2:4] / name)
+
+
+def _blob_key(digest: str, media_type: str, pfp_id: UUID) -> str:
+    """
+    Gives the storage key of an image, named after the digest of its content and the profile
+    picture storing it first, so that an image stored again once its last reference is dropped
+    never reuses the keys of the files still being deleted.
+
+    Args:
+        digest (str): The SHA-256 digest of the image, in hexadecimal.
+        media_type (str): The media type of the image.
+        pfp_id (UUID): The ID of the profile picture storing the image.
+
+    Returns:
+        str: The key of the image.
+    """
+    return sharded_key(f"{digest}-{pfp_id.hex}{IMAGE_FORMATS[media_type]}")
+
+
+def _variant_key(blob_key: str, size: int, extension: str) -> str:
+    """
+    Gives the storage key of a variant of a stored image, next to the image, as make_variants
+    names it.
+
+    Args:
+        blob_key (str): The key of the image.
+        size (int): The size of the variant.
+        extension (str): The file extension of the format of the variant.
+
+    Returns:
+        str: The key of the variant.
+    """
+    key = PurePosixPath(blob_key)
+    return str(key.with_name(f"{key.stem}_{size}{extension}"))
+
+
+def _upload_key(user_id: int, upload_id: UUID) -> str:
+    """
+    Gives the storage key a direct upload is made to; it is scoped to the user, so that only
+    they can confirm it.
+
+    Args:
+        user_id (int): The ID of the user uploading the profile picture.
+        upload_id (UUID): The ID of the upload.
+
+    Returns:
+        str: The key of the upload.
+    """
+    return str(UPLOAD_KEY_PREFIX / str(user_id) / str(upload_id))
+
+
+def _remove_files(paths: Iterable[Path]) -> None:
+    """
+    Removes local files, ignoring those already gone.
+
+    Args:
+        paths (Iterable[Path]): The paths of the files.
+    """
+    with timed("file"):
+        for path in paths:
+            path.unlink(missing_ok=True)
+
+
+async def _delete_objects(keys: list[str]) -> None:
+    """
+    Deletes stored objects, ignoring those already gone.
+
+    Args:
+        keys (list[str]): The keys of the objects.
+    """
+    if keys:
+        with timed("file"):
+            await storage.delete(keys)
+
+
+async def _save_objects(key: str, source: Path, media_type: str,
+                        variants: list[tuple[int, str, Path]]) -> None:
+    """
+    Stores the files of an image and its variants, all at once.
+
+    Args:
+        key (str): The key of the image.
+        source (Path): The file of the image, moved into the storage.
+        media_type (str): The media type of the image.
+        variants (list[tuple[int, str, Path]]): The size, media type and file of each variant,
+        moved into the storage.
+    """
+    with timed("file"):
+        await asyncio.gather(
+            storage.save(key, source, media_type),
+            *(storage.save(_variant_key(key, size, path.suffix), path, variant_type)
+              for size, variant_type, path in variants))
 
 
 class ProfilePictureService:
@@ -25,16 +254,20 @@ class ProfilePictureService:
     Service for managing profile pictures.
 
     Attributes:
-        crud (CRUDPfp): The CRUD utility for interacting with the profile picture table.
+        crud (AsyncCRUDPfp | ThreadedCRUD): The awaitable CRUD utility for interacting with the
+        profile picture table.
     """
 
-    def __init__(self, session: Session):
-        self.crud = CRUDPfp(session)
+    def __init__(self, session: Session | AsyncSession):
+        self.crud = get_pfp_crud(session)
 
     async def save_profile_picture(self, user_id: int, file: UploadFile) -> ProfilePicturePublic:
         """
         Creates a new profile picture record after validating and storing the file.
 
+        The image is stored once per content, under the SHA-256 digest of its bytes: uploading
+        an image that is already stored only takes one more reference to it.
+
         Args:
             user_id (int): The ID of the user uploading the profile picture.
             file (UploadFile): The file object containing the profile picture.
@@ -43,43 +276,179 @@ class ProfilePictureService:
             ProfilePicturePublic: The public schema of the created profile picture.
 
         Raises:
-            HTTPException: If the file format is unsupported, file size exceeds the limit,
-                           or an error occurs while saving the file.
+            HTTPException: If the file is not an accepted image, file size exceeds the limit,
+                           an error occurs while saving the file, or another upload of the
+                           user is saved at the same time.
+        """
+        # Reject early what is announced as too large; the copy enforces the limit regardless
+        if file.size is not None and file.size > MAX_FILE_SIZE:
+            raise _file_too_large()
+
+        await file.seek(0)
+        return await self._save(user_id, file.file)
+
+    async def create_upload(self, user_id: int,
+                            upload: ProfilePictureUploadCreate) -> ProfilePictureUpload:
+        """
+        Signs a direct upload of a profile picture to the storage, which the client confirms
+        once done, so that the bytes of the picture do not go through the API.
+
+        Args:
+            user_id (int): The ID of the user uploading the profile picture.
+            upload (ProfilePictureUploadCreate): The type and size of the picture.
+
+        Returns:
+            ProfilePictureUpload: The request the client is to send to the storage.
+
+        Raises:
+            HTTPException: If the file size exceeds the limit, or the storage does not accept
+                           direct uploads.
+        """
+        if upload.size > MAX_FILE_SIZE:
+            raise _file_too_large()
+
+        upload_id = uuid4()
+        try:
+            presigned = await storage.presign_upload(_upload_key(user_id, upload_id),
+                                                     upload.media_type, upload.size)
+        except NotImplementedError as e:
+            raise HTTPException(status_code=status.HTTP_501_NOT_IMPLEMENTED,
+                                detail="Direct uploads are not supported by the storage.") from e
+
+        return ProfilePictureUpload(id=upload_id, url=presigned.url, headers=presigned.headers,
+                                    expires_at=presigned.expires_at)
+
+    async def confirm_upload(self, user_id: int, upload_id: UUID) -> ProfilePicturePublic:
+        """
+        Creates a new profile picture record from a direct upload, after validating it as
+        uploads through the API are. The upload is consumed, whether it is valid or not.
+
+        Args:
+            user_id (int): The ID of the user who made the upload.
+            upload_id (UUID): The ID of the upload.
+
+        Returns:
+            ProfilePicturePublic: The public schema of the created profile picture.
+
+        Raises:
+            HTTPException: If the upload is not found, or is rejected as uploads through the API
+                           are.
+        """
+        key = _upload_key(user_id, upload_id)
+        try:
+            source = await storage.open(key)
+        except FileNotFoundError as e:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND,
+                                detail="Upload not found.") from e
+
+        try:
+            return await self._save(user_id, source)
+        finally:
+            source.close()
+            await _delete_objects([key])
+
+    async def _save(self, user_id: int, source: BinaryIO) -> ProfilePicturePublic:
         """
-        if file.content_type not in IMAGE_FORMATS:
-            raise HTTPException(status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
-                                detail="Unsupported media type. Only JPEG, PNG, and GIF images are supported.")
+        Validates and stores an uploaded image, and makes it the current profile picture of the
+        user.
+
+        Args:
+            user_id (int): The ID of the user uploading the profile picture.
+            source (BinaryIO): The content of the upload, positioned at its start.
 
-        if file.size > MAX_FILE_SIZE:
-            raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
-                                detail="File is too large. The maximum file size allowed is 2MB.")
+        Returns:
+            ProfilePicturePublic: The public schema of the created profile picture.
 
+        Raises:
+            HTTPException: If the file is not an accepted image, file size exceeds the limit,
+                           an error occurs while saving the file, or another upload of the
+                           user is saved at the same time.
+        """
         uuid4_filename = uuid4()
-        file_extension = file.filename.split(".")[-1]
-        filename = f"{uuid4_filename}.{file_extension}"
-        file_path = UPLOAD_DIR / filename
 
         try:
-            with open(file_path, "wb") as f:
-                content = await file.read()
-                f.write(content)
+            with timed("file"):
+                temp_path, media_type, digest = await run_in_threadpool(_write_upload, source)
+        except HTTPException:
+            raise
         except Exception as e:
             raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                                 detail=f"An error occurred while saving the file: {str(e)}") from e
 
-        prev_pfp = self.crud.delete_current_pfp(user_id)
+        temp_paths = [temp_path]
+        try:
+            # Decode the image once, in the image workers, into the variants it is served in
+            try:
+                variants = await image_processor.make_variants(temp_path)
+            except ValueError as e:
+                raise HTTPException(status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+                                    detail="The file is not a valid image.") from e
+            temp_paths.extend(path for _, _, path in variants)
+            key = _blob_key(digest, media_type, uuid4_filename)
+            keys = [key, *(_variant_key(key, size, path.suffix) for size, _, path in variants)]
+
+            # Store the image before the transaction unless it is already stored, so that neither
+            # the connection nor the row of the image is held while the objects are written
+            must_store = not await self.crud.is_blob_stored(digest)
+            await self.crud.commit()
+            wrote_objects = False
+            try:
+                if must_store:
+                    wrote_objects = True
+                    await _save_objects(key, temp_path, media_type, variants)
 
-        # remove the previous profile picture file
-        if prev_pfp:
-            prev_file_path = Path(prev_pfp.path)
-            prev_file_path.unlink(missing_ok=True)
+                # Replace the previous profile picture in a single transaction, so the user is
+                # never left without one
+                try:
+                    prev_pfp = await self.crud.delete_current_pfp(user_id)
+                    # Taking the reference before releasing the previous one keeps the image
+                    # stored when the user uploads their current profile picture again
+                    blob = await self.crud.acquire_blob(MediaBlobCreate(sha256=digest, path=key))
+                    if blob.path == key and not wrote_objects:
+                        # The image was deleted since it was looked up; store it out of the
+                        # transaction, and start over
+                        await self.crud.rollback()
+                        wrote_objects = True
+                        await _save_objects(key, temp_path, media_type, variants)
+                        prev_pfp = await self.crud.delete_current_pfp(user_id)
+                        blob = await self.crud.acquire_blob(MediaBlobCreate(sha256=digest,
+                                                                            path=key))
+                    pfp = await self.crud.create(ProfilePictureCreate(
+                        id=uuid4_filename, user_id=user_id, path=blob.path, blob_sha256=digest))
+                    await self.crud.create_variants([
+                        ProfilePictureVariantCreate(
+                            profile_picture_id=uuid4_filename, size=size,
+                            media_type=variant_type,
+                            path=_variant_key(blob.path, size, path.suffix))
+                        for size, variant_type, path in variants])
+                    prev_keys = await self._release(prev_pfp) if prev_pfp else []
+                    await self.crud.commit()
+                except IntegrityError as e:
+                    if constraint_name(e) != CURRENT_PICTURE_INDEX:
+                        raise
+                    # Another upload of the same user became the current profile picture first
+                    raise _changed_concurrently() from e
+            except BaseException:
+                if wrote_objects:
+                    # The objects, possibly partly written, of an image no committed row refers to
+                    await _delete_objects(keys)
+                raise
+        finally:
+            # The copies of an image that is already stored, or that failed to be saved
+            _remove_files(temp_paths)
 
-        pfp = ProfilePictureCreate(
-            id=uuid4_filename, user_id=user_id, path=str(file_path))
+        if wrote_objects and blob.path != key:
+            # Another upload stored the same image first
+            await _delete_objects(keys)
 
-        return self.crud.create(pfp)
+        await invalidate_user_cache(user_id)
 
-    def delete_current_profile_picture(self, user_id: int) -> None:
+        # remove the previous profile picture files, once the commit no longer references them
+        await _delete_objects(prev_keys)
+
+        return ProfilePicturePublic.model_validate(pfp)
+
+    async def delete_current_profile_picture(self, user_id: int) -> None:
         """
         Deletes the current profile picture of a user.
 
@@ -92,20 +461,44 @@ class ProfilePictureService:
         Returns:
             None
         """
-        pfp = self.crud.get_by_user_id(user_id)
+        pfp = await self.crud.delete_current_pfp(user_id)
 
         if not pfp:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND,
                                 detail="User does not have a profile picture.")
 
-        file_path = Path(pfp.path)
-        file_path.unlink(missing_ok=True)
+        keys = await self._release(pfp)
+        await self.crud.commit()
+        await invalidate_user_cache(user_id)
 
-        self.crud.delete_current_pfp(user_id)
+        # remove the files once the record is deleted
+        await _delete_objects(keys)
 
         return None
 
-    def get_by_id(self, pfp_uuid: UUID) -> ProfilePicturePublic:
+    async def _release(self, pfp: ProfilePicture) -> list[str]:
+        """
+        Drops the reference of a deleted profile picture to its stored image, within the
+        transaction deleting it.
+
+        The objects are only deleted once the transaction is committed, so that they are kept
+        if it is rolled back. An upload of the same image waiting on the lock of its row stores
+        it again under new keys once the row is deleted, rather than referencing the objects.
+
+        Args:
+            pfp (ProfilePicture): The deleted profile picture.
+
+        Returns:
+            list[str]: The objects to delete once the transaction is committed: those of the
+            image if it was the last reference, or of a profile picture stored before images
+            were deduplicated, which it owns.
+        """
+        keys = [pfp.path, *await self.crud.get_variant_paths(pfp.id)]
+        if pfp.blob_sha256 is None or await self.crud.release_blob(pfp.blob_sha256):
+            return keys
+        return []
+
+    async def get_by_id(self, pfp_uuid: UUID) -> ProfilePicture:
         """
         Retrieves a profile picture record by its UUID.
 
@@ -113,11 +506,30 @@ class ProfilePictureService:
             pfp_uuid (UUID): The UUID of the profile picture to retrieve.
 
         Returns:
-            ProfilePicturePublic: The public schema of the profile picture record with the provided
-            UUID.
+            ProfilePicture: The profile picture record with the provided UUID.
+
+        Raises:
+            HTTPException: If the profile picture does not exist or was deleted.
         """
-        pfp = self.crud.get_by_id(pfp_uuid)
-        if not pfp:
+        pfp = await self.crud.get_by_id(pfp_uuid)
+        if not pfp or pfp.is_deleted:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND,
                                 detail="Profile picture not found.")
         return pfp
+
+    async def get_variant(self, pfp_uuid: UUID, size: int,
+                          accepts_webp: bool) -> ProfilePictureVariant | None:
+        """
+        Retrieves a variant of a profile picture, in the best format the client accepts.
+
+        Args:
+            pfp_uuid (UUID): The UUID of the profile picture.
+            size (int): The size of the variant.
+            accepts_webp (bool): Whether the client accepts WebP images; JPEG is sent otherwise.
+
+        Returns:
+            ProfilePictureVariant | None: The variant record, or None if the profile picture
+            does not exist, was deleted or was uploaded before variants were generated.
+        """
+        media_type = "image/webp" if accepts_webp else "image/jpeg"
+        return await self.crud.get_variant(pfp_uuid, int(size), media_type)
@@ -3,11 +3,97 @@ This module define the UserService class responsible for handling business logic
 related to user entities.
 """
 
+from datetime import datetime
+from hashlib import blake2b
+from typing import NamedTuple
 from fastapi import HTTPException, status
+from sqlalchemy import Row
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from app.schema.user import UserCreate, UserPublic, UserUpdateUsername, UserUpdatePassword, UserDelete
-from app.crud.crud_user import CRUDUser
-from app.core.pw_utils import hash_password, verify_password
+from app.crud.crud_factory import get_user_crud
+from app.core.cache import build_cache
+from app.core.config import settings
+from app.core.pw_hasher import password_hasher
+from app.core.responses import dump_json
+from app.core.timing import timed
+from app.database.routing import pin_to_primary
+from app.model.user import User
+
+# The PublicProfile of each user ID, as its ETag, Last-Modified and JSON on their own lines, or
+# NOT_FOUND for a user that does not exist, or INVALIDATED for a user that was just changed
+user_cache = build_cache("user", settings.user_cache_size)
+NOT_FOUND = b""
+INVALIDATED = b"-"
+
+
+class PublicProfile(NamedTuple):
+    """
+    The public profile of a user, serialized, with its validators for conditional requests.
+
+    Attributes:
+        etag (str): Strong entity tag of the profile, a digest of its JSON.
+        last_modified (datetime): Last modification time of the profile.
+        content (bytes): The UserPublic of the user, as JSON.
+    """
+    etag: str
+    last_modified: datetime
+    content: bytes
+
+
+async def invalidate_user_cache(user_id: int) -> None:
+    """
+    Drops the cached public profile of a user; called once a change to it is committed.
+
+    The entry is replaced by a marker for `user_cache_invalidation_ttl` seconds rather than
+    deleted: the profile is only cached if no entry is stored, so a request that read the user
+    before the change cannot cache the stale profile after it.
+
+    Args:
+        user_id (int): ID of the changed user.
+    """
+    await user_cache.set(str(user_id), INVALIDATED, settings.user_cache_invalidation_ttl)
+
+
+def _registered_conflict(registered: Row) -> HTTPException:
+    """
+    Builds the error rejecting a signup whose username or email is taken.
+
+    Args:
+        registered (Row): Whether the username and the email are registered.
+
+    Returns:
+        HTTPException: The 409 Conflict error naming what is taken; a generic one if neither
+        is, as when the conflicting user was deleted in the meantime.
+    """
+    if registered.username:
+        detail = "Username already registered"
+    elif registered.email:
+        detail = "Email already registered"
+    else:
+        detail = "Username or email already registered"
+    return HTTPException(status_code=status.HTTP_409_CONFLICT, detail=detail)
+
+
+def _to_public(user: User) -> UserPublic:
+    """
+    Builds the public profile of a user.
+
+    Args:
+        user (User): The user, with its profile_picture loaded.
+
+    Returns:
+        UserPublic: The public profile.
+    """
+    return UserPublic(
+        id=user.id,
+        email=user.email,
+        username=user.username,
+        created_at=user.created_at,
+        updated_at=user.updated_at,
+        profile_picture=user.profile_picture
+    )
 
 
 class UserService:
@@ -15,16 +101,21 @@ class UserService:
     Service class for managing user-related operations.
 
     Attributes:
-        crud (CRUDUser): Instance of CRUD operations for User entities.
+        crud (AsyncCRUDUser | ThreadedCRUD): Instance of awaitable CRUD operations for User
+        entities.
     """
 
-    def __init__(self, session: Session):
-        self.crud = CRUDUser(session)
+    def __init__(self, session: Session | AsyncSession):
+        self.crud = get_user_crud(session)
 
-    def create(self, user: UserCreate) -> UserPublic:
+    async def create(self, user: UserCreate) -> UserPublic:
         """
         Creates a new user if the username and email are not already registered.
 
+        Taken usernames and emails are rejected by an indexed lookup before the password is
+        hashed, so rejected signups do not cost a bcrypt hash. The INSERT ... ON CONFLICT still
+        rejects the signups racing for the same username or email.
+
         Args:
             user (UserCreate): UserCreate schema instance containing user data.
 
@@ -34,50 +125,83 @@ class UserService:
         Raises:
             HTTPException: If the username or email is already registered.
         """
-        if self.crud.get_by_username(user.username):
-            raise HTTPException(
-                status_code=status.HTTP_409_CONFLICT, detail="Username already registered")
-
-        if self.crud.get_by_email(user.email):
-            raise HTTPException(
-                status_code=status.HTTP_409_CONFLICT, detail="Email already registered")
+        registered = await self.crud.get_registered(user.username, user.email)
+        if registered.username or registered.email:
+            raise _registered_conflict(registered)
+        # End the read-only transaction, so the connection goes back to the pool while the
+        # password is hashed
+        await self.crud.commit()
 
         # Hash the password before storing it
-        user.password = hash_password(user.password)
-        # Create the user
-        return self.crud.create(user)
-
-    def get_by_id(self, user_id: int) -> UserPublic:
+        user.password = await password_hasher.hash_password(user.password)
+        # Create the user, unless the unique constraints reject it
+        created_user = await self.crud.create(user)
+
+        if created_user is None:
+            # A concurrent signup registered the username or email since the lookup
+            pin_to_primary(self.crud.session)
+            raise _registered_conflict(
+                await self.crud.get_registered(user.username, user.email))
+
+        await self.crud.commit()
+        # The ID may have been cached as missing
+        await invalidate_user_cache(created_user.id)
+        return UserPublic.model_validate(created_user)
+
+    async def get_public_profile(self, user_id: int) -> PublicProfile:
         """
-        Gets a user by its ID.
+        Gets the public profile of a user and its validators, through the user cache.
+
+        The profile and its validators are cached in a single entry, computed from a single
+        lookup, so the ETag always matches the profile it is sent with.
 
         Args:
             user_id (int): ID of the user to retrieve.
 
         Returns:
-            UserPublic: User entity object if found.
+            PublicProfile: The profile, serialized, with its ETag and Last-Modified.
 
         Raises:
             HTTPException: If the user with the given ID is not found.
         """
-        user = self.crud.get_by_id(user_id)
-
-        if user is None:
+        key = str(user_id)
+        entry = await user_cache.get(key)
+
+        if entry is None or entry == INVALIDATED:
+            if entry == INVALIDATED:
+                # The user was just changed, which a lagging replica may not show yet
+                pin_to_primary(self.crud.session)
+            row = await self.crud.get_profile(user_id)
+            if row is None and entry is None:
+                # A user created since the replica was last updated is found on the primary
+                pin_to_primary(self.crud.session)
+                row = await self.crud.get_profile(user_id)
+            if row is None:
+                entry = NOT_FOUND
+                await user_cache.add(key, entry, settings.user_cache_negative_ttl)
+            else:
+                user = row.User
+                with timed("serialize"):
+                    content = dump_json(_to_public(user))
+                etag = blake2b(content, digest_size=16).hexdigest()
+                # Deleting the profile picture changes the profile too
+                picture = user.profile_picture
+                last_modified = max(timestamp for timestamp in (
+                    user.updated_at or user.created_at,
+                    picture.uploaded_at if picture is not None else None,
+                    row.last_deleted_at) if timestamp is not None)
+                entry = f'"{etag}"\n{last_modified.isoformat()}\n'.encode() + content
+                await user_cache.add(key, entry, settings.user_cache_ttl)
+
+        if entry == NOT_FOUND:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND,
                                 detail=f"User with id={user_id} was not found")
 
-        profile_picture = self.crud.get_current_profile_picture(user_id)
+        etag, last_modified, content = entry.split(b"\n", 2)
+        return PublicProfile(etag.decode(), datetime.fromisoformat(last_modified.decode()),
+                             content)
 
-        return UserPublic(
-            id=user.id,
-            email=user.email,
-            username=user.username,
-            created_at=user.created_at,
-            updated_at=user.updated_at,
-            profile_picture=profile_picture
-        )
-
-    def update_username(self, user_id: int, new_username: UserUpdateUsername) -> UserPublic:
+    async def update_username(self, user_id: int, new_username: UserUpdateUsername) -> UserPublic:
         """
         Updates the username of a user.
 
@@ -93,27 +217,29 @@ class UserService:
             HTTPException: If the user with the given ID is not found or the new username is
             already registered or the new username is the same as the old username.
         """
-        user = self.crud.get_by_id(user_id)
+        try:
+            user = await self.crud.update_username(user_id, new_username.username)
+        except IntegrityError as e:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT, detail="Username already registered"
+            ) from e
 
         if user is None:
-            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND,
-                                detail=f"User with id={user_id} was not found")
+            pin_to_primary(self.crud.session)
+            if await self.crud.get_by_id(user_id) is None:
+                raise HTTPException(status_code=status.HTTP_404_NOT_FOUND,
+                                    detail=f"User with id={user_id} was not found")
 
-        if user.username == new_username.username:
             raise HTTPException(
                 status_code=status.HTTP_409_CONFLICT,
                 detail="New username is the same as the old username"
             )
 
-        if self.crud.get_by_username(new_username.username):
-            raise HTTPException(
-                status_code=status.HTTP_409_CONFLICT, detail="Username already registered"
-            )
-
-        user.username = new_username.username
-        return self.crud.update(user)
+        await self.crud.commit()
+        await invalidate_user_cache(user_id)
+        return UserPublic.model_validate(user)
 
-    def update_password(self, user_id: int, password_schema: UserUpdatePassword) -> UserPublic:
+    async def update_password(self, user_id: int, password_schema: UserUpdatePassword) -> UserPublic:
         """
         Updates the password of a user.
 
@@ -129,12 +255,13 @@ class UserService:
             HTTPException: If the user with the given ID is not found or the old password is 
             incorrect or the new password is the same as the old password
         """
-        user = self.crud.get_by_id(user_id)
+        pin_to_primary(self.crud.session)
+        user = await self.crud.get_by_id(user_id)
         if user is None:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND,
                                 detail=f"User with id={user_id} was not found")
 
-        if not verify_password(password_schema.old_password, user.password):
+        if not await password_hasher.verify_password(password_schema.old_password, user.password):
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Old password is incorrect"
@@ -146,10 +273,13 @@ class UserService:
                 detail="New password cannot be the same as the old password"
             )
 
-        user.password = hash_password(password_schema.new_password)
-        return self.crud.update(user)
+        user.password = await password_hasher.hash_password(password_schema.new_password)
+        user = await self.crud.update(user)
+        await self.crud.commit()
+        await invalidate_user_cache(user_id)
+        return UserPublic.model_validate(user)
 
-    def delete(self, user_id: int, password: UserDelete) -> None:
+    async def delete(self, user_id: int, password: UserDelete) -> None:
         """
         Deletes a user.
 
@@ -160,15 +290,18 @@ class UserService:
         Raises:
             HTTPException: If the user with the given ID is not found or the password is incorrect.
         """
-        user = self.crud.get_by_id(user_id)
+        pin_to_primary(self.crud.session)
+        user = await self.crud.get_by_id(user_id)
         if user is None:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND,
                                 detail=f"User with id={user_id} was not found")
 
-        if not verify_password(password.password, user.password):
+        if not await password_hasher.verify_password(password.password, user.password):
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Password is incorrect"
             )
 
-        self.crud.delete(user)
+        await self.crud.delete(user)
+        await self.crud.commit()
+        await invalidate_user_cache(user_id)
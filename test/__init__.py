@@ -0,0 +1,14 @@
+"""
+Tests and benchmarks of the application.
+
+They read the database settings from the environment or the .env file, as the application does,
+and run against that database. The settings below are only defaulted for the test runs: the
+rate limiter would otherwise reject the repeated requests, and the debug headers are only sent
+outside of production.
+"""
+
+import os
+
+os.environ.setdefault("ENVIRONMENT", "test")
+os.environ.setdefault("RATE_LIMIT_RATE", "1000000")
+os.environ.setdefault("RATE_LIMIT_BURST", "1000000")
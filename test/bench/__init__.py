@@ -0,0 +1,6 @@
+"""
+Micro-benchmarks of the hot paths of the application.
+
+Each module is run on its own, e.g. `python -m test.bench.jwt_cache`, and prints the time per
+call of the variants it compares. They are not collected by pytest.
+"""
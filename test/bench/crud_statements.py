@@ -0,0 +1,254 @@
+"""
+Benchmark of the per-call overhead of the CRUD methods, with the module-level statements they
+run, and with the legacy Query API and unit of work code they replaced.
+
+Usage:
+    python -m test.bench.crud_statements [--number 1000]
+
+The calls run against the database of the settings, so the timings include the round trips; the
+difference between the two columns is the Python overhead of building and compiling the queries,
+and the round trips saved. They run on rows created by the benchmark, in a transaction that is
+rolled back at the end, and each call runs in a savepoint rolled back after it, so the writes
+start from the same rows every time. The legacy writes flush where they committed.
+"""
+
+import argparse
+import hashlib
+import time
+from typing import Callable
+from uuid import uuid4
+
+from sqlalchemy.orm import Session, joinedload
+from sqlalchemy.sql import and_, func
+
+from app.crud.crud_pfp import CRUDPfp
+from app.crud.crud_user import CRUDUser
+from app.database.database import SessionLocal
+from app.model.media_blob import MediaBlob
+from app.model.pfp import ProfilePicture
+from app.model.pfp_variant import ProfilePictureVariant
+from app.model.user import User
+from app.schema.pfp import MediaBlobCreate, ProfilePictureCreate, ProfilePictureVariantCreate
+from app.schema.user import UserCreate
+
+PASSWORD = "Passw0rd#"
+VARIANTS = ((48, "image/webp"), (128, "image/webp"), (256, "image/webp"))
+
+
+def time_call(session: Session, function: Callable[[], object], number: int,
+              setup: Callable[[], object] | None = None) -> float:
+    """
+    Times a CRUD call, run in a savepoint rolled back after each call.
+
+    The session forgets its objects before each call, so the lookups by primary key run their
+    SQL rather than returning the object loaded by the previous call.
+
+    Args:
+        session (Session): The session the calls run in.
+        function (Callable[[], object]): The call to time.
+        number (int): The number of calls timed, after an untimed warm-up call.
+        setup (Callable[[], object], optional): Creates the rows the call needs, in its
+        savepoint; it is not timed.
+
+    Returns:
+        float: The mean time per call, in seconds.
+    """
+    total = 0.0
+    for index in range(number + 1):
+        session.expunge_all()
+        savepoint = session.begin_nested()
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        function()
+        elapsed = time.perf_counter() - start
+        savepoint.rollback()
+        if index:
+            total += elapsed
+    return total / number
+
+
+def new_user() -> UserCreate:
+    name = f"bench_{uuid4().hex[:12]}"
+    return UserCreate(username=name, email=f"{name}@example.com", password=PASSWORD)
+
+
+def main() -> None:
+    """
+    Times each CRUD method and its legacy counterpart.
+    """
+    parser = argparse.ArgumentParser(description="Benchmark the CRUD statements.")
+    parser.add_argument("--number", type=int, default=1000,
+                        help="the number of calls timed per method (default: 1000)")
+    args = parser.parse_args()
+
+    with SessionLocal() as session:
+        users = CRUDUser(session)
+        pictures = CRUDPfp(session)
+        query = session.query
+
+        # A user with a current profile picture and its variants, and a user without any
+        user = users.create(new_user())
+        other_user = users.create(new_user())
+        user_id, username, email, other_user_id = (user.id, user.username, user.email,
+                                                   other_user.id)
+        sha256 = hashlib.sha256(uuid4().bytes).hexdigest()
+        blob = MediaBlobCreate(sha256=sha256, path=f"media/pfp/{sha256}.png")
+        pictures.acquire_blob(blob)
+        # A deleted profile picture, without variants, then the current one
+        deleted_pfp_id = uuid4()
+        pictures.create(ProfilePictureCreate(id=deleted_pfp_id, user_id=user_id, path=blob.path,
+                                             blob_sha256=sha256))
+        pictures.delete_current_pfp(user_id)
+        pfp_id = uuid4()
+        pictures.create(ProfilePictureCreate(id=pfp_id, user_id=user_id, path=blob.path,
+                                             blob_sha256=sha256))
+        pictures.create_variants([
+            ProfilePictureVariantCreate(profile_picture_id=pfp_id, size=size,
+                                        media_type=media_type,
+                                        path=f"media/pfp/{pfp_id}_{size}.webp")
+            for size, media_type in VARIANTS])
+        session.flush()
+        variants = [ProfilePictureVariantCreate(profile_picture_id=deleted_pfp_id, size=size,
+                                                media_type=media_type,
+                                                path=f"media/pfp/{deleted_pfp_id}_{size}.webp")
+                    for size, media_type in VARIANTS]
+
+        def legacy_create_user():
+            created = User(**new_user().model_dump())
+            session.add(created)
+            session.flush()
+            session.refresh(created)
+
+        def legacy_update_username():
+            updated = query(User).filter(User.id == user_id).first()
+            updated.username = f"{username}_new"
+            updated.updated_at = func.now()  # pylint: disable=not-callable
+            session.flush()
+            session.refresh(updated)
+
+        def update_password():
+            updated = users.get_by_id(user_id)
+            updated.password = PASSWORD
+            users.update(updated)
+
+        def legacy_update_password():
+            updated = query(User).filter(User.id == user_id).first()
+            updated.password = PASSWORD
+            updated.updated_at = func.now()  # pylint: disable=not-callable
+            session.flush()
+            session.refresh(updated)
+
+        def legacy_delete_user():
+            session.delete(query(User).filter(User.id == other_user_id).first())
+            session.flush()
+
+        def new_pfp() -> ProfilePictureCreate:
+            return ProfilePictureCreate(id=uuid4(), user_id=user_id, path=blob.path,
+                                        blob_sha256=sha256)
+
+        def legacy_create_pfp():
+            created = ProfilePicture(**new_pfp().model_dump())
+            created.uploaded_at = func.now()  # pylint: disable=not-callable
+            session.add(created)
+            session.flush()
+            session.refresh(created)
+
+        def legacy_delete_current_pfp():
+            current = query(ProfilePicture).filter(
+                and_(ProfilePicture.user_id == user_id,
+                     ProfilePicture.is_deleted.is_(False))).first()
+            current.deleted_at = func.now()  # pylint: disable=not-callable
+            current.is_deleted = True
+            session.flush()
+
+        def release_pfp():
+            # What a deletion of the current profile picture runs
+            released = pictures.delete_current_pfp(user_id)
+            pictures.get_variant_paths(released.id)
+            pictures.release_blob(released.blob_sha256)
+
+        def delete_current_pfp():
+            pictures.delete_current_pfp(user_id)
+
+        # Each method, its legacy counterpart, if any, the current implementation, and the
+        # setup of each call, if any
+        methods = {
+            "CRUDUser.create": (
+                legacy_create_user,
+                lambda: users.create(new_user()), None),
+            "CRUDUser.get_by_id": (
+                lambda: query(User).filter(User.id == user_id).first(),
+                lambda: users.get_by_id(user_id), None),
+            "CRUDUser.get_profile": (
+                lambda: query(User).options(joinedload(User.profile_picture))
+                .filter(User.id == user_id).first(),
+                lambda: users.get_profile(user_id), None),
+            "CRUDUser.get_registered": (
+                lambda: (query(User).filter(User.username == username).first(),
+                         query(User).filter(User.email == email).first()),
+                lambda: users.get_registered(username, email), None),
+            "CRUDUser.get_by_identifier": (
+                None,
+                lambda: users.get_by_identifier(username), None),
+            "CRUDUser.update_username": (
+                legacy_update_username,
+                lambda: users.update_username(user_id, f"{username}_new"), None),
+            "CRUDUser.update (password)": (
+                legacy_update_password,
+                update_password, None),
+            "CRUDUser.delete": (
+                legacy_delete_user,
+                lambda: users.delete(users.get_by_id(other_user_id)), None),
+            "CRUDPfp.get_by_id": (
+                lambda: query(ProfilePicture).filter(ProfilePicture.id == pfp_id).first(),
+                lambda: pictures.get_by_id(pfp_id), None),
+            "CRUDPfp.get_by_user_id": (
+                lambda: query(ProfilePicture).filter(
+                    and_(ProfilePicture.user_id == user_id,
+                         ProfilePicture.is_deleted.is_(False))).first(),
+                lambda: pictures.get_by_user_id(user_id), None),
+            "CRUDPfp.get_variant": (
+                lambda: query(ProfilePictureVariant).join(ProfilePicture).filter(
+                    ProfilePictureVariant.profile_picture_id == pfp_id,
+                    ProfilePictureVariant.size == 128,
+                    ProfilePictureVariant.media_type == "image/webp",
+                    ProfilePicture.is_deleted.is_(False)).first(),
+                lambda: pictures.get_variant(pfp_id, 128, "image/webp"), None),
+            "CRUDPfp.get_variant_paths": (
+                None,
+                lambda: pictures.get_variant_paths(pfp_id), None),
+            "CRUDPfp.is_blob_stored": (
+                lambda: query(MediaBlob).filter(MediaBlob.sha256 == sha256).first(),
+                lambda: pictures.is_blob_stored(sha256), None),
+            "CRUDPfp.acquire_blob": (
+                None,
+                lambda: pictures.acquire_blob(blob), None),
+            "CRUDPfp.create": (
+                legacy_create_pfp,
+                lambda: pictures.create(new_pfp()), delete_current_pfp),
+            "CRUDPfp.create_variants": (
+                lambda: (session.add_all([
+                    ProfilePictureVariant(**variant.model_dump()) for variant in variants]),
+                         session.flush()),
+                lambda: pictures.create_variants(variants), None),
+            "CRUDPfp.delete_current_pfp": (
+                legacy_delete_current_pfp,
+                delete_current_pfp, None),
+            "CRUDPfp release": (
+                None,
+                release_pfp, None),
+        }
+
+        print(f"{'method':28s} {'legacy':>10s} {'current':>10s}")
+        for name, (legacy, current, setup) in methods.items():
+            legacy_time = (f"{time_call(session, legacy, args.number, setup) * 1e6:7.1f} us"
+                           if legacy else f"{'-':>10s}")
+            current_time = time_call(session, current, args.number, setup)
+            print(f"{name:28s} {legacy_time} {current_time * 1e6:7.1f} us")
+
+        session.rollback()
+
+
+if __name__ == "__main__":
+    main()
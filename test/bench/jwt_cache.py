@@ -0,0 +1,46 @@
+"""
+Benchmark of the authentication of a request, with and without the verified-token cache.
+
+Usage:
+    python -m test.bench.jwt_cache [--number 20000]
+"""
+
+import argparse
+import timeit
+
+from app.auth.jwt import create_access_token, get_current_user, token_cache
+from app.schema.token import TokenData
+from app.schema.user import UserPayload
+
+
+def main() -> None:
+    """
+    Times get_current_user on a cache hit, and with the cache disabled.
+    """
+    parser = argparse.ArgumentParser(description="Benchmark the verified-token cache.")
+    parser.add_argument("--number", type=int, default=20_000,
+                        help="the number of calls timed per variant (default: 20000)")
+    args = parser.parse_args()
+
+    token = create_access_token(TokenData(user=UserPayload(id=1, username="alice"))).access_token
+    max_size = token_cache.max_size
+
+    token_cache.clear()
+    get_current_user(token)
+    cached = timeit.timeit(lambda: get_current_user(token), number=args.number)
+
+    # A cache of size 0 stores nothing, so every call verifies the token
+    token_cache.max_size = 0
+    token_cache.clear()
+    try:
+        uncached = timeit.timeit(lambda: get_current_user(token), number=args.number)
+    finally:
+        token_cache.max_size = max_size
+
+    print(f"{'without cache':14s} {uncached / args.number * 1e6:8.2f} us/request")
+    print(f"{'with cache':14s} {cached / args.number * 1e6:8.2f} us/request "
+          f"(x{uncached / cached:.1f})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+"""
+Benchmark of the per-request overhead of the process time and rate limit middlewares, in their
+former BaseHTTPMiddleware versions and in their current pure ASGI versions.
+
+Usage:
+    python -m test.bench.middleware [--number 5000]
+
+Each stack wraps the same endpoint and is called directly through ASGI, without a server or an
+HTTP client, so the timings are those of the application and its middlewares. Every request has
+its own path, so the former rate limiter, which allowed one request per second and path, lets
+them all through.
+"""
+
+import argparse
+import asyncio
+import time
+from collections import defaultdict
+
+from fastapi import FastAPI, Request, Response, status
+from starlette.middleware.base import BaseHTTPMiddleware
+
+from app.middleware.process_time_header_middleware import ProcessTimeHeaderMiddleware
+from app.middleware.rate_limit_middleware import RateLimitMiddleware
+
+
+class LegacyProcessTimeHeaderMiddleware(BaseHTTPMiddleware):
+    """
+    The process time middleware as it was before it was rewritten as pure ASGI middleware.
+    """
+
+    async def dispatch(self, request: Request, call_next) -> Response:
+        start_time = time.time()
+        response = await call_next(request)
+        response.headers["X-Process-Time"] = str(time.time() - start_time)
+        return response
+
+
+class LegacyRateLimitMiddleware(BaseHTTPMiddleware):
+    """
+    The rate limit middleware as it was before it was rewritten as pure ASGI middleware.
+    """
+
+    def __init__(self, app):
+        super().__init__(app)
+        self.rate_limit_records: dict[tuple[str, str], float] = defaultdict(float)
+
+    async def dispatch(self, request: Request, call_next) -> Response:
+        key = (request.client.host, request.url.path)
+        current_time = time.time()
+        if current_time - self.rate_limit_records[key] < 1:
+            return Response(status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                            media_type="application/json",
+                            content="{\"detail\": \"Rate limit exceeded. Try again in a second.\"}")
+        self.rate_limit_records[key] = current_time
+        return await call_next(request)
+
+
+def build_app(*middlewares) -> FastAPI:
+    """
+    Builds an application with a single endpoint, wrapped in the middlewares in the order
+    app/main.py adds them.
+    """
+    app = FastAPI()
+
+    @app.get("/items/{item_id}")
+    async def read_item(item_id: int):
+        return {"id": item_id}
+
+    for middleware in middlewares:
+        app.add_middleware(middleware)
+    return app
+
+
+async def time_requests(app: FastAPI, number: int, offset: int) -> float:
+    """
+    Sends requests to the application through ASGI.
+
+    Returns:
+        float: The mean time per request, in seconds.
+    """
+    def receiver():
+        # The request has no body; the server then waits until the client disconnects
+        messages = iter([{"type": "http.request", "body": b"", "more_body": False}])
+
+        async def receive():
+            message = next(messages, None)
+            if message is None:
+                await asyncio.Event().wait()
+            return message
+        return receive
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            assert message["status"] == 200, message
+
+    def scope(i: int) -> dict:
+        path = f"/items/{offset + i}"
+        return {"type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1",
+                "method": "GET", "scheme": "http", "path": path, "raw_path": path.encode(),
+                "root_path": "", "query_string": b"", "headers": [(b"host", b"bench")],
+                "client": ("127.0.0.1", 50000), "server": ("bench", 80)}
+
+    # The first requests build the middleware stack and warm the caches
+    for i in range(number // 10):
+        await app(scope(-i - 1), receiver(), send)
+
+    start = time.perf_counter()
+    for i in range(number):
+        await app(scope(i), receiver(), send)
+    return (time.perf_counter() - start) / number
+
+
+def main() -> None:
+    """
+    Times the endpoint alone, then wrapped in each version of the middlewares.
+    """
+    parser = argparse.ArgumentParser(description="Benchmark the middleware overhead.")
+    parser.add_argument("--number", type=int, default=5000,
+                        help="the number of requests timed per stack (default: 5000)")
+    args = parser.parse_args()
+
+    stacks = {
+        "no middleware": build_app(),
+        "BaseHTTPMiddleware": build_app(LegacyProcessTimeHeaderMiddleware,
+                                        LegacyRateLimitMiddleware),
+        "pure ASGI": build_app(ProcessTimeHeaderMiddleware, RateLimitMiddleware),
+    }
+    timings = {name: asyncio.run(time_requests(app, args.number, offset=args.number * 10))
+               for name, app in stacks.items()}
+
+    baseline = timings["no middleware"]
+    for name, timing in timings.items():
+        print(f"{name:18s} {timing * 1e6:8.2f} us/request "
+              f"(overhead {(timing - baseline) * 1e6:6.2f} us)")
+
+
+if __name__ == "__main__":
+    main()
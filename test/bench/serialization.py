@@ -0,0 +1,105 @@
+"""
+Benchmark of the serialization of the response schemas, through FastAPI's response_model
+handling and the standard json module as before, and through the schemas' pydantic-core
+serializers as ModelResponse does now.
+
+Usage:
+    python -m test.bench.serialization [--number 20000]
+"""
+
+import argparse
+import asyncio
+import json
+import time
+import uuid
+from datetime import datetime, timezone
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+from pydantic import BaseModel
+
+from app.core.responses import ModelResponse, TimedJSONResponse
+from app.schema.pfp import ProfilePicturePublic
+from app.schema.token import Token
+from app.schema.user import UserPayload, UserPublic
+
+NOW = datetime.now(timezone.utc)
+PROFILE_PICTURE = ProfilePicturePublic(id=uuid.uuid4(), user_id=1,
+                                       path="media/pfp/ab/cd/abcd.png", uploaded_at=NOW)
+SCHEMAS = {
+    "UserPublic": UserPublic(id=1, email="alice@example.com", username="alice",
+                             created_at=NOW, updated_at=NOW, profile_picture=PROFILE_PICTURE),
+    "ProfilePicturePublic": PROFILE_PICTURE,
+    "Token": Token(access_token="x" * 180, expire_time=NOW,
+                   user=UserPayload(id=1, username="alice")),
+}
+# The body of a validation error, rendered from plain Python objects
+ERROR = {"detail": [{"loc": ["body", "password"], "msg": "Invalid password",
+                     "type": "value_error"}] * 5}
+
+
+async def time_async(function, number: int) -> float:
+    """
+    Returns:
+        float: The mean time per call, in seconds.
+    """
+    await function()
+    start = time.perf_counter()
+    for _ in range(number):
+        await function()
+    return (time.perf_counter() - start) / number
+
+
+def legacy_renderer(model: BaseModel):
+    """
+    Renders a schema instance as FastAPI does for a route with a response_model.
+    """
+    field = create_response_field(name="response", type_=type(model))
+
+    async def render() -> bytes:
+        content = await serialize_response(field=field, response_content=model,
+                                           is_coroutine=True)
+        return JSONResponse(content).body
+    return render
+
+
+async def run(number: int) -> None:
+    print(f"{'schema':22s} {'response_model':>16s} {'pydantic-core':>16s}")
+    for name, model in SCHEMAS.items():
+        legacy = legacy_renderer(model)
+
+        async def current(model=model) -> bytes:
+            return ModelResponse(model).body
+
+        assert json.loads(await legacy()) == json.loads(await current())
+        legacy_time = await time_async(legacy, number)
+        current_time = await time_async(current, number)
+        print(f"{name:22s} {legacy_time * 1e6:13.2f} us {current_time * 1e6:13.2f} us "
+              f"(x{legacy_time / current_time:.1f})")
+
+    async def legacy_error() -> bytes:
+        return JSONResponse(ERROR).body
+
+    async def current_error() -> bytes:
+        return TimedJSONResponse(ERROR).body
+
+    legacy_time = await time_async(legacy_error, number)
+    current_time = await time_async(current_error, number)
+    print(f"{'error (json / orjson)':22s} {legacy_time * 1e6:13.2f} us "
+          f"{current_time * 1e6:13.2f} us (x{legacy_time / current_time:.1f})")
+
+
+def main() -> None:
+    """
+    Times the rendering of each response schema, before and after.
+    """
+    parser = argparse.ArgumentParser(description="Benchmark the response serialization.")
+    parser.add_argument("--number", type=int, default=20_000,
+                        help="the number of responses rendered per schema (default: 20000)")
+    args = parser.parse_args()
+    asyncio.run(run(args.number))
+
+
+if __name__ == "__main__":
+    main()
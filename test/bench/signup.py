@@ -0,0 +1,68 @@
+"""
+Benchmark of the latency of signups, accepted and rejected for a taken username.
+
+Usage:
+    python -m test.bench.signup [--number 50]
+
+Rejected signups are answered by the lookup of the username and email, before the password is
+hashed; they used to pay for the hash as accepted signups do. The requests are sent in-process
+to the application, against the database of the settings.
+"""
+
+import argparse
+import asyncio
+import time
+from uuid import uuid4
+
+from httpx import ASGITransport, AsyncClient
+
+from app.main import app
+
+
+def credentials(username: str | None = None) -> dict:
+    name = f"bench_{uuid4().hex[:12]}"
+    return {"username": username or name, "email": f"{name}@example.com",
+            "password": "Passw0rd#"}
+
+
+async def time_signups(client: AsyncClient, number: int, username: str | None,
+                       expected_status: int) -> float:
+    """
+    Sends signups one after the other.
+
+    Returns:
+        float: The mean time per signup, in seconds.
+    """
+    start = time.perf_counter()
+    for _ in range(number):
+        response = await client.post("/v1/users/", json=credentials(username))
+        assert response.status_code == expected_status, response.text
+    return (time.perf_counter() - start) / number
+
+
+async def run(number: int) -> dict[str, float]:
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://bench") as client:
+        taken = credentials()
+        response = await client.post("/v1/users/", json=taken)
+        assert response.status_code == 201, response.text
+        return {
+            "accepted": await time_signups(client, number, None, 201),
+            "taken username": await time_signups(client, number, taken["username"], 409),
+        }
+
+
+def main() -> None:
+    """
+    Times accepted signups, then signups rejected for a taken username.
+    """
+    parser = argparse.ArgumentParser(description="Benchmark the signup latency.")
+    parser.add_argument("--number", type=int, default=50,
+                        help="the number of signups timed per case (default: 50)")
+    args = parser.parse_args()
+
+    for name, timing in asyncio.run(run(args.number)).items():
+        print(f"{name:15s} {timing * 1e3:8.2f} ms/signup")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""
+Fixtures shared by the tests.
+"""
+
+from uuid import uuid4
+
+import pytest
+from httpx import ASGITransport, AsyncClient
+
+from app.core.config import settings
+from app.main import app
+
+
+@pytest.fixture(scope="session")
+def anyio_backend():
+    """
+    Runs the asynchronous tests on asyncio, the event loop the application is served on.
+    """
+    return "asyncio"
+
+
+@pytest.fixture
+async def client():
+    """
+    A client sending requests to the application in-process, in the task of the test, so that
+    the context variables set by the test are seen by the application.
+    """
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+        yield client
+
+    if settings.database_async:
+        # The pooled asyncpg connections are bound to the event loop of the test
+        # pylint: disable=import-outside-toplevel
+        from app.database.async_database import async_engine, async_replica_engines
+        for engine in [async_engine, *async_replica_engines]:
+            await engine.dispose()
+
+
+@pytest.fixture
+async def user(client):
+    """
+    A newly registered user; the names are unique, as the database outlives the test runs.
+
+    Returns:
+        dict: The created user, with its password.
+    """
+    name = f"user_{uuid4().hex[:12]}"
+    credentials = {"username": name, "email": f"{name}@example.com", "password": "Passw0rd#"}
+    response = await client.post("/v1/users/", json=credentials)
+    assert response.status_code == 201, response.text
+    return {**response.json(), "password": credentials["password"]}
+
+
+@pytest.fixture
+async def token(client, user):
+    """
+    An access token of the user.
+    """
+    response = await client.post("/v1/login", data={"username": user["username"],
+                                                    "password": user["password"]})
+    assert response.status_code == 200, response.text
+    return response.json()["access_token"]
@@ -0,0 +1,58 @@
+"""
+Tests of the rejection of request bodies larger than the limit.
+"""
+
+import pytest
+from fastapi import FastAPI, Request
+from httpx import ASGITransport, AsyncClient
+
+from app.middleware.body_size_limit_middleware import BodySizeLimitMiddleware
+from app.service.pfp_service import MAX_BODY_SIZE, MEGABYTE
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+async def limited_client():
+    """
+    A client of an application echoing the size of the bodies, limited to 10 bytes.
+    """
+    app = FastAPI()
+    app.add_middleware(BodySizeLimitMiddleware, max_body_size=10)
+
+    @app.post("/")
+    async def echo(request: Request):
+        return {"size": len(await request.body())}
+
+    async with AsyncClient(transport=ASGITransport(app), base_url="http://test") as client:
+        yield client
+
+
+async def stream(*chunks: bytes):
+    for chunk in chunks:
+        yield chunk
+
+
+async def test_bodies_within_the_limit_are_read(limited_client):
+    response = await limited_client.post("/", content=b"x" * 10)
+    assert response.json() == {"size": 10}
+
+
+async def test_announced_content_length_is_rejected(limited_client):
+    response = await limited_client.post("/", content=b"x" * 11)
+    assert response.status_code == 413
+
+
+async def test_chunked_bodies_are_rejected_when_the_limit_is_crossed(limited_client):
+    response = await limited_client.post("/", content=stream(b"x" * 6, b"x" * 6))
+    assert response.status_code == 413
+
+
+async def test_oversized_uploads_are_rejected_as_they_stream_in(client, token):
+    body = (b'--boundary\r\nContent-Disposition: form-data; name="file"; filename="pfp.png"\r\n'
+            b"Content-Type: image/png\r\n\r\n" + b"x" * MAX_BODY_SIZE + b"\r\n--boundary--\r\n")
+    response = await client.post("/v1/users/me/profile-pictures/",
+                                 content=stream(body[:MEGABYTE], body[MEGABYTE:]),
+                                 headers={"Authorization": f"Bearer {token}",
+                                          "Content-Type": "multipart/form-data; boundary=boundary"})
+    assert response.status_code == 413
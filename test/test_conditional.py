@@ -0,0 +1,31 @@
+"""
+Tests of the parsing of the Range header.
+"""
+
+import pytest
+
+from app.core.conditional import parse_byte_range
+
+
+@pytest.mark.parametrize("range_header, expected", [
+    ("bytes=0-9", (0, 9)),
+    ("bytes=90-", (90, 99)),
+    ("bytes=-10", (90, 99)),
+    ("bytes=0-1000", (0, 99)),
+    ("bytes=9-0", None),
+    ("bytes=0-9,20-29", None),
+    ("items=0-9", None),
+    ("bytes=-", None),
+])
+def test_byte_ranges_are_parsed(range_header, expected):
+    assert parse_byte_range(range_header, 100) == expected
+
+
+@pytest.mark.parametrize("range_header", ["bytes=²-", "bytes=0-²", "bytes=١-", "bytes=-١٠"])
+def test_non_ascii_digits_are_not_byte_positions(range_header):
+    assert parse_byte_range(range_header, 100) is None
+
+
+def test_unsatisfiable_ranges_raise():
+    with pytest.raises(ValueError):
+        parse_byte_range("bytes=100-", 100)
@@ -0,0 +1,42 @@
+"""
+Tests of the inspection of the database errors, with each driver.
+"""
+
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app.database.async_database import ASYNC_SQLALCHEMY_DATABASE_URL
+from app.database.database import SQLALCHEMY_DATABASE_URL
+from app.database.errors import constraint_name
+
+# Registers a user with the username of another one, in another case
+DUPLICATE_USERNAME = text("""
+    INSERT INTO "user" (email, username, password)
+    VALUES ('errors-1@example.com', 'errors', 'x'), ('errors-2@example.com', 'ERRORS', 'x')
+""")
+
+
+def test_constraint_name_with_psycopg2():
+    engine = create_engine(SQLALCHEMY_DATABASE_URL)
+    try:
+        with engine.connect() as conn, pytest.raises(IntegrityError) as error:
+            conn.execute(DUPLICATE_USERNAME)
+    finally:
+        engine.dispose()
+
+    assert constraint_name(error.value) == "user_username_lower_index"
+
+
+@pytest.mark.anyio
+async def test_constraint_name_with_asyncpg():
+    engine = create_async_engine(ASYNC_SQLALCHEMY_DATABASE_URL)
+    try:
+        async with engine.connect() as conn:
+            with pytest.raises(IntegrityError) as error:
+                await conn.execute(DUPLICATE_USERNAME)
+    finally:
+        await engine.dispose()
+
+    assert constraint_name(error.value) == "user_username_lower_index"
@@ -0,0 +1,84 @@
+"""
+Tests of the metrics middleware and of the /metrics endpoint.
+"""
+
+from fastapi import FastAPI
+from httpx import ASGITransport, AsyncClient
+from prometheus_client import REGISTRY
+import pytest
+
+from app.middleware.metrics_middleware import MetricsMiddleware
+
+pytestmark = pytest.mark.anyio
+
+
+def requests_total(method: str, route: str, status: str) -> float:
+    return REGISTRY.get_sample_value("http_requests_total",
+                                     {"method": method, "route": route, "status": status}) or 0.0
+
+
+@pytest.fixture
+async def middleware():
+    """
+    The middleware of an application with a single route, started up.
+    """
+    app = FastAPI()
+
+    @app.get("/items/{item_id}")
+    async def read_item(item_id: int):
+        return {"id": item_id}
+
+    middleware = MetricsMiddleware(app)
+    messages = iter([{"type": "lifespan.startup"}])
+
+    async def receive():
+        return next(messages, {"type": "lifespan.shutdown"})
+
+    async def send(_):
+        pass
+
+    await middleware({"type": "lifespan", "app": app}, receive, send)
+    return middleware
+
+
+@pytest.fixture
+async def metrics_client(middleware):
+    async with AsyncClient(transport=ASGITransport(app=middleware),
+                           base_url="http://test") as client:
+        yield client
+
+
+async def test_route_metrics_are_bound_at_startup(middleware, metrics_client):
+    # pylint: disable=protected-access
+    bound = middleware._routes["/items/{item_id}"]["GET"]
+    before = requests_total("GET", "/items/{item_id}", "200")
+
+    await metrics_client.get("/items/1")
+    await metrics_client.get("/items/2")
+
+    assert middleware._routes["/items/{item_id}"]["GET"] is bound
+    assert requests_total("GET", "/items/{item_id}", "200") == before + 2
+
+
+async def test_unknown_methods_are_labelled_other(middleware, metrics_client):
+    # pylint: disable=protected-access
+    routes = {route: set(methods) for route, methods in middleware._routes.items()}
+    before = (requests_total("other", "/items/{item_id}", "405"),
+              requests_total("other", "unmatched", "404"))
+
+    await metrics_client.request("FOO1", "/items/1")
+    await metrics_client.request("FOO2", "/missing")
+
+    assert {route: set(methods) for route, methods in middleware._routes.items()} == routes
+    assert (requests_total("other", "/items/{item_id}", "405"),
+            requests_total("other", "unmatched", "404")) == (before[0] + 1, before[1] + 1)
+
+
+async def test_metrics_are_exposed(client):
+    await client.get("/metrics")
+
+    response = await client.get("/metrics")
+
+    assert response.status_code == 200
+    assert 'http_requests_total{method="GET",route="/metrics",status="200"}' in response.text
+    assert "db_pool_wait_seconds_bucket" in response.text
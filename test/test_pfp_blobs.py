@@ -0,0 +1,104 @@
+"""
+Tests of the storage of the profile pictures once per content.
+"""
+
+import hashlib
+import io
+import os
+
+import pytest
+from PIL import Image
+
+from app.core.storage import LocalStorage
+from app.crud.async_crud_pfp import AsyncCRUDPfp
+from app.crud.crud_pfp import CRUDPfp
+from app.service import pfp_service
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+def storage(tmp_path, monkeypatch):
+    storage = LocalStorage(tmp_path)
+    monkeypatch.setattr(pfp_service, "storage", storage)
+    return storage
+
+
+@pytest.fixture
+def image():
+    """
+    A PNG image of random pixels, so that it was never stored by a previous run.
+    """
+    buffer = io.BytesIO()
+    Image.frombytes("RGB", (16, 16), os.urandom(16 * 16 * 3)).save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+def stored_files(storage, image) -> set:
+    """
+    The stored files of an image and its variants, named after its digest.
+    """
+    return set(storage.root.rglob(f"{hashlib.sha256(image).hexdigest()}-*"))
+
+
+async def upload(client, token, image):
+    response = await client.post("/v1/users/me/profile-pictures/",
+                                 files={"file": ("pfp.png", image, "image/png")},
+                                 headers={"Authorization": f"Bearer {token}"})
+    assert response.status_code == 201, response.text
+
+
+async def delete(client, token):
+    response = await client.delete("/v1/users/me/profile-pictures/",
+                                   headers={"Authorization": f"Bearer {token}"})
+    assert response.status_code == 204, response.text
+
+
+async def test_images_stored_again_get_new_keys(client, token, storage, image):
+    await upload(client, token, image)
+    first = stored_files(storage, image)
+    assert first
+
+    await delete(client, token)
+    assert not stored_files(storage, image)
+
+    await upload(client, token, image)
+    second = stored_files(storage, image)
+    assert second and not second & first
+
+
+async def test_files_are_kept_when_the_release_is_rolled_back(client, token, storage, image,
+                                                              monkeypatch):
+    await upload(client, token, image)
+    files = stored_files(storage, image)
+
+    def fail(*args):
+        raise RuntimeError("The commit failed")
+    monkeypatch.setattr(CRUDPfp, "commit", fail)
+    monkeypatch.setattr(AsyncCRUDPfp, "commit", fail)
+    with pytest.raises(RuntimeError):
+        await delete(client, token)
+    monkeypatch.undo()
+
+    assert files and all(path.exists() for path in files)
+
+
+async def test_images_already_stored_are_not_written_again(client, token, storage, image):
+    await upload(client, token, image)
+    files = {path: path.stat().st_mtime_ns for path in stored_files(storage, image)}
+
+    await upload(client, token, image)
+
+    assert {path: path.stat().st_mtime_ns for path in stored_files(storage, image)} == files
+
+
+async def test_images_deleted_since_they_were_looked_up_are_stored(client, token, storage, image,
+                                                                   monkeypatch):
+    async def is_stored(*args):
+        return True
+    monkeypatch.setattr(CRUDPfp, "is_blob_stored", lambda *args: True)
+    monkeypatch.setattr(AsyncCRUDPfp, "is_blob_stored", is_stored)
+
+    await upload(client, token, image)
+
+    assert stored_files(storage, image)
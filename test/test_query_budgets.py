@@ -0,0 +1,74 @@
+"""
+Query budgets of the hot endpoints, so that an added statement or an N+1 pattern fails the tests.
+"""
+
+import pytest
+
+from app.database.query_stats import QueryBudgetExceeded, query_budget
+from app.service.user_service import user_cache
+
+pytestmark = pytest.mark.anyio
+
+
+async def forget_user(user_id: int) -> None:
+    """
+    Drops the cached profile of a user, without leaving the invalidation marker that would
+    keep it from being cached again.
+    """
+    await user_cache.delete(str(user_id))
+
+
+async def test_get_user(client, user):
+    await forget_user(user["id"])
+
+    async with query_budget(1):
+        response = await client.get(f"/v1/users/{user['id']}")
+    assert response.status_code == 200
+
+    # Served from the cache
+    async with query_budget(0):
+        response = await client.get(f"/v1/users/{user['id']}")
+    assert response.status_code == 200
+
+
+async def test_login(client, user):
+    async with query_budget(1):
+        response = await client.post("/v1/login", data={"username": user["username"],
+                                                        "password": user["password"]})
+    assert response.status_code == 200
+
+
+async def test_create_user(client, user):
+    credentials = {"username": f"{user['username']}_2", "email": f"2{user['email']}",
+                   "password": user["password"]}
+    # The lookup of the username and email, then the INSERT
+    async with query_budget(2):
+        response = await client.post("/v1/users/", json=credentials)
+    assert response.status_code == 201
+
+
+async def test_update_username(client, user, token):
+    async with query_budget(1):
+        response = await client.put("/v1/users/me/username",
+                                    json={"username": f"{user['username']}_3"},
+                                    headers={"Authorization": f"Bearer {token}"})
+    assert response.status_code == 200
+
+
+async def test_budget_is_enforced(client, user):
+    await forget_user(user["id"])
+
+    with pytest.raises(QueryBudgetExceeded):
+        async with query_budget(0):
+            await client.get(f"/v1/users/{user['id']}")
+
+
+async def test_budget_decorates_coroutine_functions(client, user):
+    await forget_user(user["id"])
+
+    @query_budget(0)
+    async def get_user():
+        return await client.get(f"/v1/users/{user['id']}")
+
+    with pytest.raises(QueryBudgetExceeded):
+        await get_user()
@@ -0,0 +1,144 @@
+"""
+Tests of the Redis token-bucket rate limiter, against fakeredis.
+"""
+
+import asyncio
+
+import pytest
+from fakeredis import FakeServer
+from fakeredis.aioredis import FakeRedis
+
+from app.core.redis_rate_limiter import RedisTokenBucketLimiter
+
+pytestmark = pytest.mark.anyio
+
+
+class FakeClock:
+    """
+    Clock of the limiter, advanced by the tests.
+    """
+
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def server():
+    return FakeServer()
+
+
+@pytest.fixture
+def redis(server):
+    return FakeRedis(server=server)
+
+
+def make_limiter(redis, clock=None, **kwargs) -> RedisTokenBucketLimiter:
+    options = {"rate": 1.0, "burst": 3, "lease_size": 1, "max_keys": 100,
+               "sweep_interval": 60.0, "cooldown": 5.0, **kwargs}
+    if clock is not None:
+        options["clock"] = clock
+    return RedisTokenBucketLimiter(redis, **options)
+
+
+async def shared_tokens(redis, key: str) -> float:
+    return float(await redis.hget(f"rate-limit:{key}", "tokens"))
+
+
+async def test_burst_is_allowed_then_rejected(redis):
+    limiter = make_limiter(redis)
+
+    results = [await limiter.hit("client") for _ in range(4)]
+
+    assert [result.allowed for result in results] == [True, True, True, False]
+    assert results[2].remaining == 0
+    assert results[3].retry_after > 0
+
+
+async def test_bucket_refills_over_time(redis):
+    limiter = make_limiter(redis, rate=20.0, burst=1)
+
+    assert (await limiter.hit("client")).allowed
+    rejected = await limiter.hit("client")
+    assert not rejected.allowed
+
+    # The bucket refills on the clock of Redis; the remembered rejection expires with it
+    await asyncio.sleep(rejected.retry_after + 0.01)
+    limiter._clock = lambda: float("inf")  # pylint: disable=protected-access
+
+    assert (await limiter.hit("client")).allowed
+
+
+async def test_keys_have_their_own_buckets(redis):
+    limiter = make_limiter(redis, burst=1)
+
+    assert (await limiter.hit("a")).allowed
+    assert not (await limiter.hit("a")).allowed
+    assert (await limiter.hit("b")).allowed
+
+
+async def test_leased_tokens_are_handed_out_locally(redis):
+    limiter = make_limiter(redis, burst=10, lease_size=5)
+
+    results = [await limiter.hit("client") for _ in range(5)]
+
+    assert all(result.allowed for result in results)
+    # A single round trip took the 5 tokens from the shared bucket
+    assert await shared_tokens(redis, "client") == 5
+    assert [result.remaining for result in results] == [9, 8, 7, 6, 5]
+
+
+async def test_unused_leased_tokens_expire(redis):
+    clock = FakeClock()
+    limiter = make_limiter(redis, clock, burst=10, lease_size=5)
+
+    await limiter.hit("client")
+    clock.now += limiter.lease_ttl
+
+    # The 4 tokens left in the lease are dropped, and 5 more are taken
+    assert (await limiter.hit("client")).allowed
+    assert await shared_tokens(redis, "client") < 1
+
+
+async def test_rejections_are_remembered_until_the_bucket_refills(redis):
+    clock = FakeClock()
+    limiter = make_limiter(redis, clock, burst=1)
+
+    await limiter.hit("client")
+    rejected = await limiter.hit("client")
+    await redis.delete("rate-limit:client")
+
+    # Answered from the remembered rejection, without asking Redis
+    assert not (await limiter.hit("client")).allowed
+    assert not await redis.exists("rate-limit:client")
+
+    clock.now += rejected.retry_after
+    assert (await limiter.hit("client")).allowed
+
+
+async def test_falls_back_to_the_local_limiter_when_redis_fails(server, redis):
+    clock = FakeClock()
+    limiter = make_limiter(redis, clock, burst=2)
+    server.connected = False
+
+    results = [await limiter.hit("client") for _ in range(3)]
+
+    # The local bucket enforces the same limit
+    assert [result.allowed for result in results] == [True, True, False]
+
+
+async def test_redis_is_skipped_during_the_cooldown(server, redis):
+    clock = FakeClock()
+    limiter = make_limiter(redis, clock, burst=2)
+    server.connected = False
+    await limiter.hit("a")
+    server.connected = True
+
+    await limiter.hit("b")
+    assert not await redis.exists("rate-limit:b")
+
+    clock.now += limiter.cooldown
+    await limiter.hit("b")
+    assert await redis.exists("rate-limit:b")
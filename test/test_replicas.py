@@ -0,0 +1,99 @@
+"""
+Tests of the reads of the application against a read replica lagging the primary.
+
+The replica is a schema of the same database holding empty copies of the tables, so it never
+sees what the tests write to the primary.
+"""
+
+import io
+import os
+
+import pytest
+from PIL import Image
+from sqlalchemy import create_engine, text
+from sqlalchemy.schema import CreateSchema
+
+from app.api.v1 import pfp
+from app.core.config import settings
+from app.core.image_utils import VariantSize
+from app.core.storage import LocalStorage
+from app.database.database import SQLALCHEMY_DATABASE_URL, Base, SessionLocal
+from app.service import pfp_service
+from app.service.user_service import user_cache
+
+pytestmark = pytest.mark.anyio
+
+SCHEMA = "lagging_replica"
+SCHEMA_OPTIONS = {"schema_translate_map": {None: SCHEMA}}
+
+
+@pytest.fixture
+async def lagging_replica(monkeypatch):
+    """
+    Sends the reads allowed on a replica to a replica that never caught up with the primary.
+    """
+    engine = create_engine(SQLALCHEMY_DATABASE_URL, execution_options=SCHEMA_OPTIONS)
+    with engine.begin() as connection:
+        connection.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+        connection.execute(CreateSchema(SCHEMA))
+        Base.metadata.create_all(connection, checkfirst=False)
+    monkeypatch.setitem(SessionLocal.kw, "replicas", [engine])
+
+    async_engine = None
+    if settings.database_async:
+        # pylint: disable=import-outside-toplevel
+        from sqlalchemy.ext.asyncio import create_async_engine
+        from app.database.async_database import ASYNC_SQLALCHEMY_DATABASE_URL, AsyncSessionLocal
+        async_engine = create_async_engine(ASYNC_SQLALCHEMY_DATABASE_URL,
+                                           execution_options=SCHEMA_OPTIONS)
+        monkeypatch.setitem(AsyncSessionLocal.kw, "replicas", [async_engine.sync_engine])
+
+    yield
+
+    if async_engine is not None:
+        await async_engine.dispose()
+    with engine.begin() as connection:
+        connection.execute(text(f"DROP SCHEMA {SCHEMA} CASCADE"))
+    engine.dispose()
+
+
+@pytest.fixture
+def storage(tmp_path, monkeypatch):
+    storage = LocalStorage(tmp_path)
+    monkeypatch.setattr(pfp_service, "storage", storage)
+    monkeypatch.setattr(pfp, "storage", storage)
+    return storage
+
+
+async def test_uploaded_pictures_are_served_right_away(client, token, lagging_replica, storage):
+    image = io.BytesIO()
+    Image.frombytes("RGB", (16, 16), os.urandom(16 * 16 * 3)).save(image, format="PNG")
+    response = await client.post("/v1/users/me/profile-pictures/",
+                                 files={"file": ("pfp.png", image.getvalue(), "image/png")},
+                                 headers={"Authorization": f"Bearer {token}"})
+    assert response.status_code == 201, response.text
+    url = response.json()["url"]
+
+    assert (await client.get(url)).status_code == 200
+    assert (await client.get(url, params={"size": int(VariantSize.SMALL)})).status_code == 200
+
+
+async def test_users_are_found_right_after_they_change(client, user, token, lagging_replica):
+    response = await client.get(f"/v1/users/{user['id']}")
+    assert response.status_code == 200, response.text
+
+    await client.put("/v1/users/me/username", json={"username": f"{user['username']}_new"},
+                     headers={"Authorization": f"Bearer {token}"})
+    response = await client.get(f"/v1/users/{user['id']}")
+    assert response.json()["username"] == f"{user['username']}_new"
+
+
+async def test_users_missing_from_the_replica_are_read_from_the_primary(client, user,
+                                                                        lagging_replica):
+    # The invalidation marker of the signup has expired
+    await user_cache.delete(str(user["id"]))
+
+    response = await client.get(f"/v1/users/{user['id']}")
+
+    assert response.status_code == 200, response.text
+    assert response.json()["username"] == user["username"]
@@ -0,0 +1,104 @@
+"""
+Tests of the routing of the statements of a session between the primary and the replicas.
+
+The replica is a second engine connected to the same database, so the tests only tell the
+engines apart by which one executed each statement.
+"""
+
+from uuid import uuid4
+
+import pytest
+from sqlalchemy import create_engine, event, select, update
+
+from app.crud.crud_pfp import CRUDPfp
+from app.crud.crud_user import CRUDUser
+from app.database.database import SQLALCHEMY_DATABASE_URL
+from app.database.routing import RoutingSession, pin_to_primary, read_from_replica
+from app.model.user import User
+
+
+@pytest.fixture(scope="module")
+def engines():
+    primary = create_engine(SQLALCHEMY_DATABASE_URL)
+    replica = create_engine(SQLALCHEMY_DATABASE_URL)
+    yield primary, replica
+    primary.dispose()
+    replica.dispose()
+
+
+@pytest.fixture
+def executed(engines):
+    """
+    The names of the engines that executed each statement, in order.
+    """
+    names = []
+    listeners = []
+    for name, engine in zip(("primary", "replica"), engines):
+        def listener(*args, name=name):  # pylint: disable=unused-argument
+            names.append(name)
+        event.listen(engine, "before_cursor_execute", listener)
+        listeners.append((engine, listener))
+    yield names
+    for engine, listener in listeners:
+        event.remove(engine, "before_cursor_execute", listener)
+
+
+@pytest.fixture
+def session(engines):
+    primary, replica = engines
+    with RoutingSession(bind=primary, replicas=[replica]) as session:
+        yield session
+        session.rollback()
+
+
+def test_selects_are_sent_to_the_replica_when_allowed(session, executed):
+    session.execute(select(User.id).limit(1))
+    with read_from_replica(session):
+        session.execute(select(User.id).limit(1))
+
+    assert executed == ["primary", "replica"]
+
+
+def test_writes_are_sent_to_the_primary(session, executed):
+    with read_from_replica(session):
+        session.execute(update(User).where(User.id == -1).values(username="x"))
+
+    assert executed == ["primary"]
+
+
+def test_reads_after_a_flush_are_sent_to_the_primary(session, executed):
+    name = f"routing_{uuid4().hex[:12]}"
+    session.add(User(username=name, email=f"{name}@example.com", password="x"))
+    session.flush()
+    executed.clear()
+
+    with read_from_replica(session):
+        session.execute(select(User.id).limit(1))
+
+    assert executed == ["primary"]
+
+
+def test_pin_to_primary_is_honoured(session, executed):
+    pin_to_primary(session)
+    with read_from_replica(session):
+        session.execute(select(User.id).limit(1))
+
+    assert executed == ["primary"]
+
+
+def test_reads_before_writes_are_sent_to_the_primary(session, executed):
+    users = CRUDUser(session)
+    pictures = CRUDPfp(session)
+
+    users.get_by_identifier("nobody")
+    users.get_by_id(-1)
+    pictures.get_by_id(uuid4())
+    pictures.get_variant(uuid4(), 64, "image/webp")
+
+    assert executed == ["primary"] * 4
+
+
+def test_profile_reads_are_sent_to_the_replica(session, executed):
+    CRUDUser(session).get_profile(-1)
+
+    assert executed == ["replica"]
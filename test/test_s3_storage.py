@@ -0,0 +1,108 @@
+"""
+Tests of the S3 storage, against the S3 API mocked by moto.
+"""
+
+import io
+import os
+
+import boto3
+import pytest
+from moto import mock_aws
+from PIL import Image
+from pydantic import ValidationError
+
+from app.core import s3_storage
+from app.core.config import Settings
+from app.core.s3_storage import S3Storage
+from app.service import pfp_service
+
+pytestmark = pytest.mark.anyio
+
+BUCKET = "media"
+
+
+@pytest.fixture
+def s3_client(monkeypatch):
+    monkeypatch.setenv("AWS_ACCESS_KEY_ID", "testing")
+    monkeypatch.setenv("AWS_SECRET_ACCESS_KEY", "testing")
+    with mock_aws():
+        client = boto3.client("s3", region_name="us-east-1")
+        client.create_bucket(Bucket=BUCKET)
+        yield client
+
+
+@pytest.fixture
+def storage(s3_client):
+    return S3Storage(s3_client, BUCKET, url_expires=60)
+
+
+def keys_of(s3_client) -> set[str]:
+    return {item["Key"] for item in s3_client.list_objects_v2(Bucket=BUCKET).get("Contents", [])}
+
+
+async def test_saved_objects_are_read_back(s3_client, storage, tmp_path):
+    source = tmp_path / "image.png"
+    source.write_bytes(b"image")
+
+    await storage.save("media/pfp/image.png", source, "image/png")
+
+    assert not source.exists()
+    head = s3_client.head_object(Bucket=BUCKET, Key="media/pfp/image.png")
+    assert head["ContentType"] == "image/png"
+    assert head["CacheControl"] == "public, max-age=31536000, immutable"
+    body = await storage.open("media/pfp/image.png")
+    assert body.read() == b"image"
+
+
+async def test_objects_are_copied(s3_client, storage):
+    s3_client.put_object(Bucket=BUCKET, Key="old", Body=b"image")
+
+    await storage.copy("old", "new")
+
+    assert keys_of(s3_client) == {"old", "new"}
+
+
+async def test_missing_objects_raise_file_not_found(storage):
+    with pytest.raises(FileNotFoundError):
+        await storage.open("missing")
+    with pytest.raises(FileNotFoundError):
+        await storage.copy("missing", "new")
+
+
+async def test_objects_are_deleted_in_batches(s3_client, storage, monkeypatch):
+    monkeypatch.setattr(s3_storage, "DELETE_BATCH_SIZE", 2)
+    for index in range(5):
+        s3_client.put_object(Bucket=BUCKET, Key=f"key{index}", Body=b"")
+
+    await storage.delete(f"key{index}" for index in range(4))
+    await storage.delete(["missing"])
+
+    assert keys_of(s3_client) == {"key4"}
+
+
+async def test_presigned_uploads_are_signed_for_the_type(storage):
+    upload = await storage.presign_upload("uploads/1/upload", "image/png", 100)
+
+    assert BUCKET in upload.url
+    assert "uploads/1/upload" in upload.url
+    assert upload.headers == {"Content-Type": "image/png"}
+
+
+async def test_uploads_are_stored_in_the_bucket(client, token, s3_client, storage, monkeypatch):
+    monkeypatch.setattr(pfp_service, "storage", storage)
+    image = io.BytesIO()
+    Image.frombytes("RGB", (16, 16), os.urandom(16 * 16 * 3)).save(image, format="PNG")
+
+    response = await client.post("/v1/users/me/profile-pictures/",
+                                 files={"file": ("pfp.png", image.getvalue(), "image/png")},
+                                 headers={"Authorization": f"Bearer {token}"})
+    assert response.status_code == 201, response.text
+
+    keys = keys_of(s3_client)
+    assert keys and all(key.startswith("media/pfp/") for key in keys)
+
+
+def test_s3_backend_requires_a_bucket():
+    with pytest.raises(ValidationError):
+        Settings(storage_backend="s3")
+    assert Settings(storage_backend="s3", storage_s3_bucket=BUCKET).storage_s3_bucket == BUCKET
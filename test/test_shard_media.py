@@ -0,0 +1,176 @@
+"""
+Tests of the command moving the profile picture files to the fan-out layout.
+"""
+
+import asyncio
+import os
+from uuid import uuid4
+
+import pytest
+from sqlalchemy import select
+
+from app.cli import shard_media
+from app.core.storage import LocalStorage
+from app.database.database import SessionLocal
+from app.model.media_blob import MediaBlob
+from app.model.pfp import ProfilePicture
+from app.model.pfp_variant import ProfilePictureVariant
+from app.model.user import User
+from app.service.pfp_service import sharded_key
+
+pytestmark = pytest.mark.anyio
+
+
+class SlowStorage:
+    """
+    A storage whose copies take a while, recording how many run at once.
+    """
+
+    def __init__(self):
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def copy(self, source_key: str, destination_key: str) -> None:
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        await asyncio.sleep(0.01)
+        self.in_flight -= 1
+
+
+async def test_copies_are_bounded(monkeypatch):
+    storage = SlowStorage()
+    monkeypatch.setattr(shard_media, "storage", storage)
+    limit = asyncio.Semaphore(2)
+
+    moves = await asyncio.gather(shard_media._copy_files(["media/pfp/abcd.png"], limit),
+                                 shard_media._copy_files([f"media/pfp/ef{size}.png"
+                                                          for size in range(4)], limit))
+
+    assert moves[0] == {"media/pfp/abcd.png": "media/pfp/ab/cd/abcd.png"}
+    assert len(moves[1]) == 4
+    assert storage.max_in_flight == 2
+
+
+async def test_pictures_with_a_missing_file_leave_no_copy(tmp_path, monkeypatch):
+    storage = LocalStorage(tmp_path)
+    monkeypatch.setattr(shard_media, "storage", storage)
+    for name in ("abcd.png", "abcd_64.webp"):
+        storage.path(f"media/pfp/{name}").parent.mkdir(parents=True, exist_ok=True)
+        storage.path(f"media/pfp/{name}").write_bytes(b"image")
+
+    moves = await shard_media._copy_files(
+        ["media/pfp/abcd.png", "media/pfp/abcd_64.webp", "media/pfp/abcd_128.webp"],
+        asyncio.Semaphore(16))
+
+    assert moves is None
+    assert not list(storage.path("media/pfp/ab").rglob("abcd*"))
+
+
+@pytest.fixture
+def storage(tmp_path, monkeypatch):
+    storage = LocalStorage(tmp_path)
+    monkeypatch.setattr(shard_media, "storage", storage)
+    return storage
+
+
+def store_image(storage, sharded: bool = False) -> str:
+    """
+    Stores an image with the current and a deleted picture of a new user, the first with a
+    variant, in the flat layout unless sharded.
+
+    Returns:
+        str: The digest of the image.
+    """
+    digest = os.urandom(32).hex()
+    current_id, deleted_id = uuid4(), uuid4()
+    path, variant_path = f"media/pfp/{digest}.png", f"media/pfp/{current_id}_48.webp"
+    if sharded:
+        path, variant_path = sharded_key(f"{digest}.png"), sharded_key(f"{current_id}_48.webp")
+    for key in (path, variant_path):
+        storage.path(key).parent.mkdir(parents=True, exist_ok=True)
+        storage.path(key).write_bytes(b"image")
+    with SessionLocal() as session, session.begin():
+        name = f"shard_{uuid4().hex[:12]}"
+        user = User(username=name, email=f"{name}@example.com", password="x")
+        session.add_all([user, MediaBlob(sha256=digest, path=path, ref_count=1)])
+        session.flush()
+        user_id = user.id
+        session.add_all([
+            ProfilePicture(id=deleted_id, user_id=user_id, path=path, blob_sha256=digest,
+                           is_deleted=True),
+            ProfilePicture(id=current_id, user_id=user_id, path=path, blob_sha256=digest)])
+        session.flush()
+        session.add(ProfilePictureVariant(profile_picture_id=current_id, size=48,
+                                          media_type="image/webp", path=variant_path))
+    return digest
+
+
+def paths_of(digest: str) -> set[str]:
+    """
+    The paths recorded for an image, its pictures and their variants.
+    """
+    with SessionLocal() as session:
+        return {
+            *session.scalars(select(MediaBlob.path).where(MediaBlob.sha256 == digest)),
+            *session.scalars(select(ProfilePicture.path)
+                             .where(ProfilePicture.blob_sha256 == digest)),
+            *session.scalars(select(ProfilePictureVariant.path).join(ProfilePicture)
+                             .where(ProfilePicture.blob_sha256 == digest))}
+
+
+def files_of(storage) -> set[str]:
+    return {path.relative_to(storage.root).as_posix()
+            for path in storage.root.rglob("*") if path.is_file()}
+
+
+async def test_batches_are_moved(storage):
+    digests = [store_image(storage) for _ in range(3)]
+
+    await shard_media.shard_media(batch_size=2, pause=0, concurrency=4)
+
+    for digest in digests:
+        paths = paths_of(digest)
+        assert len(paths) == 2
+        assert all(path == sharded_key(path.rsplit("/", 1)[1]) for path in paths)
+        assert paths <= files_of(storage)
+    assert not any(path.count("/") == 2 for path in files_of(storage))
+
+
+async def test_interrupted_runs_are_resumed(storage, monkeypatch):
+    first, second = sorted(store_image(storage) for _ in range(2))
+    copy = storage.copy
+
+    async def fail_second(source_key: str, destination_key: str) -> None:
+        if second in source_key:
+            raise RuntimeError("The copy failed")
+        await copy(source_key, destination_key)
+    monkeypatch.setattr(storage, "copy", fail_second)
+    with pytest.raises(RuntimeError):
+        await shard_media.shard_media(batch_size=1, pause=0, concurrency=4)
+    moved = paths_of(first)
+    assert all(path.count("/") == 4 for path in moved)
+    assert all(path.count("/") == 2 for path in paths_of(second))
+
+    monkeypatch.setattr(storage, "copy", copy)
+    await shard_media.shard_media(batch_size=1, pause=0, concurrency=4)
+
+    assert paths_of(first) == moved
+    assert all(path.count("/") == 4 for path in paths_of(second))
+    assert paths_of(second) <= files_of(storage)
+    assert not any(second in path and path.count("/") == 2 for path in files_of(storage))
+
+
+async def test_sharded_images_are_skipped(storage, monkeypatch):
+    digest = store_image(storage, sharded=True)
+    paths = paths_of(digest)
+    copied = []
+
+    async def copy(source_key: str, destination_key: str) -> None:
+        copied.append(source_key)
+    monkeypatch.setattr(storage, "copy", copy)
+
+    await shard_media.shard_media(batch_size=100, pause=0, concurrency=4)
+
+    assert paths_of(digest) == paths
+    assert not [key for key in copied if digest in key]
+    assert paths <= files_of(storage)
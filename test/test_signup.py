@@ -0,0 +1,52 @@
+"""
+Tests of the rejection of signups whose username or email is taken.
+"""
+
+import asyncio
+from uuid import uuid4
+
+import pytest
+
+from app.core.pw_hasher import password_hasher
+
+pytestmark = pytest.mark.anyio
+
+
+def new_credentials(username: str | None = None) -> dict:
+    name = f"signup_{uuid4().hex[:12]}"
+    return {"username": username or name, "email": f"{name}@example.com",
+            "password": "Passw0rd#"}
+
+
+async def test_concurrent_signups_with_the_same_username(client):
+    username = f"signup_{uuid4().hex[:12]}"
+    signups = 8
+
+    responses = await asyncio.gather(*(client.post("/v1/users/", json=new_credentials(username))
+                                       for _ in range(signups)))
+
+    statuses = sorted(response.status_code for response in responses)
+    assert statuses == [201] + [409] * (signups - 1)
+    assert {response.json()["detail"] for response in responses
+            if response.status_code == 409} == {"Username already registered"}
+
+
+async def test_taken_username_is_rejected_before_hashing(client, user, monkeypatch):
+    async def fail(password):
+        raise AssertionError("the password was hashed")
+    monkeypatch.setattr(password_hasher, "hash_password", fail)
+
+    response = await client.post("/v1/users/",
+                                 json=new_credentials(user["username"].upper()))
+
+    assert response.status_code == 409
+    assert response.json()["detail"] == "Username already registered"
+
+
+async def test_taken_email_is_rejected(client, user):
+    credentials = {**new_credentials(), "email": user["email"].upper()}
+
+    response = await client.post("/v1/users/", json=credentials)
+
+    assert response.status_code == 409
+    assert response.json()["detail"] == "Email already registered"
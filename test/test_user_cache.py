@@ -0,0 +1,80 @@
+"""
+Tests of the user cache: its invalidation, and the validators cached with the profiles.
+"""
+
+from hashlib import blake2b
+
+import pytest
+from fakeredis.aioredis import FakeRedis
+
+from app.core.redis_cache import RedisCache
+from app.core.ttl_cache import TTLCache
+from app.service.user_service import INVALIDATED, invalidate_user_cache, user_cache
+
+pytestmark = pytest.mark.anyio
+
+
+def etag_of(content: bytes) -> str:
+    return f'"{blake2b(content, digest_size=16).hexdigest()}"'
+
+
+async def test_changes_are_served_after_the_profile_was_cached(client, user, token):
+    await client.get(f"/v1/users/{user['id']}")
+
+    response = await client.put("/v1/users/me/username",
+                                json={"username": f"{user['username']}_new"},
+                                headers={"Authorization": f"Bearer {token}"})
+    assert response.status_code == 200
+
+    response = await client.get(f"/v1/users/{user['id']}")
+    assert response.json()["username"] == f"{user['username']}_new"
+
+
+async def test_profile_read_before_an_invalidation_is_not_cached(client, user):
+    stale = (await client.get(f"/v1/users/{user['id']}")).content
+    key = str(user["id"])
+    await user_cache.delete(key)
+
+    # A request read the profile, then the user changed before it cached it
+    await invalidate_user_cache(user["id"])
+    await user_cache.add(key, stale, 60)
+
+    assert await user_cache.get(key) == INVALIDATED
+
+
+def test_ttl_cache_add_keeps_live_entries():
+    now = [0.0]
+    cache = TTLCache(10, clock=lambda: now[0])
+
+    assert cache.add("key", "first", ttl=5)
+    assert not cache.add("key", "second", ttl=5)
+    assert cache.get("key") == "first"
+
+    now[0] += 5
+    assert cache.add("key", "third", ttl=5)
+    assert cache.get("key") == "third"
+
+
+async def test_redis_cache_add_keeps_live_entries():
+    cache = RedisCache("test", FakeRedis())
+
+    await cache.add("key", b"first", 60)
+    await cache.add("key", b"second", 60)
+
+    assert await cache.get("key") == b"first"
+
+
+async def test_etag_is_the_digest_of_the_body_it_is_sent_with(client, user, token):
+    first = await client.get(f"/v1/users/{user['id']}")
+    assert first.headers["etag"] == etag_of(first.content)
+
+    response = await client.get(f"/v1/users/{user['id']}",
+                                headers={"If-None-Match": first.headers["etag"]})
+    assert response.status_code == 304
+
+    await client.put("/v1/users/me/username", json={"username": f"{user['username']}_etag"},
+                     headers={"Authorization": f"Bearer {token}"})
+    response = await client.get(f"/v1/users/{user['id']}",
+                                headers={"If-None-Match": first.headers["etag"]})
+    assert response.status_code == 200
+    assert response.headers["etag"] == etag_of(response.content)